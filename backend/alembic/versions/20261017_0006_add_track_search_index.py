@@ -0,0 +1,68 @@
+"""add track full-text search index
+
+Revision ID: 20261017_0006
+Revises: 20260301_0005
+Create Date: 2026-10-17 09:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "20261017_0006"
+down_revision = "20260301_0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE tracks_fts USING fts5("
+            "title, artist, content='tracks', content_rowid='rowid', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE TRIGGER tracks_fts_ai AFTER INSERT ON tracks BEGIN "
+            "INSERT INTO tracks_fts(rowid, title, artist) VALUES (new.rowid, new.title, new.artist); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER tracks_fts_ad AFTER DELETE ON tracks BEGIN "
+            "INSERT INTO tracks_fts(tracks_fts, rowid, title, artist) "
+            "VALUES ('delete', old.rowid, old.title, old.artist); "
+            "END"
+        )
+        op.execute(
+            "CREATE TRIGGER tracks_fts_au AFTER UPDATE OF title, artist ON tracks BEGIN "
+            "INSERT INTO tracks_fts(tracks_fts, rowid, title, artist) "
+            "VALUES ('delete', old.rowid, old.title, old.artist); "
+            "INSERT INTO tracks_fts(rowid, title, artist) VALUES (new.rowid, new.title, new.artist); "
+            "END"
+        )
+        op.execute("INSERT INTO tracks_fts(tracks_fts) VALUES ('rebuild')")
+    else:
+        op.add_column(
+            "tracks",
+            sa.Column(
+                "search_vector",
+                postgresql.TSVECTOR(),
+                sa.Computed("to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(artist, ''))", persisted=True),
+                nullable=True,
+            ),
+        )
+        op.create_index("ix_tracks_search_vector", "tracks", ["search_vector"], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS tracks_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS tracks_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS tracks_fts_ai")
+        op.execute("DROP TABLE IF EXISTS tracks_fts")
+    else:
+        op.drop_index("ix_tracks_search_vector", table_name="tracks")
+        op.drop_column("tracks", "search_vector")
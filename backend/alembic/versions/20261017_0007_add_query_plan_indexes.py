@@ -0,0 +1,43 @@
+"""add composite indexes for catalog and listening queries
+
+Revision ID: 20261017_0007
+Revises: 20261017_0006
+Create Date: 2026-10-17 11:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "20261017_0007"
+down_revision = "20261017_0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_tracks_status_id", "tracks", ["status", "id"], unique=False)
+    op.create_index(
+        "ix_listening_events_user_id_track_id_action",
+        "listening_events",
+        ["user_id", "track_id", "action"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_listening_events_track_id_action_user_id",
+        "listening_events",
+        ["track_id", "action", "user_id"],
+        unique=False,
+    )
+    # Both single-column indexes are prefixes of the composites above.
+    op.drop_index("ix_listening_events_user_id", table_name="listening_events")
+    op.drop_index("ix_listening_events_track_id", table_name="listening_events")
+
+
+def downgrade() -> None:
+    op.create_index("ix_listening_events_track_id", "listening_events", ["track_id"], unique=False)
+    op.create_index("ix_listening_events_user_id", "listening_events", ["user_id"], unique=False)
+    op.drop_index("ix_listening_events_track_id_action_user_id", table_name="listening_events")
+    op.drop_index("ix_listening_events_user_id_track_id_action", table_name="listening_events")
+    op.drop_index("ix_tracks_status_id", table_name="tracks")
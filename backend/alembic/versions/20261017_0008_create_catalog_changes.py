@@ -0,0 +1,36 @@
+"""create catalog change log
+
+Revision ID: 20261017_0008
+Revises: 20261017_0007
+Create Date: 2026-10-17 13:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_0008"
+down_revision = "20261017_0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "catalog_changes",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("track_id", sa.String(length=64), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # Existing tracks become the first entries of the feed.
+    op.execute(
+        "INSERT INTO catalog_changes (track_id, created_at) "
+        "SELECT id, updated_at FROM tracks ORDER BY updated_at, id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("catalog_changes")
@@ -0,0 +1,29 @@
+"""compact catalog change log to the latest row per track
+
+Revision ID: 20261017_0009
+Revises: 20261017_0008
+Create Date: 2026-10-17 15:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "20261017_0009"
+down_revision = "20261017_0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_catalog_changes_track_id", "catalog_changes", ["track_id"], unique=False)
+    # Only the newest row per track matters to a reader, whatever its token.
+    op.execute(
+        "DELETE FROM catalog_changes WHERE id NOT IN "
+        "(SELECT max_id FROM (SELECT max(id) AS max_id FROM catalog_changes GROUP BY track_id) AS latest)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_catalog_changes_track_id", table_name="catalog_changes")
@@ -0,0 +1,38 @@
+"""add play_count and sort indexes to tracks
+
+Revision ID: 20261017_0010
+Revises: 20261017_0009
+Create Date: 2026-10-17 17:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261017_0010"
+down_revision = "20261017_0009"
+branch_labels = None
+depends_on = None
+
+SORT_COLUMNS = ("uploaded_at", "play_count", "title", "duration_sec")
+
+
+def upgrade() -> None:
+    op.add_column("tracks", sa.Column("play_count", sa.Integer(), nullable=False, server_default="0"))
+    op.execute(
+        "UPDATE tracks SET play_count = ("
+        "SELECT count(*) FROM listening_events "
+        "WHERE listening_events.track_id = tracks.id AND listening_events.action = 'start')"
+    )
+    # Seeded tracks were published without an upload time; sorting by newest needs one.
+    op.execute("UPDATE tracks SET uploaded_at = created_at WHERE status = 'published' AND uploaded_at IS NULL")
+    for column in SORT_COLUMNS:
+        op.create_index(f"ix_tracks_status_{column}_id", "tracks", ["status", column, "id"], unique=False)
+
+
+def downgrade() -> None:
+    for column in reversed(SORT_COLUMNS):
+        op.drop_index(f"ix_tracks_status_{column}_id", table_name="tracks")
+    op.drop_column("tracks", "play_count")
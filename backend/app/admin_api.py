@@ -16,9 +16,11 @@ from sqlalchemy.orm import Session
 
 from backend.app.admin_auth import require_admin
 from backend.app.catalog_repository import (
+    ADMIN_TRACK_FIELDS,
     create_admin_track,
     get_admin_track,
     list_admin_tracks,
+    parse_track_fields,
     publish_track,
     set_track_artwork_path,
     set_track_audio_fallback,
@@ -26,6 +28,7 @@ from backend.app.catalog_repository import (
 )
 from backend.app.db import get_db
 from backend.app.listening_repository import get_track_stats, get_user_stats
+from backend.app.media_api import get_segment_cache_stats, invalidate_hls_track
 from backend.app.metadata_extractor import extract_track_metadata
 from backend.app.schemas import (
     AdminPublishResponse,
@@ -35,6 +38,7 @@ from backend.app.schemas import (
     AdminTrackMetadataResponse,
     AdminTrackResponse,
     AdminTrackUpdateRequest,
+    SegmentCacheStatsResponse,
     TrackStatsResponse,
     UserStatsResponse,
 )
@@ -159,6 +163,8 @@ def _generate_hls(track_id: str, audio_path: Path) -> bool:
     except subprocess.CalledProcessError as exc:
         logger.warning("ffmpeg failed for %s: %s", track_id, exc.stderr.strip())
         return False
+    finally:
+        invalidate_hls_track(track_id)
 
 
 def _probe_duration_sec(audio_path: Path) -> float | None:
@@ -248,9 +254,21 @@ def _validate_artwork_file(path: Path) -> bool:
 def admin_list_tracks(
     q: str | None = Query(default=None),
     status: str | None = Query(default=None),
+    sort: str | None = Query(default=None),
+    fields: str | None = Query(default=None),
     db: Session = Depends(get_db),
 ) -> AdminTrackListResponse:
-    rows = list_admin_tracks(db, q=q, status=status)
+    try:
+        selected_fields = parse_track_fields(fields, ADMIN_TRACK_FIELDS) if fields is not None else ADMIN_TRACK_FIELDS
+    except ValueError as exc:
+        return _bad_request(str(exc))
+    try:
+        rows = list_admin_tracks(db, q=q, status=status, sort=sort, fields=selected_fields)
+    except ValueError:
+        return _bad_request("sort must be one of uploaded_at, popularity, title, duration_sec (prefix - to reverse)")
+    if selected_fields != ADMIN_TRACK_FIELDS:
+        # Sparse rows do not satisfy AdminTrackResponse, so they are returned as-is.
+        return JSONResponse(content={"tracks": rows})
     return AdminTrackListResponse(tracks=[AdminTrackResponse.model_validate(row) for row in rows])
 
 
@@ -402,6 +420,11 @@ def admin_user_stats(user_id: str, db: Session = Depends(get_db)) -> UserStatsRe
     return UserStatsResponse.model_validate(get_user_stats(db, user_id))
 
 
+@admin_v1.get("/stats/segment-cache", response_model=SegmentCacheStatsResponse)
+def admin_segment_cache_stats() -> SegmentCacheStatsResponse:
+    return SegmentCacheStatsResponse.model_validate(get_segment_cache_stats())
+
+
 @admin_v1.get("/logs", response_model=AdminLogsResponse)
 def admin_logs(
     source: str = Query(default="backend"),
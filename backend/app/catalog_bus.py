@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import logging
+import os
+from collections.abc import Callable
+from threading import Event, Thread
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from backend.app.models import CatalogChange
+
+
+CHANNEL = "ferric_catalog"
+# NOTIFY payloads are capped at 8000 bytes; larger writes fall back to "drop everything".
+NOTIFY_PAYLOAD_LIMIT = 7000
+# Most track IDs the poller reports for one change; more and it asks for a full drop.
+POLL_TRACK_ID_LIMIT = 1000
+logger = logging.getLogger("ferric.catalog_bus")
+
+# Receives the newest change ID and the changed track IDs (None: anything may have changed).
+CatalogChangeHandler = Callable[[int, frozenset[str] | None], None]
+
+
+def is_bus_enabled() -> bool:
+    return os.getenv("FERRIC_CATALOG_BUS", "0").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def get_poll_interval_sec() -> float:
+    raw = os.getenv("FERRIC_CATALOG_BUS_POLL_SEC", "1")
+    try:
+        return max(0.01, float(raw))
+    except ValueError:
+        return 1.0
+
+
+def publish_catalog_change(db: Session, change_id: int, track_ids: list[str]) -> None:
+    """Queue a change event in the caller's transaction.
+
+    On Postgres this is a NOTIFY, delivered to every listener only if the write
+    commits. Other databases have nothing to send: subscribers poll instead.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    payload = f"{change_id}|{','.join(track_ids)}"
+    if len(payload.encode("utf-8")) > NOTIFY_PAYLOAD_LIMIT:
+        payload = f"{change_id}|*"
+    db.execute(select(func.pg_notify(CHANNEL, payload)))
+
+
+def _parse_payload(payload: str) -> tuple[int, frozenset[str] | None]:
+    change_id, _, ids = payload.partition("|")
+    return int(change_id), None if ids == "*" else frozenset(filter(None, ids.split(",")))
+
+
+class CatalogBus:
+    """Background subscriber calling `handler` for catalog writes made by any worker or node.
+
+    Postgres uses LISTEN on a dedicated connection; other databases poll the
+    newest `catalog_changes` ID every `interval` seconds.
+    """
+
+    def __init__(self, engine: Engine, handler: CatalogChangeHandler, interval: float | None = None) -> None:
+        self.engine = engine
+        self.handler = handler
+        self.interval = get_poll_interval_sec() if interval is None else interval
+        self._stop = Event()
+        self._thread: Thread | None = None
+        self._last_change_id = 0
+
+    def start(self) -> CatalogBus:
+        with self.engine.connect() as conn:
+            self._last_change_id = conn.scalar(select(func.max(CatalogChange.id))) or 0
+        target = self._listen if self.engine.dialect.name == "postgresql" else self._poll
+        self._thread = Thread(target=target, name="catalog-bus", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(5.0, self.interval * 2))
+
+    def _dispatch(self, change_id: int, track_ids: frozenset[str] | None) -> None:
+        try:
+            self.handler(change_id, track_ids)
+        except Exception:
+            logger.exception("catalog_bus_handler_failed change_id=%s", change_id)
+
+    def poll_once(self) -> None:
+        with self.engine.connect() as conn:
+            latest = conn.scalar(select(func.max(CatalogChange.id))) or 0
+            if latest == self._last_change_id:
+                return
+            track_ids: frozenset[str] | None = None
+            if latest > self._last_change_id:
+                rows = conn.scalars(
+                    select(CatalogChange.track_id)
+                    .where(CatalogChange.id > self._last_change_id)
+                    .limit(POLL_TRACK_ID_LIMIT + 1)
+                ).all()
+                if len(rows) <= POLL_TRACK_ID_LIMIT:
+                    track_ids = frozenset(rows)
+        # A lower ID means the database was reset: anything may have changed.
+        self._last_change_id = latest
+        self._dispatch(latest, track_ids)
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception("catalog_bus_poll_failed")
+
+    def _listen(self) -> None:
+        while not self._stop.is_set():
+            try:
+                raw = self.engine.raw_connection()
+                try:
+                    conn = raw.driver_connection
+                    conn.rollback()
+                    conn.autocommit = True
+                    conn.execute(f"LISTEN {CHANNEL}")
+                    while not self._stop.is_set():
+                        for notify in conn.notifies(timeout=self.interval):
+                            self._dispatch(*_parse_payload(notify.payload))
+                finally:
+                    raw.invalidate()
+            except Exception:
+                logger.exception("catalog_bus_listen_failed")
+                # Events sent while disconnected are lost, so drop everything once back.
+                if self._stop.wait(self.interval):
+                    return
+                self._dispatch(0, None)
+
+
+def start_catalog_bus(engine: Engine, handler: CatalogChangeHandler) -> CatalogBus:
+    return CatalogBus(engine, handler).start()
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import zlib
+from datetime import UTC, datetime
+from pathlib import Path
+from threading import Lock, Timer
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from backend.app.catalog_repository import get_catalog_snapshot, render_track_json
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_EXPORT_ROOT = REPO_ROOT / "public" / "generated" / "catalog"
+INDEX_NAME = "index.json"
+SHARD_SIZE = 500
+logger = logging.getLogger("ferric.catalog_export")
+
+
+def get_export_root() -> Path:
+    return Path(os.getenv("FERRIC_STATIC_CATALOG_DIR", str(DEFAULT_EXPORT_ROOT)))
+
+
+def is_export_enabled() -> bool:
+    return os.getenv("FERRIC_STATIC_CATALOG_EXPORT", "0").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def get_export_delay_sec() -> float:
+    raw = os.getenv("FERRIC_STATIC_CATALOG_EXPORT_DELAY_SEC", "2")
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        return 2.0
+
+
+_EXPORT_LOCK = Lock()
+_EXPORT_PENDING: Timer | None = None
+
+
+def _write_atomic(path: Path, content: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, path)
+
+
+def _read_index(root: Path) -> dict[str, Any] | None:
+    try:
+        return json.loads((root / INDEX_NAME).read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def shard_bucket_count(total: int, shard_size: int) -> int:
+    """Power-of-two bucket count averaging at most `shard_size` tracks per shard.
+
+    It only changes when the catalog doubles or halves, so between those points
+    a track always lands in the same bucket.
+    """
+    return 1 << max(0, (max(1, -(-total // shard_size)) - 1).bit_length())
+
+
+def shard_bucket(track_id: str, buckets: int) -> int:
+    return zlib.crc32(track_id.encode("utf-8")) & (buckets - 1)
+
+
+def export_static_catalog(db: Session, root: Path | None = None, shard_size: int = SHARD_SIZE) -> dict[str, Any]:
+    """Write the published catalog as content-hashed JSON shards plus an `index.json` manifest.
+
+    Tracks are sharded by a hash of their ID, so adding, removing or editing one
+    track rewrites only its own shard; the others keep their (immutable) file names.
+    Skips all writes when the manifest already describes the current snapshot.
+    """
+    root = root or get_export_root()
+    snapshot = get_catalog_snapshot(db)
+    previous = _read_index(root)
+    if previous is not None and previous.get("catalog_etag") == snapshot.etag:
+        return previous
+
+    root.mkdir(parents=True, exist_ok=True)
+    buckets = shard_bucket_count(len(snapshot.tracks), shard_size)
+    chunks: list[list[dict[str, Any]]] = [[] for _ in range(buckets)]
+    for track in snapshot.tracks:
+        chunks[shard_bucket(track["id"], buckets)].append(track)
+    shards: list[dict[str, Any]] = []
+    for bucket, chunk in enumerate(chunks):
+        if not chunk:
+            continue
+        body = b"".join(
+            (
+                b'{"schema_version":"1.0","tracks":[',
+                # Rendered from the snapshot the shards are cut from, so a write landing
+                # mid-export cannot drop a track out of a shard recorded under this etag.
+                b",".join(render_track_json(db, track["id"], snapshot=snapshot) for track in chunk),
+                b"]}",
+            )
+        )
+        name = f"tracks-{hashlib.sha256(body).hexdigest()[:16]}.json"
+        shard_path = root / name
+        if not shard_path.exists():
+            _write_atomic(shard_path, body)
+        shards.append({"path": name, "bucket": bucket, "count": len(chunk)})
+
+    index = {
+        "schema_version": "1.0",
+        "app": {"title": "Ferric POC"},
+        "catalog_etag": snapshot.etag,
+        "generated_at": datetime.now(UTC).isoformat().replace("+00:00", "Z"),
+        "total": len(snapshot.tracks),
+        "shard_size": shard_size,
+        "buckets": buckets,
+        "shards": shards,
+    }
+    _write_atomic(root / INDEX_NAME, json.dumps(index, indent=2).encode("utf-8"))
+
+    # Keep the previous generation so clients holding the old index can finish loading.
+    keep = {shard["path"] for shard in shards}
+    keep.update(shard["path"] for shard in (previous or {}).get("shards", []))
+    for stale in root.glob("tracks-*.json"):
+        if stale.name not in keep:
+            stale.unlink(missing_ok=True)
+    return index
+
+
+def _run_scheduled_export(bind: Any) -> None:
+    global _EXPORT_PENDING
+    with _EXPORT_LOCK:
+        _EXPORT_PENDING = None
+    try:
+        with Session(bind=bind) as db:
+            export_static_catalog(db)
+    except Exception:
+        logger.exception("static catalog export failed")
+
+
+def export_static_catalog_on_change(db: Session) -> None:
+    """Catalog change listener: schedule one export off the request path.
+
+    Writes landing while an export is pending share it, so a burst of admin
+    edits costs a single rebuild.
+    """
+    global _EXPORT_PENDING
+    if not is_export_enabled():
+        return
+    with _EXPORT_LOCK:
+        if _EXPORT_PENDING is not None:
+            return
+        _EXPORT_PENDING = Timer(get_export_delay_sec(), _run_scheduled_export, args=(db.get_bind(),))
+        _EXPORT_PENDING.daemon = True
+        _EXPORT_PENDING.start()
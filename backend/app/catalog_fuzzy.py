@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Sequence
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from backend.app.catalog_repository import CatalogSnapshot
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# Most matches a fuzzy query can return; also the number of candidates re-ranked.
+FUZZY_MAX_RESULTS = 100
+# Trigram postings merged per query. The rarest trigrams are merged first, so very
+# common ones are dropped before a broad query can touch every track.
+POSTINGS_BUDGET = 400_000
+MIN_SIMILARITY = 0.2
+
+
+def _tokens(text: str) -> list[str]:
+    return [token.casefold() for token in _TOKEN_RE.findall(text)]
+
+
+def trigrams(text: str) -> set[str]:
+    """Word trigrams padded like pg_trgm: "abc" -> {"  a", " ab", "abc", "bc "}."""
+    grams: set[str] = set()
+    for token in _tokens(text):
+        padded = f"  {token} "
+        grams.update(padded[index : index + 3] for index in range(len(padded) - 2))
+    return grams
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Levenshtein distance, giving up with `max_distance + 1` once it must exceed `max_distance`."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for row, char_a in enumerate(a, start=1):
+        current = [row]
+        best = row
+        for column, char_b in enumerate(b, start=1):
+            cost = min(
+                previous[column] + 1,
+                current[column - 1] + 1,
+                previous[column - 1] + (char_a != char_b),
+            )
+            current.append(cost)
+            best = min(best, cost)
+        if best > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    """Trigram postings over published titles and artists, one uint32 array per trigram."""
+
+    def __init__(self, tracks: Sequence[dict[str, Any]]) -> None:
+        self.tracks = tracks
+        gram_ids: dict[str, int] = {}
+        token_grams: dict[str, tuple[int, ...]] = {}
+        flat_grams: list[int] = []
+        gram_counts = np.zeros(len(tracks), dtype=np.uint16)
+        for position, track in enumerate(tracks):
+            ids: set[int] = set()
+            for token in _tokens(f"{track['title']} {track['artist']}"):
+                # Words repeat across a catalog, so each word is split into trigrams once.
+                grams = token_grams.get(token)
+                if grams is None:
+                    grams = tuple(gram_ids.setdefault(gram, len(gram_ids)) for gram in trigrams(token))
+                    token_grams[token] = grams
+                ids.update(grams)
+            gram_counts[position] = min(len(ids), np.iinfo(np.uint16).max)
+            flat_grams.extend(ids)
+
+        # Group (trigram, track) pairs by trigram in one sort instead of growing a list per trigram.
+        grams_array = np.asarray(flat_grams, dtype=np.uint32)
+        positions = np.repeat(np.arange(len(tracks), dtype=np.uint32), gram_counts.astype(np.int64))
+        order = np.argsort(grams_array, kind="stable")
+        grams_array, positions = grams_array[order], positions[order]
+        bounds = np.flatnonzero(np.diff(grams_array)) + 1
+        names = {gram_id: gram for gram, gram_id in gram_ids.items()}
+        self.postings = {
+            names[int(chunk_grams[0])]: chunk
+            for chunk_grams, chunk in zip(np.split(grams_array, bounds), np.split(positions, bounds))
+            if len(chunk)
+        }
+        self.gram_counts = gram_counts
+
+    def _candidates(self, query_grams: set[str]) -> tuple[np.ndarray, np.ndarray]:
+        lists = sorted(
+            (self.postings[gram] for gram in query_grams if gram in self.postings),
+            key=len,
+        )
+        selected: list[np.ndarray] = []
+        merged = 0
+        for postings in lists:
+            if selected and merged + len(postings) > POSTINGS_BUDGET:
+                break
+            selected.append(postings)
+            merged += len(postings)
+        if not selected:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        positions, overlap = np.unique(np.concatenate(selected), return_counts=True)
+        similarity = overlap / (len(query_grams) + self.gram_counts[positions].astype(np.float64) - overlap)
+        keep = similarity >= MIN_SIMILARITY
+        positions, similarity = positions[keep], similarity[keep]
+        if len(positions) > FUZZY_MAX_RESULTS:
+            top = np.argpartition(-similarity, FUZZY_MAX_RESULTS - 1)[:FUZZY_MAX_RESULTS]
+            positions, similarity = positions[top], similarity[top]
+        return positions, similarity
+
+    def search(self, q: str) -> list[dict[str, Any]]:
+        """Return tracks similar to `q`, closest edit distance first, then trigram similarity."""
+        query_tokens = _tokens(q)
+        query_grams = trigrams(q)
+        if not query_grams:
+            return []
+        needle = " ".join(query_tokens)
+        max_distance = max(1, len(needle) // 3)
+
+        ranked: list[tuple[int, float, str, dict[str, Any]]] = []
+        positions, similarity = self._candidates(query_grams)
+        for position, score in zip(positions.tolist(), similarity.tolist()):
+            track = self.tracks[position]
+            # Compare against whole fields and, for one-word queries, each word.
+            fields = [" ".join(_tokens(track["title"])), " ".join(_tokens(track["artist"]))]
+            if len(query_tokens) == 1:
+                fields.extend(_tokens(f"{track['title']} {track['artist']}"))
+            distance = min(edit_distance(needle, field, max_distance) for field in fields)
+            ranked.append((distance, -score, track["id"], track))
+        ranked.sort(key=lambda item: item[:3])
+        return [track for _distance, _score, _track_id, track in ranked]
+
+
+_FUZZY_LOCK = Lock()
+_FUZZY_INDEX: tuple[CatalogSnapshot, FuzzyIndex] | None = None
+_FUZZY_REBUILDING = False
+
+
+def _rebuild(snapshot: CatalogSnapshot) -> None:
+    global _FUZZY_INDEX, _FUZZY_REBUILDING
+    try:
+        index = FuzzyIndex(snapshot.tracks)
+        with _FUZZY_LOCK:
+            cached = _FUZZY_INDEX
+            if cached is None or cached[0].bind is not snapshot.bind or cached[0].version <= snapshot.version:
+                _FUZZY_INDEX = (snapshot, index)
+    finally:
+        with _FUZZY_LOCK:
+            _FUZZY_REBUILDING = False
+
+
+def get_fuzzy_index(snapshot: CatalogSnapshot) -> FuzzyIndex:
+    """Return a trigram index for `snapshot`'s database.
+
+    The first fuzzy query builds the index inline. After a catalog change the
+    previous index keeps serving while a replacement is built in the background,
+    so callers must re-check results against the current snapshot.
+    """
+    global _FUZZY_INDEX, _FUZZY_REBUILDING
+    with _FUZZY_LOCK:
+        cached = _FUZZY_INDEX
+        if cached is not None and cached[0] is snapshot:
+            return cached[1]
+        if cached is not None and cached[0].bind is snapshot.bind:
+            if not _FUZZY_REBUILDING:
+                _FUZZY_REBUILDING = True
+                Thread(target=_rebuild, args=(snapshot,), name="fuzzy-index-rebuild", daemon=True).start()
+            return cached[1]
+    index = FuzzyIndex(snapshot.tracks)
+    with _FUZZY_LOCK:
+        _FUZZY_INDEX = (snapshot, index)
+    return index
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import fcntl
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import Iterator, Mapping, Sequence
+from pathlib import Path
+from typing import Any, overload
+
+import numpy as np
+
+
+MAGIC = b"FCM1"
+FORMAT_VERSION = 1
+# magic, format version, track count, hash slots, change ID, source key, catalog ETag.
+_HEADER = struct.Struct("<4sIIIQ32s32s")
+_HEADER_SIZE = 96
+_STRING_COLUMNS = ("id", "title", "artist", "artwork")
+_ETAG_WIDTH = 34
+
+
+def get_catalog_mmap_path() -> Path | None:
+    """Shared snapshot file for all workers; unset keeps each worker's snapshot in its own memory."""
+    raw = os.getenv("FERRIC_CATALOG_MMAP_PATH", "").strip()
+    return Path(raw) if raw else None
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _slot_count(count: int) -> int:
+    slots = 8
+    while slots < count * 2:
+        slots *= 2
+    return slots
+
+
+def _layout(count: int, slots: int) -> dict[str, int]:
+    """Byte offset of each section; the string heap runs from `heap` to the end of the file."""
+    offsets: dict[str, int] = {}
+    position = _HEADER_SIZE
+    for name, size in (
+        ("duration_sec", 4 * count),
+        ("slots", 4 * slots),
+        *((f"{column}_starts", 4 * (count + 1)) for column in _STRING_COLUMNS),
+        ("etags", _ETAG_WIDTH * count),
+    ):
+        offsets[name] = position
+        position = _align(position + size)
+    offsets["heap"] = position
+    return offsets
+
+
+def _encode(
+    tracks: Sequence[dict[str, Any]], track_etags: Mapping[str, str], etag: str, change_id: int, source: str
+) -> bytes:
+    count = len(tracks)
+    slots = _slot_count(count)
+    layout = _layout(count, slots)
+
+    heap = bytearray()
+    starts: dict[str, np.ndarray] = {}
+    encoded_ids: list[bytes] = []
+    for column in _STRING_COLUMNS:
+        column_starts = [0] * (count + 1)
+        for position, track in enumerate(tracks):
+            if column == "artwork":
+                value = (track["artwork"] or {}).get("square_512") or ""
+            else:
+                value = track[column]
+            encoded = value.encode("utf-8")
+            if column == "id":
+                encoded_ids.append(encoded)
+            column_starts[position] = len(heap)
+            heap += encoded
+            if len(heap) >= 2**32:
+                raise ValueError("catalog is too large for the mapped snapshot format")
+        column_starts[count] = len(heap)
+        starts[column] = np.asarray(column_starts, dtype="<u4")
+
+    # Open addressing with linear probing; a slot holds position + 1, 0 is empty.
+    # crc32 rather than hash(): the table must agree between processes.
+    table = [0] * slots
+    mask = slots - 1
+    for position, encoded in enumerate(encoded_ids):
+        slot = zlib.crc32(encoded) & mask
+        while table[slot]:
+            slot = (slot + 1) & mask
+        table[slot] = position + 1
+
+    buffer = bytearray(layout["heap"] + len(heap))
+    _HEADER.pack_into(
+        buffer, 0, MAGIC, FORMAT_VERSION, count, slots, change_id, source.encode("ascii"), etag.encode("ascii")
+    )
+    sections = {
+        "duration_sec": np.asarray([track["duration_sec"] for track in tracks], dtype="<i4").tobytes(),
+        "slots": np.asarray(table, dtype="<u4").tobytes(),
+        "etags": b"".join(track_etags[track["id"]].encode("ascii").ljust(_ETAG_WIDTH) for track in tracks),
+        **{f"{column}_starts": starts[column].tobytes() for column in _STRING_COLUMNS},
+    }
+    for name, data in sections.items():
+        buffer[layout[name] : layout[name] + len(data)] = data
+    buffer[layout["heap"] :] = heap
+    return bytes(buffer)
+
+
+class MappedCatalog:
+    """Read-only view of a snapshot file; arrays are numpy views straight onto the mapping."""
+
+    def __init__(self, mapping: mmap.mmap) -> None:
+        magic, format_version, count, slots, change_id, source, etag = _HEADER.unpack_from(mapping, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError("not a catalog snapshot file")
+        self._mapping = mapping
+        self.count = count
+        self.change_id = change_id
+        self.source = source.decode("ascii")
+        self.etag = etag.decode("ascii")
+        layout = _layout(count, slots)
+        self._mask = slots - 1
+        self._durations = np.frombuffer(mapping, dtype="<i4", count=count, offset=layout["duration_sec"])
+        self._slots = np.frombuffer(mapping, dtype="<u4", count=slots, offset=layout["slots"])
+        self._starts = {
+            column: np.frombuffer(mapping, dtype="<u4", count=count + 1, offset=layout[f"{column}_starts"])
+            for column in _STRING_COLUMNS
+        }
+        self._etags_offset = layout["etags"]
+        self._heap = memoryview(mapping)[layout["heap"] :]
+        self.tracks = MappedTracks(self)
+        self.by_id = MappedTrackIndex(self)
+        self.track_etags = MappedTrackEtags(self)
+
+    def close(self) -> None:
+        """Unmap the file; only safe once no decoded views of it are still in use."""
+        self._heap.release()
+        del self._durations, self._slots, self._starts
+        self._mapping.close()
+
+    def _bytes(self, column: str, position: int) -> memoryview:
+        starts = self._starts[column]
+        return self._heap[int(starts[position]) : int(starts[position + 1])]
+
+    def _string(self, column: str, position: int) -> str:
+        return str(self._bytes(column, position), "utf-8")
+
+    def position(self, track_id: str) -> int | None:
+        encoded = track_id.encode("utf-8")
+        slot = zlib.crc32(encoded) & self._mask
+        while True:
+            value = int(self._slots[slot])
+            if not value:
+                return None
+            if self._bytes("id", value - 1) == encoded:
+                return value - 1
+            slot = (slot + 1) & self._mask
+
+    def track(self, position: int) -> dict[str, Any]:
+        artwork = self._string("artwork", position)
+        return {
+            "id": self._string("id", position),
+            "title": self._string("title", position),
+            "artist": self._string("artist", position),
+            "duration_sec": int(self._durations[position]),
+            "artwork": {"square_512": artwork} if artwork else {},
+        }
+
+    def track_id(self, position: int) -> str:
+        return self._string("id", position)
+
+    def track_etag(self, position: int) -> str:
+        start = self._etags_offset + position * _ETAG_WIDTH
+        return self._mapping[start : start + _ETAG_WIDTH].rstrip(b" ").decode("ascii")
+
+
+class MappedTracks(Sequence[dict[str, Any]]):
+    """Tracks in ID order, decoded from the mapping on access."""
+
+    def __init__(self, catalog: MappedCatalog) -> None:
+        self._catalog = catalog
+
+    def __len__(self) -> int:
+        return self._catalog.count
+
+    @overload
+    def __getitem__(self, index: int) -> dict[str, Any]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[dict[str, Any]]: ...
+
+    def __getitem__(self, index: int | slice) -> dict[str, Any] | list[dict[str, Any]]:
+        if isinstance(index, slice):
+            return [self._catalog.track(position) for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._catalog.track(index)
+
+
+class MappedTrackIndex(Mapping[str, dict[str, Any]]):
+    """Track ID -> track, answered from the on-disk hash index."""
+
+    def __init__(self, catalog: MappedCatalog) -> None:
+        self._catalog = catalog
+
+    def __getitem__(self, track_id: str) -> dict[str, Any]:
+        position = self._catalog.position(track_id)
+        if position is None:
+            raise KeyError(track_id)
+        return self._catalog.track(position)
+
+    def __contains__(self, track_id: object) -> bool:
+        return isinstance(track_id, str) and self._catalog.position(track_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._catalog.track_id(position) for position in range(self._catalog.count))
+
+    def __len__(self) -> int:
+        return self._catalog.count
+
+
+class MappedTrackEtags(MappedTrackIndex):
+    """Track ID -> quoted per-track ETag."""
+
+    def __getitem__(self, track_id: str) -> str:  # type: ignore[override]
+        position = self._catalog.position(track_id)
+        if position is None:
+            raise KeyError(track_id)
+        return self._catalog.track_etag(position)
+
+
+def _map(path: Path) -> MappedCatalog | None:
+    try:
+        with path.open("rb") as handle:
+            mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        # ValueError: mmap refuses an empty file.
+        return None
+    try:
+        return MappedCatalog(mapping)
+    except (ValueError, struct.error):
+        mapping.close()
+        return None
+
+
+def open_catalog_file(path: Path) -> MappedCatalog | None:
+    """Map the current snapshot file, or return None when it is missing or not a snapshot."""
+    return _map(path)
+
+
+def write_catalog_file(
+    path: Path,
+    tracks: Sequence[dict[str, Any]],
+    track_etags: Mapping[str, str],
+    etag: str,
+    change_id: int,
+    source: str,
+) -> MappedCatalog:
+    """Write a snapshot for `change_id` and swap it in with one rename.
+
+    `source` is a 32-character key for the database state the tracks were read
+    from; readers only reuse a file whose key matches their own.
+
+    Workers that already mapped the previous file keep reading it until they
+    remap; the returned view is of the file written here, even if a newer one
+    has replaced it since.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(_encode(tracks, track_etags, etag, change_id, source))
+    with tmp.open("rb") as handle:
+        os.fsync(handle.fileno())
+    written = _map(tmp)
+    if written is None:
+        raise ValueError(f"failed to map freshly written catalog snapshot {tmp}")
+    # Compare and rename under an exclusive lock on a sidecar file, so two workers
+    # publishing at once cannot both pass the check and let the older one win.
+    with path.with_name(f".{path.name}.lock").open("a") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        current = _map(path)
+        current_change_id = None if current is None else current.change_id
+        if current is not None:
+            current.close()
+        if current_change_id is not None and current_change_id > change_id:
+            # A worker that saw a newer catalog already published; don't roll it back.
+            tmp.unlink()
+        else:
+            os.replace(tmp, path)
+    return written
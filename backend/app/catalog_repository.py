@@ -1,151 +1,880 @@
 from __future__ import annotations
 
+import binascii
+import hashlib
+import json
+import re
+from base64 import b64decode, urlsafe_b64encode
+from bisect import bisect_right
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
 from datetime import UTC, datetime
+from itertools import islice
 from pathlib import Path
+from threading import Lock
 from typing import Any
 from uuid import uuid4
 
-from sqlalchemy import func, or_, select
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
-from backend.app.catalog_seed import CATALOG_PATH, load_catalog
-from backend.app.models import Track, TrackArtwork, TrackStream
-from backend.app.schemas import AdminTrackCreateRequest, AdminTrackUpdateRequest
+from backend.app.catalog_bus import publish_catalog_change
+from backend.app.catalog_fuzzy import get_fuzzy_index
+from backend.app.catalog_mmap import get_catalog_mmap_path, open_catalog_file, write_catalog_file
+from backend.app.catalog_search import count_track_matches, ranked_match_subquery, search_track_ids
+from backend.app.catalog_seed import CATALOG_PATH, iter_catalog_tracks
+from backend.app.models import CatalogChange, Track, TrackArtwork, TrackStream
+from backend.app.schemas import AdminTrackCreateRequest, AdminTrackUpdateRequest, CatalogPage, TrackMetadata
+from backend.app.single_flight import SingleFlight
+from backend.app.stream_cache import StreamCache
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Published tracks for one catalog version of one database.
+
+    Tracks live in process memory, or in the shared mapped file when
+    `FERRIC_CATALOG_MMAP_PATH` is set (see `catalog_mmap`).
+    """
+
+    version: int
+    bind: Any
+    tracks: Sequence[dict[str, Any]]
+    by_id: Mapping[str, dict[str, Any]]
+    etag: str
+    track_etags: Mapping[str, str]
+    # Artists sorted by ID, and each artist's published track IDs in ID order.
+    artists: tuple[dict[str, Any], ...]
+    artist_track_ids: dict[str, tuple[str, ...]]
+    # Highest catalog_changes ID whose write is reflected in `tracks`.
+    change_id: int
+    # Encoded TrackMetadata JSON, filled lazily on first render of each track.
+    track_json: dict[str, bytes] = field(default_factory=dict)
+    # Encoded sparse-fieldset JSON per field tuple, filled the same way.
+    projected_json: dict[tuple[str, ...], dict[str, bytes]] = field(default_factory=dict)
+
+
+class ChangeTokenExpiredError(Exception):
+    """The change-feed token cannot be resumed; the client must resync from token 0."""
+
+
+SEARCH_TOTAL_ESTIMATE_CAP = 1000
+PUBLIC_TRACK_FIELDS = ("id", "title", "artist", "duration_sec", "artwork")
+ADMIN_TRACK_FIELDS = (
+    "id",
+    "title",
+    "artist",
+    "duration_sec",
+    "status",
+    "uploaded_at",
+    "updated_at",
+    "artwork",
+    "stream",
+)
+CHANGE_LOG_CHUNK = 500
+# Postgres advisory lock key serializing change-log writers (any fixed bigint works).
+CHANGE_LOG_LOCK_KEY = 0x66657272
+SEED_CHUNK_SIZE = 2000
+
+_CATALOG_CACHE_LOCK = Lock()
+_CATALOG_VERSION = 0
+_CATALOG_SNAPSHOT: CatalogSnapshot | None = None
+_CATALOG_CHANGE_LISTENERS: list[Callable[[Session], None]] = []
+_CATALOG_INVALIDATION_LISTENERS: list[Callable[[frozenset[str] | None], None]] = []
+# Concurrent identical reads share one query; see `single_flight`.
+_READS = SingleFlight()
+# Resolved stream rows by track ID, dropped by the writes that change them.
+_STREAM_CACHE = StreamCache()
 
 
 def _to_iso(dt: datetime) -> str:
     return dt.astimezone(UTC).isoformat().replace("+00:00", "Z")
 
 
-def _upsert_track(db: Session, raw: dict[str, Any]) -> None:
+def get_catalog_version() -> int:
+    return _CATALOG_VERSION
+
+
+def add_catalog_change_listener(listener: Callable[[Session], None]) -> None:
+    """Register a callback run with the writing session after every committed catalog change."""
+    with _CATALOG_CACHE_LOCK:
+        if listener not in _CATALOG_CHANGE_LISTENERS:
+            _CATALOG_CHANGE_LISTENERS.append(listener)
+
+
+def add_catalog_invalidation_listener(listener: Callable[[frozenset[str] | None], None]) -> None:
+    """Register a callback for writes made by other workers or nodes, with the changed track IDs.
+
+    The IDs are None when the bus cannot tell what changed; drop everything then.
+    """
+    with _CATALOG_CACHE_LOCK:
+        if listener not in _CATALOG_INVALIDATION_LISTENERS:
+            _CATALOG_INVALIDATION_LISTENERS.append(listener)
+
+
+def invalidate_catalog(change_id: int, track_ids: frozenset[str] | None) -> None:
+    """Catalog bus handler: drop cached catalog state after a write elsewhere.
+
+    The snapshot is kept when it already reflects `change_id` (the write was made
+    or read here first); per-entry caches are told about the tracks either way.
+    """
+    global _CATALOG_SNAPSHOT, _CATALOG_VERSION
+    with _CATALOG_CACHE_LOCK:
+        snapshot = _CATALOG_SNAPSHOT
+        if track_ids is None or snapshot is None or snapshot.change_id < change_id:
+            _CATALOG_VERSION += 1
+            _CATALOG_SNAPSHOT = None
+        listeners = list(_CATALOG_INVALIDATION_LISTENERS)
+    _STREAM_CACHE.invalidate(track_ids)
+    for listener in listeners:
+        listener(track_ids)
+
+
+def _log_catalog_changes(db: Session, track_ids: list[str]) -> None:
+    """Append change-feed rows in the caller's transaction; commit happens with the write.
+
+    The log is compacted as it grows: a track's older rows are dropped when it gets a
+    new one. A reader holding any token still sees the track through the new row, so
+    the log stays at one row per track and no token ever expires.
+
+    Tokens are only safe if change IDs become visible in order. SQLite allows one
+    writer at a time, but Postgres hands out sequence values at insert time, so two
+    concurrent writers can commit IDs out of order and a reader could move its token
+    past a row that commits later. On Postgres, writers therefore take a
+    transaction-scoped advisory lock first and the log is appended to one
+    transaction at a time.
+    """
+    if track_ids and db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(CHANGE_LOG_LOCK_KEY)))
     now = datetime.now(UTC)
-    track = db.get(Track, raw["id"])
-    if track is None:
-        track = Track(
-            id=raw["id"],
-            title=raw["title"],
-            artist=raw["artist"],
-            duration_sec=int(raw["duration_sec"]),
-            status="published",
-            created_at=now,
-            updated_at=now,
+    for start in range(0, len(track_ids), CHANGE_LOG_CHUNK):
+        chunk = track_ids[start : start + CHANGE_LOG_CHUNK]
+        # Insert before deleting: SQLite reuses the highest rowid once it is deleted,
+        # which would hand a new change the token a reader already holds.
+        previous_max = db.scalar(select(func.max(CatalogChange.id))) or 0
+        db.execute(insert(CatalogChange), [{"track_id": track_id, "created_at": now} for track_id in chunk])
+        db.execute(
+            delete(CatalogChange).where(CatalogChange.track_id.in_(chunk), CatalogChange.id <= previous_max)
         )
-        db.add(track)
+    if track_ids:
+        publish_catalog_change(db, db.scalar(select(func.max(CatalogChange.id))) or 0, track_ids)
+
+
+def _bump_catalog_version(db: Session, track_ids: Iterable[str] = ()) -> None:
+    """Run after a committed catalog write; cached streams of `track_ids` are dropped first."""
+    global _CATALOG_VERSION, _CATALOG_SNAPSHOT
+    _STREAM_CACHE.invalidate(track_ids)
+    with _CATALOG_CACHE_LOCK:
+        _CATALOG_VERSION += 1
+        _CATALOG_SNAPSHOT = None
+        listeners = list(_CATALOG_CHANGE_LISTENERS)
+    for listener in listeners:
+        listener(db)
+
+
+def _public_track(track: Track, artwork_path: str | None) -> dict[str, Any]:
+    return {
+        "id": track.id,
+        "title": track.title,
+        "artist": track.artist,
+        "duration_sec": track.duration_sec,
+        "artwork": {"square_512": artwork_path} if artwork_path else {},
+    }
+
+
+_ARTIST_SLUG_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def artist_id_for(name: str) -> str:
+    slug = _ARTIST_SLUG_RE.sub("-", name.casefold()).strip("-")
+    return slug or f"artist-{hashlib.sha256(name.encode('utf-8')).hexdigest()[:12]}"
+
+
+def _build_artist_index(
+    tracks: Sequence[dict[str, Any]],
+) -> tuple[tuple[dict[str, Any], ...], dict[str, tuple[str, ...]]]:
+    names: dict[str, str] = {}
+    track_ids: dict[str, list[str]] = {}
+    for track in tracks:
+        artist_id = artist_id_for(track["artist"])
+        names.setdefault(artist_id, track["artist"])
+        track_ids.setdefault(artist_id, []).append(track["id"])
+    artists = tuple(
+        {"id": artist_id, "name": names[artist_id], "track_count": len(track_ids[artist_id])}
+        for artist_id in sorted(names)
+    )
+    return artists, {artist_id: tuple(ids) for artist_id, ids in track_ids.items()}
+
+
+def _content_hash(*parts: Any) -> str:
+    encoded = json.dumps(parts, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+
+def _build_catalog_snapshot(db: Session) -> CatalogSnapshot:
+    ensure_catalog_seeded(db)
+    # Read the version before loading rows so a write that lands mid-build
+    # leaves the snapshot stamped stale and it is rebuilt on the next read.
+    version = get_catalog_version()
+    # Change rows commit atomically with their track writes, so every change up to
+    # this ID is visible to the track query below.
+    latest = db.execute(
+        select(CatalogChange.id, CatalogChange.track_id, CatalogChange.created_at)
+        .order_by(CatalogChange.id.desc())
+        .limit(1)
+    ).first()
+    change_id = latest.id if latest is not None else 0
+    path = get_catalog_mmap_path() if latest is not None else None
+    # The newest change row identifies this catalog state across workers; its
+    # timestamp keeps a recreated database from matching an old file by ID alone.
+    source = _content_hash(latest.id, latest.track_id, latest.created_at.isoformat()) if latest is not None else ""
+    mapped = open_catalog_file(path) if path is not None else None
+    if mapped is not None and mapped.source == source:
+        # Another worker already published this catalog; map it instead of loading rows.
+        tracks, by_id, track_etags, etag = mapped.tracks, mapped.by_id, mapped.track_etags, mapped.etag
     else:
-        track.title = raw["title"]
-        track.artist = raw["artist"]
-        track.duration_sec = int(raw["duration_sec"])
-        track.updated_at = now
-
-    artwork_path = raw.get("artwork", {}).get("square_512")
-    if artwork_path:
-        artwork = db.get(TrackArtwork, raw["id"])
-        if artwork is None:
-            artwork = TrackArtwork(
-                track_id=raw["id"],
-                square_512_path=artwork_path,
-                created_at=now,
-                updated_at=now,
-            )
-            db.add(artwork)
+        rows = db.execute(
+            select(Track, TrackArtwork.square_512_path)
+            .outerjoin(TrackArtwork, TrackArtwork.track_id == Track.id)
+            .where(Track.status == "published")
+            .order_by(Track.id)
+        ).all()
+        loaded = tuple(_public_track(track, artwork_path) for track, artwork_path in rows)
+        # ETags hash content rather than the in-process version counter, so they
+        # stay valid across restarts and agree between workers.
+        loaded_etags = {track["id"]: f'"{_content_hash(track)}"' for track in loaded}
+        etag = _content_hash(list(loaded_etags.values()))
+        if path is not None:
+            mapped = write_catalog_file(path, loaded, loaded_etags, etag, change_id, source)
+            tracks, by_id, track_etags = mapped.tracks, mapped.by_id, mapped.track_etags
         else:
-            artwork.square_512_path = artwork_path
-            artwork.updated_at = now
+            tracks, by_id, track_etags = loaded, {track["id"]: track for track in loaded}, loaded_etags
+    artists, artist_track_ids = _build_artist_index(tracks)
+    return CatalogSnapshot(
+        version=version,
+        bind=db.get_bind(),
+        tracks=tracks,
+        by_id=by_id,
+        etag=etag,
+        track_etags=track_etags,
+        artists=artists,
+        artist_track_ids=artist_track_ids,
+        change_id=change_id,
+    )
 
-    stream = raw.get("stream", {})
-    playlist_path = stream.get("url")
-    if playlist_path:
-        stream_row = db.get(TrackStream, raw["id"])
-        if stream_row is None:
-            stream_row = TrackStream(
-                track_id=raw["id"],
-                protocol=stream.get("protocol", "hls"),
-                playlist_path=playlist_path,
-                fallback_path=stream.get("fallback_url"),
-                created_at=now,
-                updated_at=now,
+
+def get_catalog_snapshot(db: Session) -> CatalogSnapshot:
+    global _CATALOG_SNAPSHOT
+    snapshot = _CATALOG_SNAPSHOT
+    if snapshot is not None and snapshot.version == _CATALOG_VERSION and snapshot.bind is db.get_bind():
+        return snapshot
+
+    # After a catalog change every in-flight request misses at once; one rebuilds. The
+    # version is part of the key so a request arriving after a write never joins a build
+    # that started before it.
+    key = ("catalog_snapshot", db.get_bind(), _CATALOG_VERSION)
+    snapshot = _READS.do(key, lambda: _build_catalog_snapshot(db))
+    with _CATALOG_CACHE_LOCK:
+        if snapshot.version == _CATALOG_VERSION:
+            _CATALOG_SNAPSHOT = snapshot
+    return snapshot
+
+
+def _encode_cursor(kind: str, value: str) -> str:
+    return urlsafe_b64encode(f"{kind}:{value}".encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        decoded = b64decode(padded.encode("ascii"), altchars=b"-_", validate=True).decode("utf-8")
+    except (binascii.Error, UnicodeError) as exc:
+        raise ValueError("invalid cursor") from exc
+    kind, sep, value = decoded.partition(":")
+    if not sep or kind not in {"id", "pos", "key"} or (kind == "pos" and not value.isdigit()):
+        raise ValueError("invalid cursor")
+    return kind, value
+
+
+# Public sort names -> Track columns; each has a (status, column, id) index.
+TRACK_SORTS = {
+    "uploaded_at": Track.uploaded_at,
+    "popularity": Track.play_count,
+    "title": Track.title,
+    "duration_sec": Track.duration_sec,
+}
+
+
+def parse_track_sort(sort: str) -> tuple[str, bool]:
+    """Split `sort` (`title`, `-uploaded_at`, ...) into a TRACK_SORTS name and a descending flag."""
+    name = sort.removeprefix("-")
+    if name not in TRACK_SORTS:
+        raise ValueError("invalid sort")
+    return name, sort.startswith("-")
+
+
+def _sort_order(sort: str) -> list[Any]:
+    name, descending = parse_track_sort(sort)
+    column = TRACK_SORTS[name]
+    # The ID tie-break follows the sort direction so one index serves the whole ORDER BY.
+    if descending:
+        return [column.desc(), Track.id.desc()]
+    return [column.asc(), Track.id.asc()]
+
+
+def _encode_sort_key(name: str, track_id: str, value: Any) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return _encode_cursor("key", json.dumps([name, value, track_id], separators=(",", ":")))
+
+
+def _sort_key_filter(name: str, descending: bool, cursor_value: str) -> Any:
+    try:
+        cursor_name, value, track_id = json.loads(cursor_value)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("invalid cursor") from exc
+    if cursor_name != name or not isinstance(track_id, str):
+        raise ValueError("invalid cursor")
+    if name == "uploaded_at" and value is not None:
+        value = datetime.fromisoformat(value)
+    column = TRACK_SORTS[name]
+    if value is None:
+        raise ValueError("invalid cursor")
+    if descending:
+        return or_(column < value, and_(column == value, Track.id < track_id))
+    return or_(column > value, and_(column == value, Track.id > track_id))
+
+
+def _sorted_track_page(
+    db: Session, sort: str, limit: int, offset: int, cursor_kind: str | None, cursor_value: str
+) -> tuple[list[str], bool, str | None]:
+    """Return one page of published track IDs in `sort` order, read by an index range scan."""
+    name, descending = parse_track_sort(sort)
+    column = TRACK_SORTS[name]
+    stmt = select(Track.id, column).where(Track.status == "published")
+    if cursor_kind == "key":
+        stmt = stmt.where(_sort_key_filter(name, descending, cursor_value))
+    elif cursor_kind is not None:
+        raise ValueError("sorted pages use key cursors")
+    elif offset:
+        stmt = stmt.offset(offset)
+    rows = db.execute(stmt.order_by(*_sort_order(sort)).limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = _encode_sort_key(name, rows[-1][0], rows[-1][1]) if rows and has_more else None
+    return [track_id for track_id, _value in rows], has_more, next_cursor
+
+
+def parse_track_fields(fields: str, allowed: tuple[str, ...]) -> tuple[str, ...]:
+    """Parse a `fields=` list into `allowed` order; `id` is always included."""
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    return tuple(name for name in allowed if name in requested)
+
+
+def _matches_query(track: dict[str, Any], needle: str) -> bool:
+    return needle in track["title"].lower() or needle in track["artist"].lower()
+
+
+def _upsert_rows(db: Session, model: Any, rows: list[dict[str, Any]], key: str, update: tuple[str, ...]) -> None:
+    """`INSERT ... ON CONFLICT (key) DO UPDATE` for all `rows` in one batched statement."""
+    if not rows:
+        return
+    dialect_insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    # The Core table skips the ORM's per-row bulk bookkeeping.
+    stmt = dialect_insert(model.__table__)
+    stmt = stmt.on_conflict_do_update(index_elements=[key], set_={name: stmt.excluded[name] for name in update})
+    db.execute(stmt, rows)
+
+
+def _seed_chunk(db: Session, chunk: list[dict[str, Any]]) -> list[str]:
+    """Diff manifest tracks against stored rows and upsert what differs; returns the changed IDs.
+
+    Three queries read the chunk's stored tracks, artwork and streams, and at most
+    three upserts write it, whatever the chunk size.
+    """
+    now = datetime.now(UTC)
+    # A manifest listing an ID twice keeps its last entry.
+    manifest = {raw["id"]: raw for raw in chunk}
+    ids = list(manifest)
+    stored_tracks = {
+        row.id: (row.title, row.artist, row.duration_sec)
+        for row in db.execute(
+            select(Track.id, Track.title, Track.artist, Track.duration_sec).where(Track.id.in_(ids))
+        )
+    }
+    stored_artwork = dict(
+        db.execute(
+            select(TrackArtwork.track_id, TrackArtwork.square_512_path).where(TrackArtwork.track_id.in_(ids))
+        ).all()
+    )
+    stored_streams = {
+        row.track_id: (row.protocol, row.playlist_path, row.fallback_path)
+        for row in db.execute(
+            select(
+                TrackStream.track_id, TrackStream.protocol, TrackStream.playlist_path, TrackStream.fallback_path
+            ).where(TrackStream.track_id.in_(ids))
+        )
+    }
+
+    track_rows: list[dict[str, Any]] = []
+    artwork_rows: list[dict[str, Any]] = []
+    stream_rows: list[dict[str, Any]] = []
+    changed_ids: list[str] = []
+    for track_id, raw in manifest.items():
+        changed = False
+        values = (raw["title"], raw["artist"], int(raw["duration_sec"]))
+        if stored_tracks.get(track_id) != values:
+            # New tracks publish immediately; updates keep status and upload time.
+            track_rows.append(
+                {
+                    "id": track_id,
+                    "title": values[0],
+                    "artist": values[1],
+                    "duration_sec": values[2],
+                    "status": "published",
+                    "uploaded_at": now,
+                    "created_at": now,
+                    "updated_at": now,
+                }
             )
-            db.add(stream_row)
-        else:
-            stream_row.protocol = stream.get("protocol", "hls")
-            stream_row.playlist_path = playlist_path
-            stream_row.fallback_path = stream.get("fallback_url")
-            stream_row.updated_at = now
+            changed = True
 
+        artwork_path = (raw.get("artwork") or {}).get("square_512")
+        if artwork_path and stored_artwork.get(track_id) != artwork_path:
+            artwork_rows.append(
+                {"track_id": track_id, "square_512_path": artwork_path, "created_at": now, "updated_at": now}
+            )
+            changed = True
+
+        stream = raw.get("stream") or {}
+        if stream.get("url"):
+            stream_values = (stream.get("protocol", "hls"), stream["url"], stream.get("fallback_url"))
+            if stored_streams.get(track_id) != stream_values:
+                stream_rows.append(
+                    {
+                        "track_id": track_id,
+                        "protocol": stream_values[0],
+                        "playlist_path": stream_values[1],
+                        "fallback_path": stream_values[2],
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                )
+                changed = True
+        if changed:
+            changed_ids.append(track_id)
+
+    # Tracks first: artwork and stream rows reference them.
+    _upsert_rows(db, Track, track_rows, "id", ("title", "artist", "duration_sec", "updated_at"))
+    _upsert_rows(db, TrackArtwork, artwork_rows, "track_id", ("square_512_path", "updated_at"))
+    _upsert_rows(db, TrackStream, stream_rows, "track_id", ("protocol", "playlist_path", "fallback_path", "updated_at"))
+    return changed_ids
 
-def seed_catalog_from_file(db: Session, path: Path = CATALOG_PATH) -> int:
-    catalog = load_catalog(path)
-    tracks = list(catalog.get("tracks", []))
-    for raw in tracks:
-        _upsert_track(db, raw)
-    db.commit()
-    return len(tracks)
+
+def seed_catalog_from_file(
+    db: Session,
+    path: Path = CATALOG_PATH,
+    *,
+    chunk_size: int = SEED_CHUNK_SIZE,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    """Upsert every manifest track, streaming the file and committing every `chunk_size` tracks.
+
+    Memory stays flat whatever the manifest size. A failure part-way keeps the
+    chunks already committed; the upsert is idempotent, so rerunning resumes.
+    `progress` is called with the running track count after each commit.
+    """
+    count = 0
+    tracks = iter_catalog_tracks(path)
+    while chunk := list(islice(tracks, chunk_size)):
+        # Reseeding an unchanged manifest writes nothing and adds nothing to the change feed.
+        changed_ids = _seed_chunk(db, chunk)
+        _log_catalog_changes(db, changed_ids)
+        # The identity map holds clean rows weakly, so committed chunks can be freed.
+        db.commit()
+        _STREAM_CACHE.invalidate(changed_ids)
+        count += len(chunk)
+        if progress is not None:
+            progress(count)
+    _bump_catalog_version(db)
+    return count
 
 
 def ensure_catalog_seeded(db: Session, path: Path = CATALOG_PATH) -> int:
-    count_stmt = select(func.count()).select_from(Track)
-    total = db.scalar(count_stmt) or 0
-    if total > 0:
-        return total
+    """Seed from the manifest when `tracks` is empty; returns the number of tracks seeded."""
+    if db.scalar(select(Track.id).limit(1)) is not None:
+        return 0
     return seed_catalog_from_file(db, path)
 
 
-def get_catalog_page(db: Session, limit: int, offset: int, q: str | None) -> dict[str, Any]:
-    ensure_catalog_seeded(db)
+def get_catalog_page(
+    db: Session,
+    limit: int,
+    offset: int,
+    q: str | None,
+    cursor: str | None = None,
+    include_total: bool = True,
+    *,
+    mode: str = "standard",
+    sort: str | None = None,
+    snapshot: CatalogSnapshot | None = None,
+) -> dict[str, Any]:
+    """Return one catalog page; `mode="fuzzy"` matches `q` by trigram similarity instead of words.
 
-    stmt = (
-        select(Track, TrackArtwork.square_512_path)
-        .outerjoin(TrackArtwork, TrackArtwork.track_id == Track.id)
-        .where(Track.status == "published")
-    )
-    if q:
-        needle = f"%{q.strip().lower()}%"
-        stmt = stmt.where(or_(func.lower(Track.title).like(needle), func.lower(Track.artist).like(needle)))
+    `include_total=False` returns `page.total = None` and skips the match count
+    query for ranked searches; clients page on `has_more` instead.
+    `sort` (see TRACK_SORTS, `-` prefix for descending) pages published tracks in
+    that order with key cursors; it cannot be combined with `q`.
+    """
+    snapshot = snapshot or get_catalog_snapshot(db)
+    cursor_kind, cursor_value = _decode_cursor(cursor) if cursor is not None else (None, "")
 
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    total = int(db.scalar(count_stmt) or 0)
-
-    rows = db.execute(stmt.order_by(Track.id).offset(offset).limit(limit)).all()
-    tracks = [
-        {
-            "id": row[0].id,
-            "title": row[0].title,
-            "artist": row[0].artist,
-            "duration_sec": row[0].duration_sec,
-            "artwork": {"square_512": row[1]} if row[1] else {},
-        }
-        for row in rows
-    ]
+    # Keyset pagination: seek past the last ID of the previous page instead of
+    # skipping `offset` rows. `offset` is kept for older clients. Ranked search
+    # results have no stable key, so their cursor carries a position instead.
+    start = offset
+    if cursor_kind == "pos":
+        start = int(cursor_value)
+
+    total_is_estimate = False
+    ranked_ids = None
+    positional = True
+    if q and mode != "fuzzy":
+        # Page inside the ranked SQL query; only limit+1 IDs ever reach Python.
+        ranked_ids = search_track_ids(db, q, published_only=True, limit=limit + 1, offset=start)
+
+    matches: Sequence[dict[str, Any]]
+    next_cursor = None
+    if sort is not None:
+        if q:
+            raise ValueError("sort cannot be combined with q")
+        page_ids, has_more, next_cursor = _sorted_track_page(db, sort, limit, offset, cursor_kind, cursor_value)
+        page = [snapshot.by_id[track_id] for track_id in page_ids if track_id in snapshot.by_id]
+        total = len(snapshot.tracks)
+    elif q and mode == "fuzzy":
+        if cursor_kind == "id":
+            raise ValueError("fuzzy search pages use position cursors")
+        # The index may still describe an older snapshot; keep only current tracks.
+        found = get_fuzzy_index(snapshot).search(q)
+        matches = [snapshot.by_id[track["id"]] for track in found if track["id"] in snapshot.by_id]
+        page = matches[start : start + limit]
+        has_more = start + limit < len(matches)
+        total = len(matches)
+    elif ranked_ids is not None:
+        if cursor_kind == "id":
+            raise ValueError("ranked search pages use position cursors")
+        matches = [snapshot.by_id[track_id] for track_id in ranked_ids if track_id in snapshot.by_id]
+        page = matches[:limit]
+        has_more = len(ranked_ids) > limit
+        total = None
+        if include_total:
+            # Counting stops at the cap, so a broad one-letter query stays cheap.
+            total = count_track_matches(db, q, published_only=True, cap=SEARCH_TOTAL_ESTIMATE_CAP) or 0
+            total_is_estimate = total >= SEARCH_TOTAL_ESTIMATE_CAP
+    else:
+        positional = False
+        matches = snapshot.tracks
+        if q:
+            needle = q.strip().lower()
+            matches = [track for track in snapshot.tracks if _matches_query(track, needle)]
+        if cursor_kind == "id":
+            start = bisect_right(matches, cursor_value, key=lambda track: track["id"])
+        page = list(matches[start : start + limit])
+        has_more = start + limit < len(matches)
+        total = len(matches)
+
+    if sort is None and page and has_more:
+        if positional:
+            next_cursor = _encode_cursor("pos", str(start + len(page)))
+        else:
+            next_cursor = _encode_cursor("id", page[-1]["id"])
 
     return {
         "schema_version": "1.0",
         "app": {"title": "Ferric POC"},
-        "tracks": tracks,
-        "page": {"limit": limit, "offset": offset, "total": total},
+        "tracks": page,
+        "page": {
+            "limit": limit,
+            "offset": offset,
+            "total": total if include_total else None,
+            "total_is_estimate": total_is_estimate,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+        },
     }
 
 
+def get_catalog_page_etag(
+    db: Session,
+    limit: int,
+    offset: int,
+    q: str | None,
+    cursor: str | None = None,
+    include_total: bool = True,
+    *,
+    mode: str = "standard",
+    sort: str | None = None,
+    fields: tuple[str, ...] | None = None,
+    snapshot: CatalogSnapshot | None = None,
+) -> str:
+    return get_catalog_etag(
+        db, limit, offset, q, cursor, include_total, mode, sort, fields, snapshot=snapshot
+    )
+
+
+def get_catalog_etag(db: Session, *parts: Any, snapshot: CatalogSnapshot | None = None) -> str:
+    """Strong ETag for any response derived only from the catalog snapshot and `parts`.
+
+    Request handlers pass the snapshot they render from, so the ETag always
+    describes the body it is sent with.
+    """
+    snapshot = snapshot or get_catalog_snapshot(db)
+    return f'"{_content_hash(snapshot.etag, *parts)}"'
+
+
+def _cursor_page(
+    items: Sequence[Any],
+    limit: int,
+    cursor: str | None,
+    key: Callable[[Any], str] = lambda item: item["id"],
+) -> tuple[list[Any], dict[str, Any]]:
+    start = 0
+    if cursor is not None:
+        kind, value = _decode_cursor(cursor)
+        if kind != "id":
+            raise ValueError("invalid cursor")
+        start = bisect_right(items, value, key=key)
+    page = list(items[start : start + limit])
+    has_more = start + limit < len(items)
+    next_cursor = _encode_cursor("id", key(page[-1])) if page and has_more else None
+    return page, {"limit": limit, "total": len(items), "has_more": has_more, "next_cursor": next_cursor}
+
+
+def list_artists(
+    db: Session, limit: int, cursor: str | None = None, *, snapshot: CatalogSnapshot | None = None
+) -> dict[str, Any]:
+    snapshot = snapshot or get_catalog_snapshot(db)
+    artists, page = _cursor_page(snapshot.artists, limit, cursor)
+    return {"artists": artists, "page": page}
+
+
+def get_artist_tracks(
+    db: Session,
+    artist_id: str,
+    limit: int,
+    cursor: str | None = None,
+    *,
+    snapshot: CatalogSnapshot | None = None,
+) -> dict[str, Any] | None:
+    snapshot = snapshot or get_catalog_snapshot(db)
+    track_ids = snapshot.artist_track_ids.get(artist_id)
+    if track_ids is None:
+        return None
+    artist = snapshot.artists[bisect_right(snapshot.artists, artist_id, key=lambda item: item["id"]) - 1]
+    page_ids, page = _cursor_page(track_ids, limit, cursor, key=lambda track_id: track_id)
+    return {"artist": artist, "tracks": [snapshot.by_id[track_id] for track_id in page_ids], "page": page}
+
+
+def get_catalog_changes(db: Session, since: int, limit: int) -> dict[str, Any]:
+    """Return tracks changed after change token `since`, split into current upserts and removals.
+
+    Pages walk change-log rows by ID, but never past `snapshot.change_id`: a change the
+    snapshot does not reflect yet is left for a later call instead of being reported
+    with stale state. A track is reported once per page, so replaying a page is idempotent.
+    """
+    snapshot = get_catalog_snapshot(db)
+    if since > snapshot.change_id and since > (db.scalar(select(func.max(CatalogChange.id))) or 0):
+        # A token the log never issued: the database was reset or restored.
+        raise ChangeTokenExpiredError(since)
+    rows = db.execute(
+        select(CatalogChange.id, CatalogChange.track_id)
+        .where(CatalogChange.id > since, CatalogChange.id <= snapshot.change_id)
+        .order_by(CatalogChange.id)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    upserted: list[dict[str, Any]] = []
+    removed: list[str] = []
+    for track_id in dict.fromkeys(track_id for _change_id, track_id in rows):
+        track = snapshot.by_id.get(track_id)
+        if track is None:
+            removed.append(track_id)
+        else:
+            upserted.append(track)
+    next_token = rows[-1][0] if rows else since
+    return {"upserted": upserted, "removed": removed, "next_token": str(next_token), "has_more": has_more}
+
+
+def get_track_etag(db: Session, track_id: str, *, snapshot: CatalogSnapshot | None = None) -> str | None:
+    return (snapshot or get_catalog_snapshot(db)).track_etags.get(track_id)
+
+
 def get_track_by_id(db: Session, track_id: str) -> dict[str, Any] | None:
-    ensure_catalog_seeded(db)
-    row = db.execute(
-        select(Track, TrackArtwork.square_512_path)
-        .outerjoin(TrackArtwork, TrackArtwork.track_id == Track.id)
-        .where(Track.id == track_id, Track.status == "published")
-    ).first()
-    if row is None:
+    return get_catalog_snapshot(db).by_id.get(track_id)
+
+
+def get_tracks_by_ids(
+    db: Session, track_ids: list[str], *, snapshot: CatalogSnapshot | None = None
+) -> tuple[list[dict[str, Any]], list[str]]:
+    by_id = (snapshot or get_catalog_snapshot(db)).by_id
+    tracks: list[dict[str, Any]] = []
+    missing: list[str] = []
+    for track_id in dict.fromkeys(track_ids):
+        track = by_id.get(track_id)
+        if track is None:
+            missing.append(track_id)
+        else:
+            tracks.append(track)
+    return tracks, missing
+
+
+def _track_json(
+    snapshot: CatalogSnapshot, track: dict[str, Any], fields: tuple[str, ...] | None = None
+) -> bytes:
+    if fields is not None and fields != PUBLIC_TRACK_FIELDS:
+        projected = snapshot.projected_json.setdefault(fields, {})
+        encoded = projected.get(track["id"])
+        if encoded is None:
+            full = json.loads(_track_json(snapshot, track))
+            encoded = _json_bytes({name: full[name] for name in fields})
+            projected[track["id"]] = encoded
+        return encoded
+    encoded = snapshot.track_json.get(track["id"])
+    if encoded is None:
+        encoded = TrackMetadata.model_validate(track).model_dump_json().encode("utf-8")
+        snapshot.track_json[track["id"]] = encoded
+    return encoded
+
+
+def _json_bytes(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def render_catalog_page_json(
+    db: Session,
+    limit: int,
+    offset: int,
+    q: str | None,
+    cursor: str | None = None,
+    include_total: bool = True,
+    *,
+    mode: str = "standard",
+    sort: str | None = None,
+    fields: tuple[str, ...] | None = None,
+    snapshot: CatalogSnapshot | None = None,
+) -> bytes:
+    """Encode a CatalogResponse body from cached per-track JSON fragments.
+
+    With `fields`, each track carries only those keys and the body drops the
+    `schema_version` and `app` envelope, leaving `tracks` and `page`.
+    """
+    snapshot = snapshot or get_catalog_snapshot(db)
+    page = get_catalog_page(
+        db,
+        limit=limit,
+        offset=offset,
+        q=q,
+        cursor=cursor,
+        include_total=include_total,
+        mode=mode,
+        sort=sort,
+        snapshot=snapshot,
+    )
+    parts = [b"{"]
+    if fields is None:
+        parts += [b'"schema_version":', _json_bytes(page["schema_version"]), b',"app":', _json_bytes(page["app"]), b","]
+    parts += [
+        b'"tracks":[',
+        b",".join(_track_json(snapshot, track, fields) for track in page["tracks"]),
+        b'],"page":',
+        CatalogPage.model_validate(page["page"]).model_dump_json().encode("utf-8"),
+        b"}",
+    ]
+    return b"".join(parts)
+
+
+def render_track_json(db: Session, track_id: str, *, snapshot: CatalogSnapshot | None = None) -> bytes | None:
+    snapshot = snapshot or get_catalog_snapshot(db)
+    track = snapshot.by_id.get(track_id)
+    if track is None:
         return None
+    return _track_json(snapshot, track)
 
-    track, artwork_path = row
-    return {
-        "id": track.id,
-        "title": track.title,
-        "artist": track.artist,
-        "duration_sec": track.duration_sec,
-        "artwork": {"square_512": artwork_path} if artwork_path else {},
-    }
+
+def render_tracks_json(
+    db: Session,
+    track_ids: list[str],
+    *,
+    fields: tuple[str, ...] | None = None,
+    snapshot: CatalogSnapshot | None = None,
+) -> bytes:
+    snapshot = snapshot or get_catalog_snapshot(db)
+    tracks, missing = get_tracks_by_ids(db, track_ids, snapshot=snapshot)
+    return b"".join(
+        (
+            b'{"tracks":[',
+            b",".join(_track_json(snapshot, track, fields) for track in tracks),
+            b'],"missing_ids":',
+            _json_bytes(missing),
+            b"}",
+        )
+    )
 
 
 def get_track_stream_by_id(db: Session, track_id: str) -> dict[str, Any] | None:
+    """Stream row for a published track, or None; served from the stream cache when possible."""
+    bind = db.get_bind()
+    # Taken before the lookup: loads started before a write are neither cached nor joined.
+    generation = _STREAM_CACHE.generation
+    found, stream = _STREAM_CACHE.get(bind, track_id)
+    if found:
+        return stream
+    stream = _READS.do(("track_stream", bind, track_id, generation), lambda: _load_track_stream(db, track_id))
+    _STREAM_CACHE.put(bind, track_id, stream, generation)
+    return stream
+
+
+def get_track_streams_by_ids(db: Session, track_ids: list[str]) -> dict[str, dict[str, Any] | None]:
+    """Stream rows for several tracks, keyed in request order; None for unknown or unpublished IDs.
+
+    Cached entries are served as-is and the rest are loaded with one query.
+    """
+    bind = db.get_bind()
+    generation = _STREAM_CACHE.generation
+    streams: dict[str, dict[str, Any] | None] = {}
+    pending: list[str] = []
+    for track_id in dict.fromkeys(track_ids):
+        found, stream = _STREAM_CACHE.get(bind, track_id)
+        streams[track_id] = stream
+        if not found:
+            pending.append(track_id)
+    if pending:
+        loaded = _load_track_streams(db, pending)
+        for track_id in pending:
+            streams[track_id] = loaded.get(track_id)
+            _STREAM_CACHE.put(bind, track_id, streams[track_id], generation)
+    return streams
+
+
+def _load_track_streams(db: Session, track_ids: list[str]) -> dict[str, dict[str, Any]]:
+    ensure_catalog_seeded(db)
+    rows = db.execute(
+        select(TrackStream.track_id, TrackStream.protocol, TrackStream.playlist_path, TrackStream.fallback_path)
+        .join(Track, Track.id == TrackStream.track_id)
+        .where(TrackStream.track_id.in_(track_ids), Track.status == "published")
+    ).all()
+    return {row[0]: {"protocol": row[1], "url": row[2], "fallback_url": row[3]} for row in rows}
+
+
+def _load_track_stream(db: Session, track_id: str) -> dict[str, Any] | None:
     ensure_catalog_seeded(db)
     row = db.execute(
         select(TrackStream.protocol, TrackStream.playlist_path, TrackStream.fallback_path)
@@ -158,47 +887,80 @@ def get_track_stream_by_id(db: Session, track_id: str) -> dict[str, Any] | None:
     return {"protocol": row[0], "url": row[1], "fallback_url": row[2]}
 
 
-def list_admin_tracks(db: Session, q: str | None, status: str | None) -> list[dict[str, Any]]:
+# Columns behind each admin field, labelled so rows can be read by name.
+_ADMIN_TRACK_COLUMNS: dict[str, tuple[Any, ...]] = {
+    "id": (Track.id.label("id"),),
+    "title": (Track.title.label("title"),),
+    "artist": (Track.artist.label("artist"),),
+    "duration_sec": (Track.duration_sec.label("duration_sec"),),
+    "status": (Track.status.label("status"),),
+    "uploaded_at": (Track.uploaded_at.label("uploaded_at"),),
+    "updated_at": (Track.updated_at.label("updated_at"),),
+    "artwork": (TrackArtwork.square_512_path.label("artwork_path"),),
+    "stream": (
+        TrackStream.protocol.label("stream_protocol"),
+        TrackStream.playlist_path.label("stream_playlist_path"),
+        TrackStream.fallback_path.label("stream_fallback_path"),
+    ),
+}
+
+
+def _admin_track_item(row: Any, fields: tuple[str, ...]) -> dict[str, Any]:
+    item: dict[str, Any] = {}
+    for name in fields:
+        if name == "artwork":
+            item["artwork"] = {"square_512": row.artwork_path} if row.artwork_path else {}
+        elif name == "stream":
+            item["stream"] = None
+            if row.stream_playlist_path:
+                item["stream"] = {
+                    "protocol": row.stream_protocol or "hls",
+                    "url": row.stream_playlist_path,
+                    "fallback_url": row.stream_fallback_path,
+                }
+        elif name == "uploaded_at":
+            item["uploaded_at"] = _to_iso(row.uploaded_at) if row.uploaded_at else None
+        elif name == "updated_at":
+            item["updated_at"] = _to_iso(row.updated_at)
+        else:
+            item[name] = getattr(row, name)
+    return item
+
+
+def list_admin_tracks(
+    db: Session,
+    q: str | None,
+    status: str | None,
+    sort: str | None = None,
+    fields: tuple[str, ...] = ADMIN_TRACK_FIELDS,
+) -> list[dict[str, Any]]:
+    """List tracks for the admin UI: search rank order for `q`, else `sort`, else ID order.
+
+    Only the columns behind `fields` are selected, and the artwork and stream
+    joins are skipped when those fields are not requested.
+    """
+    order = _sort_order(sort) if sort else [Track.id]
     ensure_catalog_seeded(db)
-    stmt = (
-        select(
-            Track,
-            TrackArtwork.square_512_path,
-            TrackStream.protocol,
-            TrackStream.playlist_path,
-            TrackStream.fallback_path,
-        )
-        .outerjoin(TrackArtwork, TrackArtwork.track_id == Track.id)
-        .outerjoin(TrackStream, TrackStream.track_id == Track.id)
-    )
+    stmt = select(*(column for name in fields for column in _ADMIN_TRACK_COLUMNS[name])).select_from(Track)
+    if "artwork" in fields:
+        stmt = stmt.outerjoin(TrackArtwork, TrackArtwork.track_id == Track.id)
+    if "stream" in fields:
+        stmt = stmt.outerjoin(TrackStream, TrackStream.track_id == Track.id)
     if status:
         stmt = stmt.where(Track.status == status)
-    if q:
+    ranked = ranked_match_subquery(db, q) if q else None
+    if ranked is not None:
+        # Join the full-text matches so ranking and filtering both stay in SQL.
+        stmt = stmt.join(ranked, ranked.c.id == Track.id)
+        stmt = stmt.order_by(*order) if sort else stmt.order_by(ranked.c.score, Track.id)
+    elif q:
         needle = f"%{q.strip().lower()}%"
         stmt = stmt.where(or_(func.lower(Track.title).like(needle), func.lower(Track.artist).like(needle)))
+        stmt = stmt.order_by(*order)
+    else:
+        stmt = stmt.order_by(*order)
 
-    rows = db.execute(stmt.order_by(Track.id)).all()
-    result: list[dict[str, Any]] = []
-    for track, artwork_path, protocol, playlist_path, fallback_path in rows:
-        item: dict[str, Any] = {
-            "id": track.id,
-            "title": track.title,
-            "artist": track.artist,
-            "duration_sec": track.duration_sec,
-            "status": track.status,
-            "uploaded_at": _to_iso(track.uploaded_at) if track.uploaded_at else None,
-            "updated_at": _to_iso(track.updated_at),
-            "artwork": {"square_512": artwork_path} if artwork_path else {},
-            "stream": None,
-        }
-        if playlist_path:
-            item["stream"] = {
-                "protocol": protocol or "hls",
-                "url": playlist_path,
-                "fallback_url": fallback_path,
-            }
-        result.append(item)
-    return result
+    return [_admin_track_item(row, fields) for row in db.execute(stmt)]
 
 
 def create_admin_track(db: Session, payload: AdminTrackCreateRequest) -> dict[str, Any]:
@@ -221,7 +983,9 @@ def create_admin_track(db: Session, payload: AdminTrackCreateRequest) -> dict[st
         updated_at=now,
     )
     db.add(track)
+    _log_catalog_changes(db, [track.id])
     db.commit()
+    _bump_catalog_version(db, [track.id])
     return {
         "id": track.id,
         "title": track.title,
@@ -253,7 +1017,9 @@ def update_admin_track(db: Session, track_id: str, payload: AdminTrackUpdateRequ
             track.uploaded_at = datetime.now(UTC)
     track.updated_at = datetime.now(UTC)
     db.add(track)
+    _log_catalog_changes(db, [track_id])
     db.commit()
+    _bump_catalog_version(db, [track_id])
     return get_admin_track(db, track_id)
 
 
@@ -309,7 +1075,9 @@ def set_track_artwork_path(db: Session, track_id: str, artwork_path: str) -> dic
     db.add(artwork)
     track.updated_at = now
     db.add(track)
+    _log_catalog_changes(db, [track_id])
     db.commit()
+    _bump_catalog_version(db, [track_id])
     return get_admin_track(db, track_id)
 
 
@@ -339,7 +1107,9 @@ def set_track_audio_fallback(db: Session, track_id: str, fallback_path: str) ->
     db.add(stream)
     track.updated_at = now
     db.add(track)
+    _log_catalog_changes(db, [track_id])
     db.commit()
+    _bump_catalog_version(db, [track_id])
     return get_admin_track(db, track_id)
 
 
@@ -353,5 +1123,7 @@ def publish_track(db: Session, track_id: str) -> dict[str, Any] | None:
         track.uploaded_at = now
     track.updated_at = now
     db.add(track)
+    _log_catalog_changes(db, [track_id])
     db.commit()
+    _bump_catalog_version(db, [track_id])
     return {"id": track.id, "status": "published"}
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import re
+from threading import Lock
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import Float, String, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Subquery
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_INDEX_LOCK = Lock()
+_INDEX_AVAILABLE: WeakKeyDictionary[Engine, bool] = WeakKeyDictionary()
+
+_SQLITE_MATCH_SQL = (
+    "FROM tracks_fts JOIN tracks ON tracks.rowid = tracks_fts.rowid "
+    "WHERE tracks_fts MATCH :query{status_filter}"
+)
+_SQLITE_SCORE_SQL = "bm25(tracks_fts)"
+_SQLITE_ORDER_SQL = f" ORDER BY {_SQLITE_SCORE_SQL}, tracks.id"
+_POSTGRES_MATCH_SQL = (
+    "FROM tracks, to_tsquery('simple', :query) AS query "
+    "WHERE tracks.search_vector @@ query{status_filter}"
+)
+_POSTGRES_SCORE_SQL = "-ts_rank(tracks.search_vector, query)"
+_POSTGRES_ORDER_SQL = f" ORDER BY {_POSTGRES_SCORE_SQL}, tracks.id"
+
+
+def _query_tokens(q: str) -> list[str]:
+    return [token.lower() for token in _TOKEN_RE.findall(q)]
+
+
+def _has_search_index(bind: Engine) -> bool:
+    with _INDEX_LOCK:
+        cached = _INDEX_AVAILABLE.get(bind)
+    if cached is not None:
+        return cached
+
+    inspector = inspect(bind)
+    if bind.dialect.name == "sqlite":
+        available = inspector.has_table("tracks_fts")
+    elif bind.dialect.name == "postgresql":
+        available = any(col["name"] == "search_vector" for col in inspector.get_columns("tracks"))
+    else:
+        available = False
+    with _INDEX_LOCK:
+        _INDEX_AVAILABLE[bind] = available
+    return available
+
+
+def _match_clause(bind: Engine, q: str, published_only: bool) -> tuple[str, str, str, str] | None:
+    """Return (FROM/WHERE sql, ORDER BY sql, score expression, bound query) for `q`."""
+    tokens = _query_tokens(q)
+    if not tokens:
+        return None
+    status_filter = " AND tracks.status = 'published'" if published_only else ""
+    if bind.dialect.name == "sqlite":
+        query = " ".join(f'"{token}"*' for token in tokens)
+        return _SQLITE_MATCH_SQL.format(status_filter=status_filter), _SQLITE_ORDER_SQL, _SQLITE_SCORE_SQL, query
+    query = " & ".join(f"{token}:*" for token in tokens)
+    return _POSTGRES_MATCH_SQL.format(status_filter=status_filter), _POSTGRES_ORDER_SQL, _POSTGRES_SCORE_SQL, query
+
+
+def search_track_ids(
+    db: Session,
+    q: str,
+    *,
+    published_only: bool = False,
+    limit: int | None = None,
+    offset: int = 0,
+) -> list[str] | None:
+    """Return track IDs matching every token of `q` as a prefix, best match first.
+
+    `limit` and `offset` page inside the ranked query (`offset` needs `limit`). Returns None when the
+    database has no full-text index, so callers can fall back to substring matching.
+    """
+    bind = db.get_bind()
+    if not _has_search_index(bind):
+        return None
+
+    clause = _match_clause(bind, q, published_only)
+    if clause is None:
+        return []
+    match_sql, order_sql, _score_sql, query = clause
+    sql = f"SELECT tracks.id {match_sql}{order_sql}"
+    params: dict[str, object] = {"query": query}
+    if limit is not None:
+        sql += " LIMIT :limit OFFSET :offset"
+        params.update(limit=limit, offset=offset)
+    return list(db.scalars(text(sql), params))
+
+
+def ranked_match_subquery(db: Session, q: str, *, published_only: bool = False) -> Subquery | None:
+    """Return a subquery of matching `(id, score)` rows (lower score ranks first) to join against.
+
+    Returns None when the database has no full-text index.
+    """
+    bind = db.get_bind()
+    if not _has_search_index(bind):
+        return None
+
+    clause = _match_clause(bind, q, published_only)
+    if clause is None:
+        sql = text("SELECT NULL AS id, 0 AS score WHERE 1 = 0")
+    else:
+        match_sql, _order_sql, score_sql, query = clause
+        sql = text(f"SELECT tracks.id AS id, {score_sql} AS score {match_sql}").bindparams(query=query)
+    return sql.columns(id=String, score=Float).subquery("ranked_matches")
+
+
+def count_track_matches(db: Session, q: str, *, published_only: bool = False, cap: int) -> int | None:
+    """Count matches for `q`, stopping at `cap`. A result equal to `cap` is a lower bound."""
+    bind = db.get_bind()
+    if not _has_search_index(bind):
+        return None
+
+    clause = _match_clause(bind, q, published_only)
+    if clause is None:
+        return 0
+    match_sql, _order_sql, _score_sql, query = clause
+    sql = f"SELECT count(*) FROM (SELECT 1 {match_sql} LIMIT :cap) AS capped"
+    return int(db.scalar(text(sql), {"query": query, "cap": cap}) or 0)
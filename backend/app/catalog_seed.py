@@ -1,14 +1,104 @@
 from __future__ import annotations
 
 import json
+from collections.abc import Iterator
 from pathlib import Path
-from typing import Any
+from typing import IO, Any
 
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
 CATALOG_PATH = REPO_ROOT / "public" / "catalog.json"
+NDJSON_SUFFIXES = {".ndjson", ".jsonl"}
+READ_CHUNK_CHARS = 1 << 16
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
 
 
 def load_catalog(path: Path = CATALOG_PATH) -> dict[str, Any]:
     with path.open("r", encoding="utf-8") as f:
         return json.load(f)
+
+
+class _StreamReader:
+    """Just enough of a JSON tokenizer to walk one document while holding a small window of it."""
+
+    def __init__(self, handle: IO[str]) -> None:
+        self.handle = handle
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        chunk = self.handle.read(READ_CHUNK_CHARS)
+        self.text = self.text[self.pos :] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return bool(chunk)
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text) or not self._fill():
+                return self.text[self.pos : self.pos + 1]
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"catalog manifest: expected {char!r} near character {self.pos}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A value that ends the buffer may continue in the next chunk (e.g. a number).
+            if end == len(self.text) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_json_tracks(handle: IO[str]) -> Iterator[dict[str, Any]]:
+    reader = _StreamReader(handle)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == "tracks":
+            reader.expect("[")
+            if reader.peek() != "]":
+                while True:
+                    yield reader.value()
+                    if reader.peek() != ",":
+                        break
+                    reader.pos += 1
+            reader.expect("]")
+        else:
+            reader.value()
+        if reader.peek() != ",":
+            break
+        reader.pos += 1
+    reader.expect("}")
+
+
+def iter_catalog_tracks(path: Path = CATALOG_PATH) -> Iterator[dict[str, Any]]:
+    """Yield manifest tracks one at a time without loading the whole document.
+
+    `.ndjson` / `.jsonl` files hold one track object per line. Anything else is
+    a JSON manifest whose top-level `tracks` array is decoded element by element.
+    """
+    with path.open("r", encoding="utf-8") as handle:
+        if path.suffix in NDJSON_SUFFIXES:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_tracks(handle)
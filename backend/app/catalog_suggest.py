@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import re
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from threading import RLock
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from backend.app.catalog_repository import (
+    artist_id_for,
+    get_catalog_changes,
+    get_catalog_snapshot,
+    get_catalog_version,
+)
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_CHANGE_BATCH = 1000
+
+# (key, kind, text, id): kind is "artist" or "track"; id is the artist slug or track ID.
+SuggestEntry = tuple[str, str, str, str]
+
+
+def normalize(text: str) -> str:
+    return " ".join(token.casefold() for token in _TOKEN_RE.findall(text))
+
+
+def _keys(text: str) -> list[str]:
+    """Every word-suffix of the normalized text, so "the fa" and "fa" both reach "The Facets"."""
+    tokens = normalize(text).split(" ")
+    return [" ".join(tokens[start:]) for start in range(len(tokens)) if tokens[start]]
+
+
+@dataclass
+class SuggestIndex:
+    """Sorted completion keys over published titles and artists, patched from the change feed."""
+
+    bind: Any
+    version: int
+    change_token: int
+    entries: list[SuggestEntry] = field(default_factory=list)
+    track_entries: dict[str, list[SuggestEntry]] = field(default_factory=dict)
+    track_artists: dict[str, str] = field(default_factory=dict)
+    artist_refs: dict[str, int] = field(default_factory=dict)
+
+    def _insert(self, entry: SuggestEntry) -> None:
+        insort(self.entries, entry)
+
+    def _remove(self, entry: SuggestEntry) -> None:
+        index = bisect_left(self.entries, entry)
+        if index < len(self.entries) and self.entries[index] == entry:
+            del self.entries[index]
+
+    def _artist_entries(self, artist: str) -> list[SuggestEntry]:
+        artist_id = artist_id_for(artist)
+        return [(key, "artist", artist, artist_id) for key in _keys(artist)]
+
+    def remove_track(self, track_id: str) -> None:
+        for entry in self.track_entries.pop(track_id, []):
+            self._remove(entry)
+        artist = self.track_artists.pop(track_id, None)
+        if artist is None:
+            return
+        self.artist_refs[artist] -= 1
+        if not self.artist_refs[artist]:
+            del self.artist_refs[artist]
+            for entry in self._artist_entries(artist):
+                self._remove(entry)
+
+    def add_track(self, track: dict[str, Any], *, bulk: bool = False) -> None:
+        """Index one track; with `bulk`, entries are appended and the caller sorts once at the end."""
+        add = self.entries.append if bulk else self._insert
+        self.remove_track(track["id"])
+        entries = [(key, "track", track["title"], track["id"]) for key in _keys(track["title"])]
+        for entry in entries:
+            add(entry)
+        self.track_entries[track["id"]] = entries
+
+        artist = track["artist"]
+        self.track_artists[track["id"]] = artist
+        self.artist_refs[artist] = self.artist_refs.get(artist, 0) + 1
+        if self.artist_refs[artist] == 1:
+            for entry in self._artist_entries(artist):
+                add(entry)
+
+    def complete(self, prefix: str, limit: int) -> list[dict[str, Any]]:
+        needle = normalize(prefix)
+        if not needle:
+            return []
+        suggestions: list[dict[str, Any]] = []
+        seen: set[tuple[str, str]] = set()
+        position = bisect_left(self.entries, (needle,))
+        while position < len(self.entries):
+            key, kind, text, item_id = self.entries[position]
+            position += 1
+            if not key.startswith(needle):
+                break
+            if (kind, text) in seen:
+                continue
+            seen.add((kind, text))
+            if kind == "artist":
+                suggestions.append({"text": text, "kind": kind, "artist_id": item_id, "track_id": None})
+            else:
+                suggestions.append({"text": text, "kind": kind, "artist_id": None, "track_id": item_id})
+            if len(suggestions) == limit:
+                break
+        return suggestions
+
+
+# Re-entrant: building the index can seed the catalog, which fires the change listener.
+_SUGGEST_LOCK = RLock()
+_SUGGEST_INDEX: SuggestIndex | None = None
+
+
+def _build_index(db: Session) -> SuggestIndex:
+    snapshot = get_catalog_snapshot(db)
+    index = SuggestIndex(bind=db.get_bind(), version=snapshot.version, change_token=snapshot.change_id)
+    for track in snapshot.tracks:
+        index.add_track(track, bulk=True)
+    index.entries.sort()
+    return index
+
+
+def _catch_up(db: Session, index: SuggestIndex) -> None:
+    version = get_catalog_snapshot(db).version
+    while True:
+        delta = get_catalog_changes(db, since=index.change_token, limit=_CHANGE_BATCH)
+        for track_id in delta["removed"]:
+            index.remove_track(track_id)
+        for track in delta["upserted"]:
+            index.add_track(track)
+        index.change_token = int(delta["next_token"])
+        if not delta["has_more"]:
+            break
+    index.version = version
+
+
+def get_suggestions(db: Session, prefix: str, limit: int) -> list[dict[str, Any]]:
+    """Return up to `limit` title and artist completions for `prefix`, in key order.
+
+    The index is built once per database and then patched from the catalog change
+    feed after writes, so steady-state lookups never query the database.
+    """
+    global _SUGGEST_INDEX
+    with _SUGGEST_LOCK:
+        index = _SUGGEST_INDEX
+        if index is None or index.bind is not db.get_bind():
+            index = _SUGGEST_INDEX = _build_index(db)
+        elif index.version != get_catalog_version():
+            _catch_up(db, index)
+        return index.complete(prefix, limit)
+
+
+def refresh_suggest_index_on_change(db: Session) -> None:
+    """Catalog change listener: patch a built index right after the write commits."""
+    with _SUGGEST_LOCK:
+        index = _SUGGEST_INDEX
+        if index is not None and index.bind is db.get_bind() and index.version != get_catalog_version():
+            _catch_up(db, index)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import case, distinct, func, select
+from sqlalchemy import case, distinct, func, select, update
 from sqlalchemy.orm import Session
 
 from backend.app.models import ListeningEvent, Track
@@ -27,6 +27,8 @@ def record_listening_event(
         ip_address=ip_address,
     )
     db.add(event)
+    if action == "start":
+        db.execute(update(Track).where(Track.id == track_id).values(play_count=Track.play_count + 1))
     db.commit()
     return True
 
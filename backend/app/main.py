@@ -1,12 +1,16 @@
 import contextvars
+import hashlib
 import logging
 import os
 import time
-from datetime import UTC, datetime, timedelta
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
 from pathlib import Path
+from typing import Any, Literal
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, FastAPI, Query, Request
+from fastapi import APIRouter, Depends, FastAPI, Query, Request, Response
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
@@ -15,14 +19,36 @@ from sqlalchemy.orm import Session
 from backend.app.admin_api import admin_v1
 from backend.app.admin_auth import validate_admin_credentials_config
 from backend.app.admin_ui import admin_ui
+from backend.app.catalog_bus import is_bus_enabled, start_catalog_bus
+from backend.app.catalog_export import export_static_catalog_on_change
 from backend.app.catalog_repository import (
-    get_catalog_page,
-    get_track_by_id,
+    PUBLIC_TRACK_FIELDS,
+    ChangeTokenExpiredError,
+    add_catalog_change_listener,
+    get_artist_tracks,
+    get_catalog_changes,
+    get_catalog_etag,
+    get_catalog_page_etag,
+    get_catalog_snapshot,
+    get_track_etag,
     get_track_stream_by_id,
+    get_track_streams_by_ids,
+    invalidate_catalog,
+    list_artists,
+    parse_track_fields,
+    render_catalog_page_json,
+    render_track_json,
+    render_tracks_json,
 )
-from backend.app.db import get_db
+from backend.app.catalog_suggest import get_suggestions, refresh_suggest_index_on_change
+from backend.app.db import engine, get_db
 from backend.app.listening_repository import record_listening_event
+from backend.app.media_api import media
+from backend.app.media_signing import get_media_url_ttl_sec, get_signing_key, sign_media_path
 from backend.app.schemas import (
+    ArtistListResponse,
+    ArtistTracksResponse,
+    CatalogChangesResponse,
     CatalogResponse,
     CreateSessionRequest,
     CreateSessionResponse,
@@ -30,9 +56,13 @@ from backend.app.schemas import (
     HealthResponse,
     ListenEventRequest,
     ListenEventResponse,
+    ResolvePlaybackBatchRequest,
+    ResolvePlaybackBatchResponse,
     ResolvePlaybackRequest,
     ResolvePlaybackResponse,
+    SearchSuggestResponse,
     SessionStateResponse,
+    TrackBatchResponse,
     TrackMetadata,
     UpdateSessionRequest,
     UpdateSessionResponse,
@@ -51,6 +81,23 @@ if not logger.handlers:
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
 
+def _env_int(name: str, default: int, *, minimum: int = 1) -> int:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    try:
+        parsed = int(raw)
+    except ValueError:
+        return default
+    return max(minimum, parsed)
+
+
+CATALOG_CACHE_MAX_AGE_SEC = _env_int("FERRIC_CATALOG_CACHE_MAX_AGE_SEC", 30, minimum=0)
+CATALOG_CACHE_CONTROL = f"public, max-age={CATALOG_CACHE_MAX_AGE_SEC}, must-revalidate"
+SESSION_CACHE_CONTROL = "private, no-cache"
+MAX_BATCH_TRACK_IDS = 500
+
+
 def _ensure_file_logger() -> None:
     default_path = str(Path(__file__).resolve().parents[2] / "backend" / "logs" / "backend.log")
     log_path = Path(os.getenv("FERRIC_BACKEND_LOG_PATH", default_path))
@@ -93,6 +140,32 @@ def _not_found_session_error() -> JSONResponse:
     return _error_response(code="SESSION_NOT_FOUND", message="Session does not exist", status_code=404)
 
 
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip().removeprefix("W/") for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def _json_bytes_response(body: bytes, etag: str, cache_control: str) -> Response:
+    # Pre-encoded bodies skip response_model validation and re-serialization.
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
+
+
+def _set_cache_headers(response: Response, etag: str, cache_control: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
 def _request_ip(request: Request) -> str | None:
     forwarded = request.headers.get("x-forwarded-for")
     if forwarded:
@@ -114,12 +187,95 @@ def get_health() -> HealthResponse:
 
 @api_v1.get("/catalog", response_model=CatalogResponse)
 def get_catalog(
+    request: Request,
     limit: int = Query(default=50, ge=1, le=500),
     offset: int = Query(default=0, ge=0),
     q: str | None = Query(default=None),
+    cursor: str | None = Query(default=None),
+    include_total: bool = Query(default=True),
+    mode: Literal["standard", "fuzzy"] = Query(default="standard"),
+    sort: str | None = Query(default=None, pattern=r"^-?(uploaded_at|popularity|title|duration_sec)$"),
+    fields: str | None = Query(default=None),
     db: Session = Depends(get_db),
 ) -> CatalogResponse:
-    return get_catalog_page(db, limit=limit, offset=offset, q=q)
+    try:
+        selected_fields = parse_track_fields(fields, PUBLIC_TRACK_FIELDS) if fields is not None else None
+    except ValueError as exc:
+        return _error_response(code="BAD_REQUEST", message=str(exc), status_code=400)
+    # One snapshot per request keeps the ETag, page and cached fragments consistent.
+    snapshot = get_catalog_snapshot(db)
+    page_args = {
+        "limit": limit,
+        "offset": offset,
+        "q": q,
+        "cursor": cursor,
+        "include_total": include_total,
+        "mode": mode,
+        "sort": sort,
+        "fields": selected_fields,
+        "snapshot": snapshot,
+    }
+    # Fuzzy results may come from an index still catching up with the snapshot, and
+    # sorted pages read the live sort columns (play counts move without a catalog
+    # change), so both hash the body itself for their ETag.
+    body_etag = (bool(q) and mode == "fuzzy") or sort is not None
+    if not body_etag:
+        etag = get_catalog_page_etag(db, **page_args)
+        if _etag_matches(request, etag):
+            return _not_modified(etag, CATALOG_CACHE_CONTROL)
+    try:
+        body = render_catalog_page_json(db, **page_args)
+    except ValueError:
+        return _error_response(code="BAD_REQUEST", message="Invalid catalog cursor or sort", status_code=400)
+    if body_etag:
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        if _etag_matches(request, etag):
+            return _not_modified(etag, CATALOG_CACHE_CONTROL)
+    return _json_bytes_response(body, etag, CATALOG_CACHE_CONTROL)
+
+
+@api_v1.get(
+    "/catalog/changes",
+    response_model=CatalogChangesResponse,
+    responses={400: {"model": ErrorResponse}, 410: {"model": ErrorResponse}},
+)
+def get_catalog_change_feed(
+    since: str = Query(default="0", pattern=r"^\d{1,18}$"),
+    limit: int = Query(default=500, ge=1, le=1000),
+    db: Session = Depends(get_db),
+) -> CatalogChangesResponse:
+    try:
+        return get_catalog_changes(db, since=int(since), limit=limit)
+    except ChangeTokenExpiredError:
+        return _error_response(
+            code="CHANGE_TOKEN_EXPIRED",
+            message="Change token is unknown; drop the local copy and resync from since=0",
+            status_code=410,
+        )
+
+
+@api_v1.get(
+    "/tracks",
+    response_model=TrackBatchResponse,
+    responses={400: {"model": ErrorResponse}},
+)
+def get_tracks(
+    ids: str = Query(min_length=1),
+    fields: str | None = Query(default=None),
+    db: Session = Depends(get_db),
+) -> TrackBatchResponse:
+    try:
+        selected_fields = parse_track_fields(fields, PUBLIC_TRACK_FIELDS) if fields is not None else None
+    except ValueError as exc:
+        return _error_response(code="BAD_REQUEST", message=str(exc), status_code=400)
+    track_ids = [track_id.strip() for track_id in ids.split(",") if track_id.strip()]
+    if not track_ids or len(track_ids) > MAX_BATCH_TRACK_IDS:
+        return _error_response(
+            code="BAD_REQUEST",
+            message=f"ids must list between 1 and {MAX_BATCH_TRACK_IDS} track IDs",
+            status_code=400,
+        )
+    return Response(content=render_tracks_json(db, track_ids, fields=selected_fields), media_type="application/json")
 
 
 @api_v1.get(
@@ -127,11 +283,87 @@ def get_catalog(
     response_model=TrackMetadata,
     responses={404: {"model": ErrorResponse}},
 )
-def get_track(track_id: str, db: Session = Depends(get_db)) -> TrackMetadata:
-    track = get_track_by_id(db, track_id)
-    if track is None:
+def get_track(track_id: str, request: Request, db: Session = Depends(get_db)) -> TrackMetadata:
+    snapshot = get_catalog_snapshot(db)
+    etag = get_track_etag(db, track_id, snapshot=snapshot)
+    if etag is None:
+        return _not_found_track_error()
+    if _etag_matches(request, etag):
+        return _not_modified(etag, CATALOG_CACHE_CONTROL)
+    body = render_track_json(db, track_id, snapshot=snapshot)
+    if body is None:
         return _not_found_track_error()
-    return TrackMetadata.model_validate(track)
+    return _json_bytes_response(body, etag, CATALOG_CACHE_CONTROL)
+
+
+@api_v1.get("/search/suggest", response_model=SearchSuggestResponse)
+def get_search_suggestions(
+    prefix: str = Query(min_length=1, max_length=100),
+    limit: int = Query(default=8, ge=1, le=50),
+    db: Session = Depends(get_db),
+) -> SearchSuggestResponse:
+    return {"prefix": prefix, "suggestions": get_suggestions(db, prefix, limit)}
+
+
+@api_v1.get("/artists", response_model=ArtistListResponse, responses={400: {"model": ErrorResponse}})
+def get_artists(
+    request: Request,
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = Query(default=None),
+    db: Session = Depends(get_db),
+) -> ArtistListResponse:
+    snapshot = get_catalog_snapshot(db)
+    etag = get_catalog_etag(db, "artists", limit, cursor, snapshot=snapshot)
+    if _etag_matches(request, etag):
+        return _not_modified(etag, CATALOG_CACHE_CONTROL)
+    try:
+        result = list_artists(db, limit=limit, cursor=cursor, snapshot=snapshot)
+    except ValueError:
+        return _error_response(code="BAD_REQUEST", message="Invalid artist cursor", status_code=400)
+    _set_cache_headers(response, etag, CATALOG_CACHE_CONTROL)
+    return result
+
+
+@api_v1.get(
+    "/artists/{artist_id}/tracks",
+    response_model=ArtistTracksResponse,
+    responses={400: {"model": ErrorResponse}, 404: {"model": ErrorResponse}},
+)
+def get_artist_track_list(
+    artist_id: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = Query(default=None),
+    db: Session = Depends(get_db),
+) -> ArtistTracksResponse:
+    snapshot = get_catalog_snapshot(db)
+    etag = get_catalog_etag(db, "artist_tracks", artist_id, limit, cursor, snapshot=snapshot)
+    if _etag_matches(request, etag):
+        return _not_modified(etag, CATALOG_CACHE_CONTROL)
+    try:
+        result = get_artist_tracks(db, artist_id, limit=limit, cursor=cursor, snapshot=snapshot)
+    except ValueError:
+        return _error_response(code="BAD_REQUEST", message="Invalid artist cursor", status_code=400)
+    if result is None:
+        return _error_response(code="ARTIST_NOT_FOUND", message="Artist does not exist", status_code=404)
+    _set_cache_headers(response, etag, CATALOG_CACHE_CONTROL)
+    return result
+
+
+def _resolved_stream(stream: dict[str, Any], key: bytes | None, expires: int) -> dict[str, Any]:
+    url, fallback_url = stream["url"], stream.get("fallback_url")
+    if key is not None:
+        url = sign_media_path(url, expires, key)
+        fallback_url = sign_media_path(fallback_url, expires, key) if fallback_url else None
+    return {
+        "protocol": stream["protocol"],
+        "url": url,
+        "fallback_url": fallback_url,
+        "expires_at": datetime.fromtimestamp(expires, UTC).isoformat().replace("+00:00", "Z"),
+        "requires_auth": key is not None,
+    }
 
 
 @api_v1.post(
@@ -145,17 +377,36 @@ def resolve_playback(payload: ResolvePlaybackRequest, db: Session = Depends(get_
     if stream is None:
         return _not_found_track_error()
 
-    expires_at = (datetime.now(UTC) + timedelta(minutes=30)).isoformat().replace("+00:00", "Z")
-    return ResolvePlaybackResponse(
-        track_id=track_id,
-        stream={
-            "protocol": stream["protocol"],
-            "url": stream["url"],
-            "fallback_url": stream.get("fallback_url"),
-            "expires_at": expires_at,
-            "requires_auth": False,
-        },
-    )
+    expires = int(time.time()) + get_media_url_ttl_sec()
+    return ResolvePlaybackResponse(track_id=track_id, stream=_resolved_stream(stream, get_signing_key(), expires))
+
+
+@api_v1.post(
+    "/playback/resolve:batch",
+    response_model=ResolvePlaybackBatchResponse,
+    responses={400: {"model": ErrorResponse}},
+)
+def resolve_playback_batch(
+    payload: ResolvePlaybackBatchRequest, db: Session = Depends(get_db)
+) -> ResolvePlaybackBatchResponse:
+    track_ids = [track_id.strip() for track_id in payload.track_ids if track_id.strip()]
+    if not track_ids or len(track_ids) > MAX_BATCH_TRACK_IDS:
+        return _error_response(
+            code="BAD_REQUEST",
+            message=f"track_ids must list between 1 and {MAX_BATCH_TRACK_IDS} track IDs",
+            status_code=400,
+        )
+
+    key = get_signing_key()
+    expires = int(time.time()) + get_media_url_ttl_sec()
+    streams: list[dict[str, Any]] = []
+    missing_ids: list[str] = []
+    for track_id, stream in get_track_streams_by_ids(db, track_ids).items():
+        if stream is None:
+            missing_ids.append(track_id)
+        else:
+            streams.append({"track_id": track_id, "stream": _resolved_stream(stream, key, expires)})
+    return ResolvePlaybackBatchResponse(streams=streams, missing_ids=missing_ids)
 
 
 @api_v1.post("/sessions", response_model=CreateSessionResponse, status_code=201)
@@ -188,11 +439,19 @@ def update_session(
     response_model=SessionStateResponse,
     responses={404: {"model": ErrorResponse}},
 )
-def get_session(session_id: str, db: Session = Depends(get_db)) -> SessionStateResponse:
+def get_session(
+    session_id: str, request: Request, response: Response, db: Session = Depends(get_db)
+) -> SessionStateResponse:
     session = get_playback_session(db, session_id=session_id)
     if session is None:
         return _not_found_session_error()
 
+    digest = hashlib.sha256(f"{session['session_id']}:{session['updated_at']}".encode("utf-8")).hexdigest()
+    etag = f'"{digest[:32]}"'
+    if _etag_matches(request, etag):
+        return _not_modified(etag, SESSION_CACHE_CONTROL)
+    _set_cache_headers(response, etag, SESSION_CACHE_CONTROL)
+
     return SessionStateResponse(
         session_id=session["session_id"],
         queue_track_ids=session["queue_track_ids"],
@@ -225,7 +484,20 @@ def post_listen_event(
 def create_app() -> FastAPI:
     validate_admin_credentials_config()
     _ensure_file_logger()
-    app = FastAPI(title="ferric-api", version="0.1.0")
+    add_catalog_change_listener(export_static_catalog_on_change)
+    add_catalog_change_listener(refresh_suggest_index_on_change)
+
+    @asynccontextmanager
+    async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+        # Multi-worker deployments opt in so writes on one worker invalidate the others.
+        bus = start_catalog_bus(engine, invalidate_catalog) if is_bus_enabled() else None
+        try:
+            yield
+        finally:
+            if bus is not None:
+                bus.stop()
+
+    app = FastAPI(title="ferric-api", version="0.1.0", lifespan=lifespan)
 
     @app.middleware("http")
     async def request_logging_middleware(request: Request, call_next):
@@ -266,6 +538,7 @@ def create_app() -> FastAPI:
     app.include_router(api_v1)
     app.include_router(admin_v1)
     app.include_router(admin_ui)
+    app.include_router(media)
     return app
 
 
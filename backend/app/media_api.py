@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import mimetypes
+import os
+import stat
+from email.utils import parsedate_to_datetime
+from pathlib import Path, PurePosixPath
+
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import FileResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import Receive, Scope, Send
+
+from backend.app.media_signing import HLS_PREFIX, SIGNED_MEDIA_PREFIX, get_signing_key, verify_media_signature
+from backend.app.segment_cache import CachedSegment, SegmentCache, get_segment_cache_budget_bytes
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+# Public media path prefix -> directory it is served from.
+MEDIA_ROOTS = {
+    "/generated/hls/": REPO_ROOT / "public" / "generated" / "hls",
+    "/assets/raw-audio/": REPO_ROOT / "assets" / "raw-audio",
+}
+MEDIA_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+    ".m4s": "video/iso.segment",
+    ".mp3": "audio/mpeg",
+}
+SEGMENT_SUFFIXES = {".ts", ".m4s"}
+# HLS files small and hot enough to keep in memory; raw audio always comes from disk.
+CACHEABLE_SUFFIXES = SEGMENT_SUFFIXES | {".m3u8"}
+# Segments behind a signed URL never change for that URL (a re-encode is only reachable
+# through a newly resolved one). Playlists, raw audio and unsigned paths are rewritten
+# in place by uploads, so they revalidate against ETag / Last-Modified instead.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+media = APIRouter(tags=["media"])
+_SEGMENT_CACHE = SegmentCache(get_segment_cache_budget_bytes())
+
+
+def media_file_path(path: str) -> Path | None:
+    """Map a public media path to a file under its media root, refusing anything outside it."""
+    for prefix, root in MEDIA_ROOTS.items():
+        if path.startswith(prefix):
+            candidate = (root / path[len(prefix) :]).resolve()
+            if candidate.is_relative_to(root.resolve()):
+                return candidate
+    return None
+
+
+def media_type_for(path: Path) -> str:
+    return MEDIA_TYPES.get(path.suffix) or mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def _is_not_modified(request_headers: Headers, etag: str, mtime: float) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(mtime) <= since
+
+
+async def _send_not_modified(headers: MutableHeaders, scope: Scope, receive: Receive, send: Send) -> None:
+    kept = ("etag", "last-modified", "cache-control")
+    await Response(status_code=304, headers={name: headers[name] for name in kept if name in headers})(
+        scope, receive, send
+    )
+
+
+def _single_range(http_range: str, size: int) -> tuple[int, int] | None:
+    """Parse a one-part `bytes=` range to (start, end); anything else is left to FileResponse."""
+    units, _, spec = http_range.partition("=")
+    if units.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash or not (first.isdigit() or last.isdigit()) or any(p and not p.isdigit() for p in (first, last)):
+        return None
+    if not first:
+        start, end = max(0, size - int(last)), size
+    else:
+        start, end = int(first), min(size, int(last) + 1) if last else size
+    return (start, end) if start < end else None
+
+
+class MediaFileResponse(FileResponse):
+    """FileResponse that answers conditional requests and can send without copying.
+
+    `If-None-Match` / `If-Modified-Since` get a bodiless 304. When the server
+    offers the ASGI zero-copy extension, whole files and single ranges are
+    handed over as a file descriptor for the server to `os.sendfile`; other
+    servers get Starlette's chunked reads (or `pathsend` where supported).
+    """
+
+    chunk_size = 256 * 1024
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        if self.stat_result is not None and _is_not_modified(
+            request_headers, self.headers["etag"], self.stat_result.st_mtime
+        ):
+            await _send_not_modified(self.headers, scope, receive, send)
+            return
+        if (
+            ZEROCOPY_EXTENSION not in scope.get("extensions", {})
+            or scope["method"].upper() == "HEAD"
+            or self.stat_result is None
+        ):
+            await super().__call__(scope, receive, send)
+            return
+
+        size = self.stat_result.st_size
+        start, end, status = 0, size, 200
+        http_range = request_headers.get("range")
+        http_if_range = request_headers.get("if-range")
+        if http_range is not None and (http_if_range is None or self._should_use_range(http_if_range)):
+            byte_range = _single_range(http_range, size)
+            if byte_range is None:
+                # Multipart, unsatisfiable or malformed: FileResponse's own handling applies.
+                await super().__call__(scope, receive, send)
+                return
+            start, end = byte_range
+            status = 206
+        headers = MutableHeaders(raw=list(self.raw_headers))
+        if status == 206:
+            headers["content-range"] = f"bytes {start}-{end - 1}/{size}"
+            headers["content-length"] = str(end - start)
+        with open(self.path, "rb") as file:
+            await send({"type": "http.response.start", "status": status, "headers": headers.raw})
+            await send({"type": ZEROCOPY_EXTENSION, "file": file, "offset": start, "count": end - start})
+
+
+class CachedMediaResponse(Response):
+    """A media file served from the segment cache, with the same validators as from disk."""
+
+    def __init__(self, entry: CachedSegment, media_type: str, cache_control: str) -> None:
+        super().__init__(
+            entry.data,
+            media_type=media_type,
+            headers={
+                "Accept-Ranges": "bytes",
+                "Cache-Control": cache_control,
+                "ETag": entry.etag,
+                "Last-Modified": entry.last_modified,
+            },
+        )
+        self.mtime = entry.mtime_ns / 1e9
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if _is_not_modified(Headers(scope=scope), self.headers["etag"], self.mtime):
+            await _send_not_modified(self.headers, scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+def serve_media_file(public_path: str, cache_control: str, request_headers: Headers) -> Response:
+    # Range requests stay on the file path; players fetch HLS segments whole. Keys with
+    # `..` are left uncached so every entry sits under its track's invalidation prefix.
+    cacheable = (
+        public_path.startswith(HLS_PREFIX)
+        and PurePosixPath(public_path).suffix in CACHEABLE_SUFFIXES
+        and "range" not in request_headers
+        and ".." not in public_path.split("/")
+    )
+    if cacheable:
+        entry = _SEGMENT_CACHE.get(public_path)
+        if entry is not None:
+            return CachedMediaResponse(entry, media_type_for(Path(public_path)), cache_control)
+
+    file_path = media_file_path(public_path)
+    if file_path is None:
+        return Response(status_code=404)
+    try:
+        stat_result = os.stat(file_path)
+    except OSError:
+        return Response(status_code=404)
+    if not stat.S_ISREG(stat_result.st_mode):
+        return Response(status_code=404)
+    response = MediaFileResponse(
+        file_path,
+        media_type=media_type_for(file_path),
+        stat_result=stat_result,
+        headers={"Cache-Control": cache_control},
+    )
+    if not cacheable or not _SEGMENT_CACHE.accepts(stat_result.st_size):
+        return response
+    try:
+        data = file_path.read_bytes()
+    except OSError:
+        return response
+    if len(data) != stat_result.st_size:
+        # Changed between stat and read (being re-encoded): cache nothing.
+        return response
+    entry = CachedSegment(
+        file_path=str(file_path),
+        data=data,
+        mtime_ns=stat_result.st_mtime_ns,
+        size=stat_result.st_size,
+        etag=response.headers["etag"],
+        last_modified=response.headers["last-modified"],
+        checked_at=0.0,
+    )
+    _SEGMENT_CACHE.put(public_path, entry)
+    return CachedMediaResponse(entry, response.media_type, cache_control)
+
+
+def invalidate_hls_track(track_id: str) -> None:
+    """Drop a track's cached playlist and segments after its HLS output is rewritten."""
+    _SEGMENT_CACHE.invalidate(f"{HLS_PREFIX}{track_id}/")
+
+
+def get_segment_cache_stats() -> dict[str, int]:
+    return _SEGMENT_CACHE.stats()
+
+
+@media.api_route(
+    SIGNED_MEDIA_PREFIX + "/{expires}/{signature}/{path:path}", methods=["GET", "HEAD"], include_in_schema=False
+)
+def get_signed_media(expires: str, signature: str, path: str, request: Request) -> Response:
+    public_path = f"/{path}"
+    key = get_signing_key()
+    # Verification is HMAC and clock only: no catalog or database lookup per segment.
+    if key is None or not verify_media_signature(public_path, expires, signature, key):
+        return Response(status_code=403)
+    is_segment = Path(public_path).suffix in SEGMENT_SUFFIXES
+    cache_control = IMMUTABLE_CACHE_CONTROL if is_segment else REVALIDATE_CACHE_CONTROL
+    return serve_media_file(public_path, cache_control, request.headers)
+
+
+@media.api_route("/generated/hls/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+def get_hls_media(path: str, request: Request) -> Response:
+    return _serve_unsigned(f"/generated/hls/{path}", request)
+
+
+@media.api_route("/assets/raw-audio/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+def get_raw_audio(path: str, request: Request) -> Response:
+    return _serve_unsigned(f"/assets/raw-audio/{path}", request)
+
+
+def _serve_unsigned(public_path: str, request: Request) -> Response:
+    # With a signing key configured, media is only reachable through signed URLs.
+    if get_signing_key() is not None:
+        return Response(status_code=403)
+    return serve_media_file(public_path, REVALIDATE_CACHE_CONTROL, request.headers)
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import time
+from base64 import urlsafe_b64encode
+
+
+SIGNED_MEDIA_PREFIX = "/media/s"
+HLS_PREFIX = "/generated/hls/"
+DEFAULT_MEDIA_URL_TTL_SEC = 30 * 60
+_SIGNATURE_BYTES = 16
+
+
+def get_signing_key() -> bytes | None:
+    """Shared HMAC key for media URLs; unset leaves resolve returning plain static paths."""
+    raw = os.getenv("FERRIC_MEDIA_SIGNING_KEY", "")
+    return raw.encode("utf-8") if raw else None
+
+
+def get_media_url_ttl_sec() -> int:
+    raw = os.getenv("FERRIC_MEDIA_URL_TTL_SEC")
+    try:
+        return max(1, int(raw)) if raw else DEFAULT_MEDIA_URL_TTL_SEC
+    except ValueError:
+        return DEFAULT_MEDIA_URL_TTL_SEC
+
+
+def signing_scope(path: str) -> str:
+    """What a signature covers: a whole HLS track directory (playlist and segments), else one file."""
+    if path.startswith(HLS_PREFIX):
+        track_dir = path[len(HLS_PREFIX) :].split("/", 1)[0]
+        return f"{HLS_PREFIX}{track_dir}/"
+    return path
+
+
+def _signature(key: bytes, scope: str, expires: int) -> str:
+    digest = hmac.new(key, f"{expires}:{scope}".encode("utf-8"), hashlib.sha256).digest()
+    return urlsafe_b64encode(digest[:_SIGNATURE_BYTES]).rstrip(b"=").decode("ascii")
+
+
+def sign_media_path(path: str, expires: int, key: bytes) -> str:
+    """Return `path` as a signed URL valid until the unix time `expires`.
+
+    The token sits in the path, not the query string, so segment URIs that a
+    playlist lists relative to itself inherit it.
+    """
+    return f"{SIGNED_MEDIA_PREFIX}/{expires}/{_signature(key, signing_scope(path), expires)}{path}"
+
+
+def verify_media_signature(path: str, expires: str, signature: str, key: bytes, now: float | None = None) -> bool:
+    """Check a signed media request using only the key and the clock."""
+    if not expires.isdigit() or int(expires) < (time.time() if now is None else now):
+        return False
+    if ".." in path.split("/"):
+        return False
+    return hmac.compare_digest(signature, _signature(key, signing_scope(path), int(expires)))
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import UTC, datetime
 
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -29,6 +29,14 @@ class PlaybackSession(Base):
 
 class Track(Base):
     __tablename__ = "tracks"
+    # (status, sort column, id) indexes serve every sorted listing as an index range scan.
+    __table_args__ = (
+        Index("ix_tracks_status_id", "status", "id"),
+        Index("ix_tracks_status_uploaded_at_id", "status", "uploaded_at", "id"),
+        Index("ix_tracks_status_play_count_id", "status", "play_count", "id"),
+        Index("ix_tracks_status_title_id", "status", "title", "id"),
+        Index("ix_tracks_status_duration_sec_id", "status", "duration_sec", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String(64), primary_key=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -36,6 +44,8 @@ class Track(Base):
     duration_sec: Mapped[int] = mapped_column(Integer, nullable=False)
     status: Mapped[str] = mapped_column(String(16), nullable=False, default="published")
     uploaded_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Count of "start" listening events, kept current by record_listening_event.
+    play_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utc_now)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utc_now)
 
@@ -62,10 +72,14 @@ class TrackStream(Base):
 
 class ListeningEvent(Base):
     __tablename__ = "listening_events"
+    __table_args__ = (
+        Index("ix_listening_events_user_id_track_id_action", "user_id", "track_id", "action"),
+        Index("ix_listening_events_track_id_action_user_id", "track_id", "action", "user_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    user_id: Mapped[str] = mapped_column(String(128), nullable=False, index=True)
-    track_id: Mapped[str] = mapped_column(String(64), ForeignKey("tracks.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    track_id: Mapped[str] = mapped_column(String(64), ForeignKey("tracks.id", ondelete="CASCADE"), nullable=False)
     action: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
     position_sec: Mapped[int | None] = mapped_column(Integer, nullable=True)
     ip_address: Mapped[str | None] = mapped_column(String(128), nullable=True)
@@ -95,3 +109,11 @@ class TrackMetadata(Base):
     chroma_mean_json: Mapped[str | None] = mapped_column(Text, nullable=True)
     tonnetz_mean_json: Mapped[str | None] = mapped_column(Text, nullable=True)
     metadata_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+
+class CatalogChange(Base):
+    __tablename__ = "catalog_changes"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    track_id: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utc_now)
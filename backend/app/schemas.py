@@ -27,10 +27,18 @@ class TrackMetadata(BaseModel):
     artwork: Artwork = Field(default_factory=Artwork)
 
 
+class TrackBatchResponse(BaseModel):
+    tracks: list[TrackMetadata]
+    missing_ids: list[str]
+
+
 class CatalogPage(BaseModel):
     limit: int
     offset: int
-    total: int
+    total: int | None
+    total_is_estimate: bool = False
+    has_more: bool = False
+    next_cursor: str | None = None
 
 
 class CatalogResponse(BaseModel):
@@ -40,8 +48,58 @@ class CatalogResponse(BaseModel):
     page: CatalogPage
 
 
+class CatalogChangesResponse(BaseModel):
+    upserted: list[TrackMetadata]
+    removed: list[str]
+    next_token: str
+    has_more: bool
+
+
+class CursorPage(BaseModel):
+    limit: int
+    total: int
+    has_more: bool
+    next_cursor: str | None = None
+
+
+class ArtistSummary(BaseModel):
+    id: str
+    name: str
+    track_count: int
+
+
+class ArtistListResponse(BaseModel):
+    artists: list[ArtistSummary]
+    page: CursorPage
+
+
+class ArtistTracksResponse(BaseModel):
+    artist: ArtistSummary
+    tracks: list[TrackMetadata]
+    page: CursorPage
+
+
+class SearchSuggestion(BaseModel):
+    text: str
+    kind: Literal["artist", "track"]
+    artist_id: str | None = None
+    track_id: str | None = None
+
+
+class SearchSuggestResponse(BaseModel):
+    prefix: str
+    suggestions: list[SearchSuggestion]
+
+
 class ErrorDetail(BaseModel):
-    code: Literal["BAD_REQUEST", "TRACK_NOT_FOUND", "SESSION_NOT_FOUND", "INTERNAL_ERROR"]
+    code: Literal[
+        "BAD_REQUEST",
+        "TRACK_NOT_FOUND",
+        "ARTIST_NOT_FOUND",
+        "SESSION_NOT_FOUND",
+        "CHANGE_TOKEN_EXPIRED",
+        "INTERNAL_ERROR",
+    ]
     message: str
     request_id: str
 
@@ -75,6 +133,17 @@ class ResolvePlaybackResponse(BaseModel):
     stream: ResolvedStream
 
 
+class ResolvePlaybackBatchRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    track_ids: list[str] = Field(min_length=1)
+    client: ResolveClient
+
+
+class ResolvePlaybackBatchResponse(BaseModel):
+    streams: list[ResolvePlaybackResponse]
+    missing_ids: list[str]
+
+
 class CreateSessionRequest(BaseModel):
     model_config = ConfigDict(extra="forbid")
     queue_track_ids: list[str]
@@ -225,6 +294,16 @@ class UserStatsResponse(BaseModel):
     tracks: list[UserTrackStatsItem]
 
 
+class SegmentCacheStatsResponse(BaseModel):
+    hits: int
+    misses: int
+    evictions: int
+    rejections: int
+    entries: int
+    bytes: int
+    budget_bytes: int
+
+
 class AdminLogsResponse(BaseModel):
     source: str
     lines: list[str]
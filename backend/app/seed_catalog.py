@@ -1,14 +1,33 @@
 from __future__ import annotations
 
-from backend.app.catalog_repository import seed_catalog_from_file
+import argparse
+import sys
+from pathlib import Path
+
+from backend.app.catalog_export import export_static_catalog, is_export_enabled
+from backend.app.catalog_repository import SEED_CHUNK_SIZE, seed_catalog_from_file
+from backend.app.catalog_seed import CATALOG_PATH
 from backend.app.db import SessionLocal
 
 
-def main() -> None:
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Seed the catalog from a JSON or NDJSON manifest.")
+    parser.add_argument("manifest", nargs="?", type=Path, default=CATALOG_PATH)
+    parser.add_argument("--chunk-size", type=int, default=SEED_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
     db = SessionLocal()
     try:
-        count = seed_catalog_from_file(db)
+        count = seed_catalog_from_file(
+            db,
+            args.manifest,
+            chunk_size=args.chunk_size,
+            progress=lambda done: print(f"Seeded {done} tracks...", file=sys.stderr, flush=True),
+        )
         print(f"Seeded catalog tracks: {count}")
+        if is_export_enabled():
+            index = export_static_catalog(db)
+            print(f"Exported static catalog shards: {len(index['shards'])}")
     finally:
         db.close()
 
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, replace
+from threading import Lock
+
+
+DEFAULT_SEGMENT_CACHE_MB = 64
+# Larger files (long fallback MP3s) are streamed from disk rather than cached.
+MAX_ENTRY_BYTES = 4 * 1024 * 1024
+# Cached files are re-stat'ed at most this often, so in-place re-encodes are picked up.
+REVALIDATE_SEC = 5.0
+# A 10 s AAC segment at 128 kbit/s is ~160 KiB; size the frequency sketch for that.
+TYPICAL_ENTRY_BYTES = 256 * 1024
+_SKETCH_DEPTH = 4
+_MAX_COUNT = 15
+
+
+def get_segment_cache_budget_bytes() -> int:
+    """Byte budget from FERRIC_SEGMENT_CACHE_MB; 0 turns the cache off."""
+    raw = os.getenv("FERRIC_SEGMENT_CACHE_MB")
+    try:
+        return max(0, int(float(raw) * 1024 * 1024)) if raw else DEFAULT_SEGMENT_CACHE_MB * 1024 * 1024
+    except ValueError:
+        return DEFAULT_SEGMENT_CACHE_MB * 1024 * 1024
+
+
+class FrequencySketch:
+    """Count-min sketch of recent access counts (4-bit style, capped at 15) with periodic halving.
+
+    Halving every `sample_size` increments ages old popularity out, so yesterday's
+    hit stops protecting its segments from today's new release.
+    """
+
+    def __init__(self, width: int) -> None:
+        self.width = 1 << max(4, (width - 1).bit_length())
+        self.sample_size = 10 * self.width
+        self._rows = [[0] * self.width for _ in range(_SKETCH_DEPTH)]
+        self._additions = 0
+
+    def _slots(self, key: Hashable) -> list[int]:
+        mask = self.width - 1
+        return [hash((seed, key)) & mask for seed in range(_SKETCH_DEPTH)]
+
+    def increment(self, key: Hashable) -> None:
+        for row, slot in zip(self._rows, self._slots(key)):
+            if row[slot] < _MAX_COUNT:
+                row[slot] += 1
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._rows = [[count >> 1 for count in row] for row in self._rows]
+            self._additions //= 2
+
+    def estimate(self, key: Hashable) -> int:
+        return min(row[slot] for row, slot in zip(self._rows, self._slots(key)))
+
+
+@dataclass(frozen=True)
+class CachedSegment:
+    file_path: str
+    data: bytes
+    mtime_ns: int
+    size: int
+    etag: str
+    last_modified: str
+    checked_at: float
+
+
+class SegmentCache:
+    """Byte-budgeted cache of small media files with TinyLFU admission.
+
+    Every lookup counts towards the key's frequency. When a new file does not
+    fit, it is admitted only if it has been requested more often than each
+    least-recently-used entry it would evict, so one-off requests for the long
+    tail cannot flush the segments of the tracks everyone is playing.
+    """
+
+    def __init__(
+        self,
+        budget_bytes: int,
+        max_entry_bytes: int = MAX_ENTRY_BYTES,
+        revalidate_sec: float = REVALIDATE_SEC,
+        clock: Callable[[], float] = time.monotonic,
+        expected_entries: int | None = None,
+    ) -> None:
+        self.budget_bytes = budget_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.revalidate_sec = revalidate_sec
+        self.clock = clock
+        self._lock = Lock()
+        self._entries: OrderedDict[str, CachedSegment] = OrderedDict()
+        if expected_entries is None:
+            expected_entries = budget_bytes // TYPICAL_ENTRY_BYTES
+        self._sketch = FrequencySketch(max(16, expected_entries))
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0
+
+    def accepts(self, size: int) -> bool:
+        return 0 < self.budget_bytes and size <= min(self.max_entry_bytes, self.budget_bytes)
+
+    def get(self, path: str) -> CachedSegment | None:
+        """Return the cached file for public `path`, stat'ing it only when its last check is stale."""
+        with self._lock:
+            self._sketch.increment(path)
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._entries.move_to_end(path)
+        if entry is not None and self.clock() - entry.checked_at >= self.revalidate_sec:
+            entry = self._revalidate(path, entry)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def _revalidate(self, path: str, entry: CachedSegment) -> CachedSegment | None:
+        try:
+            stat_result = os.stat(entry.file_path)
+        except OSError:
+            stat_result = None
+        with self._lock:
+            if self._entries.get(path) is not entry:
+                return self._entries.get(path)
+            if stat_result is None or (stat_result.st_mtime_ns, stat_result.st_size) != (entry.mtime_ns, entry.size):
+                self._drop(path)
+                return None
+            entry = replace(entry, checked_at=self.clock())
+            self._entries[path] = entry
+            return entry
+
+    def put(self, path: str, entry: CachedSegment) -> bool:
+        """Offer a freshly read file under its public `path`; returns whether it was admitted."""
+        size = entry.size
+        if not self.accepts(size):
+            return False
+        entry = replace(entry, checked_at=self.clock())
+        with self._lock:
+            self._drop(path)
+            victims: list[str] = []
+            freed = 0
+            candidate_frequency = self._sketch.estimate(path)
+            for victim in self._entries:
+                if self.bytes - freed + size <= self.budget_bytes:
+                    break
+                if self._sketch.estimate(victim) >= candidate_frequency:
+                    self.rejections += 1
+                    return False
+                victims.append(victim)
+                freed += self._entries[victim].size
+            for victim in victims:
+                self._drop(victim)
+                self.evictions += 1
+            self._entries[path] = entry
+            self.bytes += size
+            return True
+
+    def _drop(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def invalidate(self, prefix: str | None = None) -> None:
+        """Drop entries whose path starts with `prefix`, or everything when None."""
+        with self._lock:
+            for path in [path for path in self._entries if prefix is None or path.startswith(prefix)]:
+                self._drop(path)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "rejections": self.rejections,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "budget_bytes": self.budget_bytes,
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -64,4 +64,5 @@ def get_playback_session(db: Session, session_id: str) -> dict | None:
         "position_sec": row.position_sec,
         "shuffle": row.shuffle,
         "repeat_mode": row.repeat_mode,
+        "updated_at": _to_iso(row.updated_at),
     }
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from threading import Lock, get_ident
+from typing import Any, TypeVar
+
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Call:
+    future: Future[Any] = field(default_factory=Future)
+    # Thread running the load; a nested call from that thread must not wait on itself.
+    owner: int | None = None
+
+
+class SingleFlight:
+    """Coalesce concurrent identical loads: one caller runs `fn`, the rest share its outcome.
+
+    Nothing is cached: once the load finishes, the next call for the key runs again.
+    Sync callers block on the shared future; async callers await it without holding
+    a worker thread, and an async leader runs `fn` in the default executor.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def _join(self, key: Hashable) -> tuple[_Call, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def _run(self, key: Hashable, call: _Call, fn: Callable[[], T]) -> T:
+        call.owner = get_ident()
+        try:
+            result = fn()
+        except BaseException as exc:
+            call.future.set_exception(exc)
+            raise
+        else:
+            call.future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        call, leader = self._join(key)
+        if leader:
+            return self._run(key, call, fn)
+        if call.owner == get_ident():
+            return fn()
+        return call.future.result()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], T]) -> T:
+        call, leader = self._join(key)
+        if leader:
+            return await asyncio.get_running_loop().run_in_executor(None, self._run, key, call, fn)
+        return await asyncio.wrap_future(call.future)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
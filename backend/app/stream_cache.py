@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Iterable
+from threading import Lock
+from typing import Any
+
+
+STREAM_CACHE_SIZE = 50_000
+# Unknown IDs get their own, smaller LRU so a scraper cannot evict real streams.
+NEGATIVE_CACHE_SIZE = 10_000
+
+
+class StreamCache:
+    """Bounded LRU of resolved stream rows by track ID, with negative entries for unknown IDs.
+
+    Entries belong to one database bind; looking up with another bind is a miss.
+    A load started before an invalidation is not stored (see `generation`), so a
+    write that commits while a resolve is querying cannot be cached over.
+    """
+
+    def __init__(self, size: int = STREAM_CACHE_SIZE, negative_size: int = NEGATIVE_CACHE_SIZE) -> None:
+        self.size = size
+        self.negative_size = negative_size
+        self._lock = Lock()
+        self._bind: Any = None
+        self._streams: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._missing: OrderedDict[str, None] = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, bind: Any, track_id: str) -> tuple[bool, dict[str, Any] | None]:
+        """Return (found, stream); a found None is a cached "no such published stream"."""
+        with self._lock:
+            if bind is self._bind:
+                stream = self._streams.get(track_id)
+                if stream is not None:
+                    self._streams.move_to_end(track_id)
+                    self.hits += 1
+                    return True, stream
+                if track_id in self._missing:
+                    self._missing.move_to_end(track_id)
+                    self.hits += 1
+                    return True, None
+            self.misses += 1
+            return False, None
+
+    def put(self, bind: Any, track_id: str, stream: dict[str, Any] | None, generation: int) -> None:
+        with self._lock:
+            if generation != self.generation:
+                return
+            if bind is not self._bind:
+                self._bind = bind
+                self._streams.clear()
+                self._missing.clear()
+            entries, limit = (self._missing, self.negative_size) if stream is None else (self._streams, self.size)
+            entries[track_id] = stream
+            entries.move_to_end(track_id)
+            while len(entries) > limit:
+                entries.popitem(last=False)
+
+    def invalidate(self, track_ids: Iterable[str] | None = None) -> None:
+        """Drop entries for `track_ids`, or everything when None."""
+        with self._lock:
+            self.generation += 1
+            if track_ids is None:
+                self._streams.clear()
+                self._missing.clear()
+                return
+            for track_id in track_ids:
+                self._streams.pop(track_id, None)
+                self._missing.pop(track_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._streams) + len(self._missing)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import os
+import subprocess
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _run_alembic(database_url: str, command: list[str]) -> None:
+    env = os.environ.copy()
+    env["DATABASE_URL"] = database_url
+    subprocess.run(
+        ["python3", "-m", "alembic", "-c", "backend/alembic.ini", *command],
+        cwd=REPO_ROOT,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+
+
+@pytest.fixture(scope="session")
+def alembic() -> Callable[[str, list[str]], None]:
+    """Run an Alembic command (e.g. `["upgrade", "head"]`) against a database URL."""
+    return _run_alembic
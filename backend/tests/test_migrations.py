@@ -1,33 +1,19 @@
 from __future__ import annotations
 
-import os
-import subprocess
-from pathlib import Path
+import pytest
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import Session
 
-from sqlalchemy import create_engine, inspect
+from backend.app import catalog_repository
+from backend.app.catalog_repository import get_catalog_page
+from backend.app.catalog_search import search_track_ids
 
 
-REPO_ROOT = Path(__file__).resolve().parents[2]
-
-
-def _run_alembic(database_url: str, command: list[str]) -> None:
-    env = os.environ.copy()
-    env["DATABASE_URL"] = database_url
-    subprocess.run(
-        ["python3", "-m", "alembic", "-c", "backend/alembic.ini", *command],
-        cwd=REPO_ROOT,
-        env=env,
-        check=True,
-        capture_output=True,
-        text=True,
-    )
-
-
-def test_alembic_upgrade_and_downgrade_sqlite(tmp_path) -> None:
+def test_alembic_upgrade_and_downgrade_sqlite(alembic, tmp_path) -> None:
     db_path = tmp_path / "migration_test.db"
     database_url = f"sqlite:///{db_path}"
 
-    _run_alembic(database_url, ["upgrade", "head"])
+    alembic(database_url, ["upgrade", "head"])
     engine = create_engine(database_url)
     inspector = inspect(engine)
     assert "playback_sessions" in inspector.get_table_names()
@@ -36,12 +22,97 @@ def test_alembic_upgrade_and_downgrade_sqlite(tmp_path) -> None:
     assert "track_streams" in inspector.get_table_names()
     assert "listening_events" in inspector.get_table_names()
     assert "track_metadata" in inspector.get_table_names()
+    assert "catalog_changes" in inspector.get_table_names()
     track_columns = {col["name"] for col in inspector.get_columns("tracks")}
     assert "uploaded_at" in track_columns
     engine.dispose()
 
-    _run_alembic(database_url, ["downgrade", "base"])
+    alembic(database_url, ["downgrade", "base"])
     engine = create_engine(database_url)
     inspector = inspect(engine)
     assert "playback_sessions" not in inspector.get_table_names()
     engine.dispose()
+
+
+def test_sqlite_full_text_search_index_tracks_writes(alembic, tmp_path) -> None:
+    db_path = tmp_path / "search_test.db"
+    database_url = f"sqlite:///{db_path}"
+    alembic(database_url, ["upgrade", "head"])
+
+    engine = create_engine(database_url)
+    insert = text(
+        "INSERT INTO tracks (id, title, artist, duration_sec, status, created_at, updated_at) "
+        "VALUES (:id, :title, :artist, 100, 'published', '2026-01-01', '2026-01-01')"
+    )
+    with Session(engine) as db:
+        db.execute(insert, {"id": "t1", "title": "Neon Harbor", "artist": "Northline"})
+        db.execute(insert, {"id": "t2", "title": "Harbor Lights", "artist": "Neon Neon"})
+        db.execute(insert, {"id": "t3", "title": "Static Bloom", "artist": "Signal Fields"})
+        db.commit()
+
+        assert search_track_ids(db, "neon") == ["t2", "t1"]
+        assert sorted(search_track_ids(db, "harb")) == ["t1", "t2"]
+        assert search_track_ids(db, "static blo") == ["t3"]
+        assert search_track_ids(db, "sig") == ["t3"]
+
+        db.execute(text("UPDATE tracks SET title = 'Quiet Water' WHERE id = 't3'"))
+        db.execute(text("DELETE FROM tracks WHERE id = 't1'"))
+        db.commit()
+        assert search_track_ids(db, "bloom") == []
+        assert search_track_ids(db, "quiet") == ["t3"]
+        assert search_track_ids(db, "neon") == ["t2"]
+    engine.dispose()
+
+
+def test_ranked_catalog_search_pages_without_full_count(alembic, tmp_path, monkeypatch) -> None:
+    db_path = tmp_path / "ranked_page_test.db"
+    database_url = f"sqlite:///{db_path}"
+    alembic(database_url, ["upgrade", "head"])
+    monkeypatch.setattr(catalog_repository, "SEARCH_TOTAL_ESTIMATE_CAP", 4)
+
+    engine = create_engine(database_url)
+    insert = text(
+        "INSERT INTO tracks (id, title, artist, duration_sec, status, created_at, updated_at) "
+        "VALUES (:id, :title, 'Echo Unit', 100, :status, '2026-01-01', '2026-01-01')"
+    )
+    with Session(engine) as db:
+        for index in range(6):
+            db.execute(insert, {"id": f"e{index}", "title": f"Echo {index}", "status": "published"})
+        db.execute(insert, {"id": "draft", "title": "Echo Draft", "status": "draft"})
+        db.commit()
+
+        statements: list[str] = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        seen: list[str] = []
+        cursor = None
+        while True:
+            page = get_catalog_page(db, limit=4, offset=0, q="echo", cursor=cursor, include_total=False)
+            seen.extend(track["id"] for track in page["tracks"])
+            # No count query runs for count-free pages.
+            assert page["page"]["total"] is None
+            assert page["page"]["total_is_estimate"] is False
+            cursor = page["page"]["next_cursor"]
+            if cursor is None:
+                break
+        assert sorted(seen) == [f"e{index}" for index in range(6)]
+        assert not [sql for sql in statements if "count(*)" in sql]
+
+        # Ranked searches never materialize every match: the total is capped either way.
+        default = get_catalog_page(db, limit=4, offset=0, q="echo")
+        assert default["page"]["total"] == 4
+        assert default["page"]["total_is_estimate"] is True
+        assert default["page"]["has_more"] is True
+
+        monkeypatch.setattr(catalog_repository, "SEARCH_TOTAL_ESTIMATE_CAP", 1000)
+        exact = get_catalog_page(db, limit=4, offset=0, q="echo")
+        assert exact["page"]["total"] == 6
+        assert exact["page"]["total_is_estimate"] is False
+
+        with pytest.raises(ValueError):
+            get_catalog_page(db, limit=4, offset=0, q="echo", cursor=catalog_repository._encode_cursor("id", "e1"))
+
+        ranked = catalog_repository.list_admin_tracks(db, q="echo 3", status=None)
+        assert [track["id"] for track in ranked] == ["e3"]
+        assert len(catalog_repository.list_admin_tracks(db, q="echo", status="draft")) == 1
+        assert catalog_repository.list_admin_tracks(db, q="!!", status=None) == []
+    engine.dispose()
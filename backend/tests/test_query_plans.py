@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Callable
+
+import pytest
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import Session
+
+from backend.app import catalog_repository, listening_repository, session_repository
+from backend.app.schemas import AdminTrackUpdateRequest, CreateSessionRequest, UpdateSessionRequest
+
+
+TRACK_COUNT = 2000
+EVENT_COUNT = 10000
+ACTIONS = ["start", "finish", "pause", "seek", "skip_next"]
+SCAN_RE = re.compile(r"^SCAN (\w+)(.*)$")
+PROBE_LIMIT_RE = re.compile(r"LIMIT \?( OFFSET \?)?\s*$")
+
+
+@pytest.fixture(scope="module")
+def large_db(alembic, tmp_path_factory):
+    db_path = tmp_path_factory.mktemp("plans") / "query_plans.db"
+    database_url = f"sqlite:///{db_path}"
+    alembic(database_url, ["upgrade", "head"])
+    engine = create_engine(database_url)
+    track_ids = [f"t{index:05d}" for index in range(TRACK_COUNT)]
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO tracks (id, title, artist, duration_sec, status, created_at, updated_at) "
+                "VALUES (:id, :title, :artist, 100, :status, '2026-01-01', '2026-01-01')"
+            ),
+            [
+                {
+                    "id": track_id,
+                    "title": f"Song {index}",
+                    "artist": f"Artist {index % 200}",
+                    "status": "draft" if index % 5 == 0 else "published",
+                }
+                for index, track_id in enumerate(track_ids)
+            ],
+        )
+        conn.execute(
+            text("INSERT INTO track_artwork VALUES (:id, '/images/x.jpg', '2026-01-01', '2026-01-01')"),
+            [{"id": track_id} for track_id in track_ids],
+        )
+        conn.execute(
+            text("INSERT INTO track_streams VALUES (:id, 'hls', '/p.m3u8', '/f.mp3', '2026-01-01', '2026-01-01')"),
+            [{"id": track_id} for track_id in track_ids],
+        )
+        conn.execute(
+            text(
+                "INSERT INTO listening_events (user_id, track_id, action, created_at) "
+                "VALUES (:user_id, :track_id, :action, '2026-01-01')"
+            ),
+            [
+                {"user_id": f"u{index % 300}", "track_id": track_ids[index % TRACK_COUNT], "action": ACTIONS[index % 5]}
+                for index in range(EVENT_COUNT)
+            ],
+        )
+        conn.execute(text("ANALYZE"))
+    yield engine
+    engine.dispose()
+
+
+def _session_payload() -> CreateSessionRequest:
+    return CreateSessionRequest(
+        queue_track_ids=["t00001"],
+        current_track_id="t00001",
+        position_sec=0,
+        shuffle=False,
+        repeat_mode="off",
+    )
+
+
+SCENARIOS: list[tuple[str, Callable[[Session], object], bool]] = [
+    ("catalog_page", lambda db: catalog_repository.get_catalog_page(db, limit=50, offset=0, q=None), False),
+    ("catalog_search", lambda db: catalog_repository.get_catalog_page(db, limit=50, offset=0, q="song 12"), False),
+    (
+        "catalog_search_count_free",
+        lambda db: catalog_repository.get_catalog_page(db, limit=50, offset=0, q="artist", include_total=False),
+        False,
+    ),
+    (
+        "catalog_sorted_popularity",
+        lambda db: catalog_repository.get_catalog_page(db, limit=50, offset=0, q=None, sort="-popularity"),
+        False,
+    ),
+    (
+        "catalog_sorted_title_after_cursor",
+        lambda db: catalog_repository.get_catalog_page(
+            db,
+            limit=50,
+            offset=0,
+            q=None,
+            sort="title",
+            cursor=catalog_repository._encode_sort_key("title", "t00100", "Song 100"),
+        ),
+        False,
+    ),
+    (
+        "admin_list_sorted_by_status",
+        lambda db: catalog_repository.list_admin_tracks(db, q=None, status="published", sort="-uploaded_at"),
+        False,
+    ),
+    ("catalog_changes", lambda db: catalog_repository.get_catalog_changes(db, since=0, limit=50), False),
+    ("track_stream", lambda db: catalog_repository.get_track_stream_by_id(db, "t00001"), False),
+    ("admin_list_by_status", lambda db: catalog_repository.list_admin_tracks(db, q=None, status="draft"), False),
+    ("admin_list_search", lambda db: catalog_repository.list_admin_tracks(db, q="artist 7", status=None), False),
+    # The unfiltered admin listing returns every track by design; it may walk an index.
+    ("admin_list_all", lambda db: catalog_repository.list_admin_tracks(db, q=None, status=None), True),
+    ("admin_get", lambda db: catalog_repository.get_admin_track(db, "t00002"), False),
+    (
+        "admin_update",
+        lambda db: catalog_repository.update_admin_track(db, "t00003", AdminTrackUpdateRequest(title="Renamed")),
+        False,
+    ),
+    # Per-track stats aggregate every event by design; a covering index walk is the floor.
+    ("track_stats", listening_repository.get_track_stats, True),
+    ("user_stats", lambda db: listening_repository.get_user_stats(db, "u7"), False),
+    (
+        "record_event",
+        lambda db: listening_repository.record_listening_event(
+            db, user_id="u7", track_id="t00004", action="start", position_sec=0, ip_address=None
+        ),
+        False,
+    ),
+    ("session_create", lambda db: session_repository.create_playback_session(db, "s1", _session_payload()), False),
+    (
+        "session_update",
+        lambda db: session_repository.update_playback_session(db, "s1", UpdateSessionRequest(position_sec=5)),
+        False,
+    ),
+    ("session_get", lambda db: session_repository.get_playback_session(db, "s1"), False),
+]
+
+
+def _is_single_row_probe(statement: str, parameters: object) -> bool:
+    """`... LIMIT 1` existence checks stop at the first row, whatever the plan says."""
+    match = PROBE_LIMIT_RE.search(statement)
+    if match is None or not isinstance(parameters, tuple) or not parameters:
+        return False
+    limit = parameters[-2] if match.group(1) else parameters[-1]
+    return limit == 1
+
+
+def _captured_selects(engine, run: Callable[[Session], object]) -> list[tuple[str, object]]:
+    captured: list[tuple[str, object]] = []
+
+    def capture(_conn, _cursor, statement, parameters, _context, _executemany) -> None:
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with Session(engine) as db:
+            run(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return captured
+
+
+@pytest.mark.parametrize(("name", "run", "allow_index_scan"), SCENARIOS, ids=[s[0] for s in SCENARIOS])
+def test_repository_queries_avoid_full_scans(large_db, name, run, allow_index_scan) -> None:
+    tables = set(inspect(large_db).get_table_names())
+    selects = _captured_selects(large_db, run)
+    assert selects, f"{name} issued no SELECT statements"
+
+    problems: list[str] = []
+    with large_db.connect() as conn:
+        for statement, parameters in selects:
+            if _is_single_row_probe(statement, parameters):
+                continue
+            plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            # Full-text results are ordered by rank, which only a sort over the matches can do.
+            ranked = any("VIRTUAL TABLE" in detail for detail in plan)
+            for detail in plan:
+                match = SCAN_RE.match(detail)
+                # A full walk of a covering index is still a full scan; only the
+                # named whole-table scenarios may do it.
+                full_scan = (
+                    match is not None
+                    and match.group(1) in tables
+                    and "VIRTUAL TABLE" not in detail
+                    and not (allow_index_scan and "INDEX" in detail)
+                )
+                sorted_in_memory = "TEMP B-TREE FOR" in detail and "ORDER BY" in detail and not ranked
+                if full_scan or sorted_in_memory or "TEMP B-TREE FOR GROUP BY" in detail:
+                    problems.append(f"{detail}\n    in: {' '.join(statement.split())[:200]}")
+    assert not problems, f"{name} query plan regressions:\n" + "\n".join(problems)
@@ -1,11 +1,16 @@
+import asyncio
+import fcntl
+import json
 import pytest
+import threading
+import time
 from base64 import b64encode
 from datetime import datetime
 import os
 from pathlib import Path
 from uuid import UUID
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, func, select
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -16,9 +21,27 @@ if not os.environ.get("FERRIC_ADMIN_PASSWORD"):
 
 from backend.app.db import get_db
 from backend.app import admin_api
+from backend.app import catalog_export, catalog_repository, catalog_seed, media_api
 from backend.app.admin_auth import reset_admin_auth_throttle_state
+from backend.app.catalog_bus import CatalogBus, _parse_payload
+from backend.app.catalog_export import export_static_catalog
+from backend.app.catalog_fuzzy import FuzzyIndex, edit_distance
+from backend.app.catalog_mmap import MappedTracks, open_catalog_file, write_catalog_file
+from backend.app.catalog_repository import (
+    get_catalog_page,
+    get_catalog_page_etag,
+    get_catalog_snapshot,
+    get_catalog_version,
+    get_track_by_id,
+    render_catalog_page_json,
+)
 from backend.app.main import create_app
-from backend.app.models import Base
+from backend.app.media_signing import sign_media_path, verify_media_signature
+from backend.app.models import Base, CatalogChange, Track
+from backend.app.schemas import CatalogResponse, TrackMetadata
+from backend.app.segment_cache import CachedSegment, SegmentCache
+from backend.app.single_flight import SingleFlight
+from backend.app.stream_cache import StreamCache
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
 VALID_MP3_BYTES = b"ID3\x04\x00\x00\x00\x00\x00\x00FAKE"
@@ -27,10 +50,12 @@ VALID_MP3_BYTES = b"ID3\x04\x00\x00\x00\x00\x00\x00FAKE"
 @pytest.fixture()
 def client() -> TestClient:
     reset_admin_auth_throttle_state()
+    media_api._SEGMENT_CACHE.invalidate()
     if not os.environ.get("FERRIC_ADMIN_USER"):
         os.environ["FERRIC_ADMIN_USER"] = "admin"
     if not os.environ.get("FERRIC_ADMIN_PASSWORD"):
         os.environ["FERRIC_ADMIN_PASSWORD"] = "admin"
+    os.environ["FERRIC_STATIC_CATALOG_EXPORT"] = "0"
     app = create_app()
     engine = create_engine(
         "sqlite+pysqlite:///:memory:",
@@ -861,3 +886,1128 @@ def test_listen_event_missing_track_returns_404(client: TestClient) -> None:
     assert response.status_code == 404
     payload = response.json()
     assert payload["error"]["code"] == "TRACK_NOT_FOUND"
+
+
+def test_catalog_snapshot_serves_repeat_reads_without_queries() -> None:
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        first = get_catalog_page(db, limit=5, offset=0, q=None)
+        assert first["page"]["total"] >= 1
+        statements.clear()
+
+        second = get_catalog_page(db, limit=5, offset=5, q=None)
+        track = get_track_by_id(db, "track_001")
+        assert second["page"]["total"] == first["page"]["total"]
+        assert track is not None
+        assert statements == []
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_catalog_snapshot_invalidated_by_admin_writes(client: TestClient) -> None:
+    headers = _admin_headers()
+    before = client.get("/api/v1/catalog").json()["page"]["total"]
+    version = get_catalog_version()
+
+    client.post(
+        "/api/v1/admin/tracks",
+        headers=headers,
+        json={
+            "id": "track_cache_001",
+            "title": "Cache Song",
+            "artist": "Cache Artist",
+            "duration_sec": 100,
+            "status": "published",
+        },
+    )
+    assert get_catalog_version() > version
+    assert client.get("/api/v1/catalog").json()["page"]["total"] == before + 1
+
+    client.patch("/api/v1/admin/tracks/track_cache_001", headers=headers, json={"title": "Cache Song Renamed"})
+    assert client.get("/api/v1/tracks/track_cache_001").json()["title"] == "Cache Song Renamed"
+
+    client.patch("/api/v1/admin/tracks/track_cache_001", headers=headers, json={"status": "archived"})
+    assert client.get("/api/v1/tracks/track_cache_001").status_code == 404
+    assert client.get("/api/v1/catalog").json()["page"]["total"] == before
+
+
+def test_catalog_cursor_pagination_walks_all_tracks(client: TestClient) -> None:
+    first = client.get("/api/v1/catalog", params={"limit": 4}).json()
+    total = first["page"]["total"]
+    seen = [track["id"] for track in first["tracks"]]
+    cursor = first["page"]["next_cursor"]
+    while cursor:
+        page = client.get("/api/v1/catalog", params={"limit": 4, "cursor": cursor}).json()
+        seen.extend(track["id"] for track in page["tracks"])
+        cursor = page["page"]["next_cursor"]
+
+    assert len(seen) == total
+    assert seen == sorted(seen)
+
+    offset_page = client.get("/api/v1/catalog", params={"limit": 4, "offset": 4}).json()
+    assert [track["id"] for track in offset_page["tracks"]] == seen[4:8]
+
+    bad = client.get("/api/v1/catalog", params={"cursor": "%%%"})
+    assert bad.status_code == 400
+    assert bad.json()["error"]["code"] == "BAD_REQUEST"
+
+
+def test_read_endpoints_answer_conditional_requests(client: TestClient) -> None:
+    catalog = client.get("/api/v1/catalog", params={"limit": 3})
+    etag = catalog.headers["etag"]
+    assert "max-age" in catalog.headers["cache-control"]
+    not_modified = client.get("/api/v1/catalog", params={"limit": 3}, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    other_page = client.get("/api/v1/catalog", params={"limit": 3, "offset": 3}, headers={"If-None-Match": etag})
+    assert other_page.status_code == 200
+
+    track = client.get("/api/v1/tracks/track_001")
+    track_etag = track.headers["etag"]
+    assert client.get("/api/v1/tracks/track_001", headers={"If-None-Match": f"W/{track_etag}"}).status_code == 304
+
+    client.patch(
+        "/api/v1/admin/tracks/track_001",
+        headers=_admin_headers(),
+        json={"title": "Scars (Remaster)"},
+    )
+    assert client.get("/api/v1/catalog", params={"limit": 3}, headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/api/v1/tracks/track_001", headers={"If-None-Match": track_etag}).status_code == 200
+
+    created = client.post(
+        "/api/v1/sessions",
+        json={
+            "queue_track_ids": ["track_001"],
+            "current_track_id": "track_001",
+            "position_sec": 0,
+            "shuffle": False,
+            "repeat_mode": "off",
+        },
+    ).json()
+    session_url = f"/api/v1/sessions/{created['session_id']}"
+    session = client.get(session_url)
+    assert session.headers["cache-control"] == "private, no-cache"
+    assert client.get(session_url, headers={"If-None-Match": session.headers["etag"]}).status_code == 304
+    client.patch(session_url, json={"position_sec": 42})
+    assert client.get(session_url, headers={"If-None-Match": session.headers["etag"]}).status_code == 200
+
+
+def test_catalog_count_free_mode_reports_has_more(client: TestClient) -> None:
+    full = client.get("/api/v1/catalog", params={"limit": 500}).json()
+    total = full["page"]["total"]
+    assert full["page"]["has_more"] is False
+
+    first = client.get("/api/v1/catalog", params={"limit": total - 1, "include_total": "false"}).json()
+    assert first["page"]["has_more"] is True
+    assert first["page"]["total"] is None
+    assert first["page"]["total_is_estimate"] is False
+
+    last = client.get(
+        "/api/v1/catalog",
+        params={"limit": total - 1, "include_total": "false", "cursor": first["page"]["next_cursor"]},
+    ).json()
+    assert len(last["tracks"]) == 1
+    assert last["page"]["has_more"] is False
+    assert last["page"]["next_cursor"] is None
+
+
+def test_batch_track_lookup_preserves_order_and_reports_missing(client: TestClient) -> None:
+    response = client.get("/api/v1/tracks", params={"ids": "track_003,track_missing,track_001,track_003"})
+    assert response.status_code == 200
+    payload = response.json()
+    assert [track["id"] for track in payload["tracks"]] == ["track_003", "track_001"]
+    assert payload["missing_ids"] == ["track_missing"]
+
+    too_many = ",".join(f"t{index}" for index in range(501))
+    bad = client.get("/api/v1/tracks", params={"ids": too_many})
+    assert bad.status_code == 400
+    assert bad.json()["error"]["code"] == "BAD_REQUEST"
+
+
+def test_preencoded_catalog_responses_match_schema_serialization(client: TestClient) -> None:
+    response = client.get("/api/v1/catalog", params={"limit": 3})
+    assert response.headers["content-type"] == "application/json"
+    payload = response.json()
+    assert payload == CatalogResponse.model_validate(payload).model_dump()
+
+    track = client.get("/api/v1/tracks/track_001").json()
+    assert track == payload["tracks"][0]
+    assert track == TrackMetadata.model_validate(track).model_dump()
+
+    batch = client.get("/api/v1/tracks", params={"ids": "track_001,nope"}).json()
+    assert batch == {"tracks": [track], "missing_ids": ["nope"]}
+
+
+def test_catalog_render_helpers_stay_on_the_snapshot_they_are_given(client: TestClient) -> None:
+    db = next(client.app.dependency_overrides[get_db]())
+    try:
+        snapshot = get_catalog_snapshot(db)
+        etag = get_catalog_page_etag(db, limit=2, offset=0, q=None, snapshot=snapshot)
+        client.patch("/api/v1/admin/tracks/track_001", headers=_admin_headers(), json={"title": "Mid-request"})
+
+        body = json.loads(render_catalog_page_json(db, limit=2, offset=0, q=None, snapshot=snapshot))
+        assert body["tracks"][0]["title"] == "Scars"
+        assert get_catalog_page_etag(db, limit=2, offset=0, q=None, snapshot=snapshot) == etag
+        assert get_catalog_page_etag(db, limit=2, offset=0, q=None) != etag
+    finally:
+        db.close()
+
+
+def test_static_catalog_export_writes_immutable_shards(client: TestClient, tmp_path: Path) -> None:
+    db = next(client.app.dependency_overrides[get_db]())
+    try:
+        index = export_static_catalog(db, root=tmp_path, shard_size=4)
+        total = index["total"]
+        assert sum(shard["count"] for shard in index["shards"]) == total
+        assert index["buckets"] == catalog_export.shard_bucket_count(total, 4)
+        for entry in index["shards"]:
+            shard = json.loads((tmp_path / entry["path"]).read_text(encoding="utf-8"))
+            assert {catalog_export.shard_bucket(track["id"], index["buckets"]) for track in shard["tracks"]} == {
+                entry["bucket"]
+            }
+        assert export_static_catalog(db, root=tmp_path, shard_size=4)["generated_at"] == index["generated_at"]
+
+        edited_id = json.loads((tmp_path / index["shards"][0]["path"]).read_text(encoding="utf-8"))["tracks"][0]["id"]
+        client.patch(f"/api/v1/admin/tracks/{edited_id}", headers=_admin_headers(), json={"title": "Re-titled"})
+        updated = export_static_catalog(db, root=tmp_path, shard_size=4)
+        assert updated["catalog_etag"] != index["catalog_etag"]
+        before = {shard["bucket"]: shard["path"] for shard in index["shards"]}
+        after = {shard["bucket"]: shard["path"] for shard in updated["shards"]}
+        # Only the edited track's shard gets a new name; the rest stay cacheable.
+        assert [bucket for bucket in after if after[bucket] != before.get(bucket)] == [index["shards"][0]["bucket"]]
+        assert (tmp_path / index["shards"][0]["path"]).exists()
+    finally:
+        db.close()
+
+
+def test_static_catalog_export_renders_from_one_snapshot(
+    client: TestClient, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    real_snapshot = catalog_export.get_catalog_snapshot
+
+    def snapshot_then_archive(db):
+        snapshot = real_snapshot(db)
+        # A write commits after the export captured its snapshot but before it renders.
+        client.patch("/api/v1/admin/tracks/track_002", headers=_admin_headers(), json={"status": "archived"})
+        return snapshot
+
+    monkeypatch.setattr(catalog_export, "get_catalog_snapshot", snapshot_then_archive)
+    db = next(client.app.dependency_overrides[get_db]())
+    try:
+        index = export_static_catalog(db, root=tmp_path, shard_size=4)
+    finally:
+        db.close()
+    exported = [
+        track["id"]
+        for shard in index["shards"]
+        for track in json.loads((tmp_path / shard["path"]).read_text(encoding="utf-8"))["tracks"]
+    ]
+    assert "track_002" in exported
+    assert len(exported) == index["total"]
+
+
+def test_static_catalog_export_runs_off_the_request_path(
+    client: TestClient, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("FERRIC_STATIC_CATALOG_EXPORT", "1")
+    monkeypatch.setenv("FERRIC_STATIC_CATALOG_EXPORT_DELAY_SEC", "0.05")
+    monkeypatch.setenv("FERRIC_STATIC_CATALOG_DIR", str(tmp_path))
+
+    def broken_export(*_args, **_kwargs):
+        raise RuntimeError("disk on fire")
+
+    working_export = catalog_export.export_static_catalog
+    monkeypatch.setattr(catalog_export, "export_static_catalog", broken_export)
+    client.get("/api/v1/catalog")
+    response = client.patch("/api/v1/admin/tracks/track_001", headers=_admin_headers(), json={"title": "Still OK"})
+    assert response.status_code == 200
+    time.sleep(0.2)
+    monkeypatch.setattr(catalog_export, "export_static_catalog", working_export)
+
+    client.patch("/api/v1/admin/tracks/track_001", headers=_admin_headers(), json={"title": "First"})
+    client.patch("/api/v1/admin/tracks/track_002", headers=_admin_headers(), json={"title": "Second"})
+    assert not (tmp_path / "index.json").exists()
+    for _attempt in range(50):
+        if (tmp_path / "index.json").exists():
+            break
+        time.sleep(0.05)
+    index = json.loads((tmp_path / "index.json").read_text(encoding="utf-8"))
+    shard = json.loads((tmp_path / index["shards"][0]["path"]).read_text(encoding="utf-8"))
+    assert [track["title"] for track in shard["tracks"][:2]] == ["First", "Second"]
+
+
+def test_artist_index_lists_artists_and_their_tracks(client: TestClient) -> None:
+    headers = _admin_headers()
+    for index in range(3):
+        client.post(
+            "/api/v1/admin/tracks",
+            headers=headers,
+            json={
+                "id": f"track_facet_{index}",
+                "title": f"Facet Song {index}",
+                "artist": "The Facets" if index < 2 else "the  facets!",
+                "duration_sec": 90,
+                "status": "published",
+            },
+        )
+
+    artists: list[dict] = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/v1/artists", params=params).json()
+        artists.extend(page["artists"])
+        cursor = page["page"]["next_cursor"]
+        if cursor is None:
+            break
+    ids = [artist["id"] for artist in artists]
+    assert ids == sorted(ids)
+    facets = next(artist for artist in artists if artist["id"] == "the-facets")
+    assert facets["name"] == "The Facets"
+    assert facets["track_count"] == 3
+
+    first = client.get("/api/v1/artists/the-facets/tracks", params={"limit": 2}).json()
+    assert first["artist"]["id"] == "the-facets"
+    assert [track["id"] for track in first["tracks"]] == ["track_facet_0", "track_facet_1"]
+    rest = client.get(
+        "/api/v1/artists/the-facets/tracks", params={"limit": 2, "cursor": first["page"]["next_cursor"]}
+    ).json()
+    assert [track["id"] for track in rest["tracks"]] == ["track_facet_2"]
+
+    missing = client.get("/api/v1/artists/nobody/tracks")
+    assert missing.status_code == 404
+    assert missing.json()["error"]["code"] == "ARTIST_NOT_FOUND"
+
+
+def test_catalog_change_feed_reports_upserts_and_removals(client: TestClient) -> None:
+    full = client.get("/api/v1/catalog/changes", params={"limit": 1000}).json()
+    published = client.get("/api/v1/catalog", params={"limit": 500}).json()["page"]["total"]
+    assert len(full["upserted"]) == published
+    assert full["has_more"] is False
+    token = full["next_token"]
+
+    idle = client.get("/api/v1/catalog/changes", params={"since": token}).json()
+    assert idle == {"upserted": [], "removed": [], "next_token": token, "has_more": False}
+
+    headers = _admin_headers()
+    client.patch("/api/v1/admin/tracks/track_001", headers=headers, json={"title": "Scars II"})
+    client.patch("/api/v1/admin/tracks/track_002", headers=headers, json={"status": "archived"})
+    delta = client.get("/api/v1/catalog/changes", params={"since": token, "limit": 1}).json()
+    assert [track["title"] for track in delta["upserted"]] == ["Scars II"]
+    assert delta["has_more"] is True
+    rest = client.get("/api/v1/catalog/changes", params={"since": delta["next_token"]}).json()
+    assert rest["removed"] == ["track_002"]
+    assert int(rest["next_token"]) > int(delta["next_token"])
+
+    assert client.get("/api/v1/catalog/changes", params={"since": "abc"}).status_code == 400
+    expired = client.get("/api/v1/catalog/changes", params={"since": "999999"})
+    assert expired.status_code == 410
+    assert expired.json()["error"]["code"] == "CHANGE_TOKEN_EXPIRED"
+
+
+def test_catalog_change_feed_never_outruns_the_snapshot(client: TestClient) -> None:
+    token = client.get("/api/v1/catalog/changes", params={"limit": 1000}).json()["next_token"]
+    db = next(client.app.dependency_overrides[get_db]())
+    try:
+        # A write that has committed but not yet bumped the catalog version.
+        track = db.get(Track, "track_001")
+        track.title = "NEW TITLE"
+        catalog_repository._log_catalog_changes(db, ["track_001"])
+        db.commit()
+
+        pending = catalog_repository.get_catalog_changes(db, since=int(token), limit=50)
+        assert pending == {"upserted": [], "removed": [], "next_token": token, "has_more": False}
+
+        catalog_repository._bump_catalog_version(db)
+        landed = catalog_repository.get_catalog_changes(db, since=int(token), limit=50)
+        assert [item["title"] for item in landed["upserted"]] == ["NEW TITLE"]
+    finally:
+        db.close()
+
+
+def test_catalog_change_log_skips_unchanged_reseeds_and_compacts(client: TestClient) -> None:
+    client.get("/api/v1/catalog")
+    db = next(client.app.dependency_overrides[get_db]())
+    try:
+        rows_before = db.scalar(select(func.count()).select_from(CatalogChange))
+        version = get_catalog_version()
+        catalog_repository.seed_catalog_from_file(db)
+        assert db.scalar(select(func.count()).select_from(CatalogChange)) == rows_before
+        assert get_catalog_version() == version + 1
+
+        headers = _admin_headers()
+        for title in ("One", "Two", "Three"):
+            client.patch("/api/v1/admin/tracks/track_001", headers=headers, json={"title": title})
+        ids = db.scalars(select(CatalogChange.id).where(CatalogChange.track_id == "track_001")).all()
+        assert len(ids) == 1
+        assert db.scalar(select(func.count()).select_from(CatalogChange)) == rows_before
+
+        # Re-changing the newest track must still move past the token a reader holds.
+        token = client.get("/api/v1/catalog/changes", params={"since": "0", "limit": 1000}).json()["next_token"]
+        client.patch("/api/v1/admin/tracks/track_001", headers=headers, json={"title": "Four"})
+        delta = client.get("/api/v1/catalog/changes", params={"since": token}).json()
+        assert [track["title"] for track in delta["upserted"]] == ["Four"]
+    finally:
+        db.close()
+
+
+def test_search_suggest_completes_titles_and_artists_and_follows_writes(client: TestClient) -> None:
+    body = client.get("/api/v1/search/suggest", params={"prefix": "the ho"}).json()
+    assert body["suggestions"] == [
+        {"text": "The Hollow Keys", "kind": "artist", "artist_id": "the-hollow-keys", "track_id": None}
+    ]
+    keys = client.get("/api/v1/search/suggest", params={"prefix": "KEY"}).json()["suggestions"]
+    assert [item["text"] for item in keys] == ["The Hollow Keys"]
+    paper = client.get("/api/v1/search/suggest", params={"prefix": "pa"}).json()["suggestions"]
+    assert [(item["text"], item["track_id"]) for item in paper] == [
+        ("Paper Satellites", "track_007"),
+        ("Parallel Hearts", "track_006"),
+    ]
+    assert len(client.get("/api/v1/search/suggest", params={"prefix": "a", "limit": 1}).json()["suggestions"]) == 1
+
+    headers = _admin_headers()
+    client.patch("/api/v1/admin/tracks/track_007", headers=headers, json={"title": "Origami Moons"})
+    client.patch("/api/v1/admin/tracks/track_006", headers=headers, json={"status": "archived"})
+    assert client.get("/api/v1/search/suggest", params={"prefix": "pa"}).json()["suggestions"] == []
+    moons = client.get("/api/v1/search/suggest", params={"prefix": "moo"}).json()["suggestions"]
+    assert [item["track_id"] for item in moons] == ["track_007"]
+    assert client.get("/api/v1/search/suggest", params={"prefix": "ari"}).json()["suggestions"] == []
+
+    assert client.get("/api/v1/search/suggest", params={"prefix": ""}).status_code == 400
+
+
+def test_fuzzy_catalog_search_tolerates_typos(client: TestClient) -> None:
+    assert client.get("/api/v1/catalog", params={"q": "nortline"}).json()["tracks"] == []
+
+    fuzzy = client.get("/api/v1/catalog", params={"q": "nortline", "mode": "fuzzy"})
+    assert fuzzy.status_code == 200
+    assert fuzzy.headers["etag"]
+    assert [track["id"] for track in fuzzy.json()["tracks"]][:1] == ["track_002"]
+    revalidated = client.get(
+        "/api/v1/catalog",
+        params={"q": "nortline", "mode": "fuzzy"},
+        headers={"If-None-Match": fuzzy.headers["etag"]},
+    )
+    assert revalidated.status_code == 304
+
+    typo = client.get("/api/v1/catalog", params={"q": "paper satelites", "mode": "fuzzy", "limit": 1}).json()
+    assert typo["tracks"][0]["id"] == "track_007"
+
+    client.patch("/api/v1/admin/tracks/track_002", headers=_admin_headers(), json={"status": "archived"})
+    after = client.get("/api/v1/catalog", params={"q": "nortline", "mode": "fuzzy"}).json()
+    assert "track_002" not in [track["id"] for track in after["tracks"]]
+
+    assert client.get("/api/v1/catalog", params={"q": "x", "mode": "loose"}).status_code == 400
+
+
+def test_fuzzy_index_ranks_by_edit_distance() -> None:
+    tracks = (
+        {"id": "a", "title": "Creep", "artist": "Radiohead"},
+        {"id": "b", "title": "Radio Heads", "artist": "Someone"},
+        {"id": "c", "title": "Unrelated", "artist": "Band"},
+    )
+    index = FuzzyIndex(tracks)
+    assert [track["id"] for track in index.search("radohead")][:2] == ["a", "b"]
+    assert index.search("zzzz") == []
+    assert edit_distance("radohead", "radiohead", 3) == 1
+    assert edit_distance("abc", "xyzxyz", 2) == 3
+
+
+def test_catalog_and_admin_listings_sort_by_indexed_columns(client: TestClient) -> None:
+    published = client.get("/api/v1/catalog", params={"limit": 500}).json()["tracks"]
+    by_title = sorted(published, key=lambda track: (track["title"], track["id"]))
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        params = {"sort": "title", "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/api/v1/catalog", params=params).json()
+        seen.extend(track["id"] for track in page["tracks"])
+        cursor = page["page"]["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [track["id"] for track in by_title]
+
+    longest = client.get("/api/v1/catalog", params={"sort": "-duration_sec", "limit": 1}).json()["tracks"][0]
+    assert longest["duration_sec"] == max(track["duration_sec"] for track in published)
+
+    for user in ("u1", "u2"):
+        client.post(
+            "/api/v1/events/listen",
+            json={"user_id": user, "track_id": "track_004", "action": "start", "position_sec": 0},
+        )
+    popular = client.get("/api/v1/catalog", params={"sort": "-popularity", "limit": 1})
+    assert popular.json()["tracks"][0]["id"] == "track_004"
+    client.post(
+        "/api/v1/events/listen",
+        json={"user_id": "u3", "track_id": "track_005", "action": "start", "position_sec": 0},
+    )
+    for user in ("u4", "u5"):
+        client.post(
+            "/api/v1/events/listen",
+            json={"user_id": user, "track_id": "track_005", "action": "start", "position_sec": 0},
+        )
+    # Play counts move without a catalog change, so the ETag must follow the body.
+    repeat = client.get(
+        "/api/v1/catalog",
+        params={"sort": "-popularity", "limit": 1},
+        headers={"If-None-Match": popular.headers["etag"]},
+    )
+    assert repeat.status_code == 200
+    assert repeat.json()["tracks"][0]["id"] == "track_005"
+
+    headers = _admin_headers()
+    client.post(
+        "/api/v1/admin/tracks",
+        headers=headers,
+        json={"id": "track_newest", "title": "Fresh", "artist": "New Act", "duration_sec": 100, "status": "published"},
+    )
+    newest = client.get("/api/v1/catalog", params={"sort": "-uploaded_at", "limit": 1}).json()["tracks"][0]
+    assert newest["id"] == "track_newest"
+
+    admin = client.get("/api/v1/admin/tracks", headers=headers, params={"sort": "-duration_sec"}).json()["tracks"]
+    durations = [track["duration_sec"] for track in admin]
+    assert durations == sorted(durations, reverse=True)
+
+    assert client.get("/api/v1/catalog", params={"sort": "artist"}).status_code == 400
+    assert client.get("/api/v1/catalog", params={"sort": "title", "q": "neon"}).status_code == 400
+    assert client.get("/api/v1/admin/tracks", headers=headers, params={"sort": "nope"}).status_code == 400
+
+
+def test_sparse_fieldsets_trim_catalog_batch_and_admin_payloads(client: TestClient) -> None:
+    full = client.get("/api/v1/catalog", params={"limit": 3})
+    compact = client.get("/api/v1/catalog", params={"limit": 3, "fields": "title,artist"})
+    assert compact.status_code == 200
+    payload = compact.json()
+    assert set(payload) == {"tracks", "page"}
+    assert payload["tracks"] == [
+        {"id": track["id"], "title": track["title"], "artist": track["artist"]} for track in full.json()["tracks"]
+    ]
+    assert payload["page"] == full.json()["page"]
+    assert compact.headers["etag"] != full.headers["etag"]
+
+    batch = client.get("/api/v1/tracks", params={"ids": "track_001,nope", "fields": "id,duration_sec"}).json()
+    assert batch["tracks"] == [{"id": "track_001", "duration_sec": full.json()["tracks"][0]["duration_sec"]}]
+    assert batch["missing_ids"] == ["nope"]
+
+    headers = _admin_headers()
+    admin = client.get("/api/v1/admin/tracks", headers=headers, params={"fields": "title,status"})
+    assert admin.status_code == 200
+    assert all(set(track) == {"id", "title", "status"} for track in admin.json()["tracks"])
+    assert "stream" in client.get("/api/v1/admin/tracks", headers=headers).json()["tracks"][0]
+
+    assert client.get("/api/v1/catalog", params={"fields": "id,secret"}).status_code == 400
+    assert client.get("/api/v1/tracks", params={"ids": "track_001", "fields": "status"}).status_code == 400
+    assert client.get("/api/v1/admin/tracks", headers=headers, params={"fields": "nope"}).status_code == 400
+
+
+def test_catalog_snapshot_is_shared_through_a_mapped_file(
+    client: TestClient, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    in_memory = client.get("/api/v1/catalog", params={"limit": 500}).json()
+    path = tmp_path / "catalog.bin"
+    monkeypatch.setenv("FERRIC_CATALOG_MMAP_PATH", str(path))
+    db = next(client.app.dependency_overrides[get_db]())
+    try:
+        snapshot = catalog_repository._build_catalog_snapshot(db)
+        assert isinstance(snapshot.tracks, MappedTracks)
+        assert open_catalog_file(path).change_id == snapshot.change_id
+
+        # A second worker maps the published file instead of loading rows.
+        def no_row_load(*_args, **_kwargs):
+            raise AssertionError("rows were loaded despite a current snapshot file")
+
+        public_track = catalog_repository._public_track
+        monkeypatch.setattr(catalog_repository, "_public_track", no_row_load)
+        shared = catalog_repository._build_catalog_snapshot(db)
+        assert list(shared.tracks) == in_memory["tracks"]
+        assert shared.etag == snapshot.etag
+        monkeypatch.setattr(catalog_repository, "_public_track", public_track)
+
+        client.patch("/api/v1/admin/tracks/track_001", headers=_admin_headers(), json={"title": "Remapped"})
+        assert client.get("/api/v1/tracks/track_001").json()["title"] == "Remapped"
+        assert open_catalog_file(path).change_id > snapshot.change_id
+        assert client.get("/api/v1/catalog", params={"limit": 500}).json()["page"] == in_memory["page"]
+    finally:
+        db.close()
+
+
+def test_mapped_catalog_file_lookups(tmp_path: Path) -> None:
+    tracks = tuple(
+        {"id": f"t{index}", "title": f"Song {index}", "artist": "Ärtist", "duration_sec": index, "artwork": {}}
+        for index in range(20)
+    )
+    tracks[3]["artwork"] = {"square_512": "/images/t3.jpg"}
+    etags = {track["id"]: f'"{index:032d}"' for index, track in enumerate(tracks)}
+    mapped = write_catalog_file(tmp_path / "c.bin", tracks, etags, "e" * 32, change_id=7, source="s" * 32)
+    assert mapped.by_id["t3"] == tracks[3]
+    assert mapped.track_etags["t19"] == etags["t19"]
+    assert "t20" not in mapped.by_id
+    assert mapped.tracks[-1] == tracks[-1]
+    assert mapped.tracks[2:4] == list(tracks[2:4])
+    assert list(mapped.by_id) == [track["id"] for track in tracks]
+
+    # An older snapshot never replaces a newer one.
+    write_catalog_file(tmp_path / "c.bin", tracks[:1], etags, "f" * 32, change_id=6, source="o" * 32)
+    assert open_catalog_file(tmp_path / "c.bin").change_id == 7
+    assert open_catalog_file(tmp_path / "missing.bin") is None
+
+
+def test_catalog_file_swap_waits_for_the_publish_lock(tmp_path: Path) -> None:
+    track = {"id": "t0", "title": "Song", "artist": "A", "duration_sec": 1, "artwork": {}}
+    etags = {"t0": '"' + "0" * 32 + '"'}
+    path = tmp_path / "c.bin"
+    write_catalog_file(path, (track,), etags, "e" * 32, change_id=1, source="s" * 32)
+
+    with (tmp_path / ".c.bin.lock").open("a") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        writer = threading.Thread(
+            target=write_catalog_file, args=(path, (track,), etags, "f" * 32, 2, "s" * 32)
+        )
+        writer.start()
+        writer.join(timeout=0.3)
+        # Still waiting for the lock: the old file has not been replaced.
+        assert writer.is_alive()
+        probe = open_catalog_file(path)
+        assert probe.change_id == 1
+        probe.close()
+        assert probe._mapping.closed
+    writer.join(timeout=5)
+    assert open_catalog_file(path).change_id == 2
+
+
+def test_single_flight_shares_one_load_between_sync_and_async_callers() -> None:
+    group = SingleFlight()
+    calls = 0
+    release = threading.Event()
+
+    def load() -> dict[str, int]:
+        nonlocal calls
+        calls += 1
+        release.wait(timeout=5)
+        return {"value": 42}
+
+    results: list[dict[str, int]] = []
+    threads = [threading.Thread(target=lambda: results.append(group.do("key", load))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+
+    async def await_many() -> list[dict[str, int]]:
+        waiters = [asyncio.ensure_future(group.do_async("key", load)) for _ in range(4)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*waiters)
+
+    while not group.in_flight():
+        time.sleep(0.001)
+    async_results = asyncio.run(await_many())
+    for thread in threads:
+        thread.join()
+    assert calls == 1
+    assert all(result is results[0] for result in results + async_results)
+    assert group.in_flight() == 0
+
+    def fail() -> None:
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        group.do("key", fail)
+    # A nested load for the same key from the loading thread runs instead of deadlocking.
+    assert group.do("outer", lambda: group.do("outer", lambda: "inner")) == "inner"
+
+
+def test_concurrent_snapshot_misses_build_once(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    client.get("/api/v1/catalog")
+    builds = 0
+    build = catalog_repository._build_catalog_snapshot
+
+    def slow_build(db):
+        nonlocal builds
+        builds += 1
+        time.sleep(0.3)
+        return build(db)
+
+    monkeypatch.setattr(catalog_repository, "_build_catalog_snapshot", slow_build)
+    client.patch("/api/v1/admin/tracks/track_001", headers=_admin_headers(), json={"title": "Herd"})
+    builds = 0
+    responses: list[int] = []
+    threads = [
+        threading.Thread(target=lambda: responses.append(client.get("/api/v1/tracks/track_001").status_code))
+        for _ in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert responses == [200] * 6
+    assert builds == 1
+
+
+def test_reads_after_a_write_do_not_join_loads_started_before_it(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    client.get("/api/v1/catalog")
+    build = catalog_repository._build_catalog_snapshot
+    load = catalog_repository._load_track_stream
+    release = threading.Event()
+    started = threading.Barrier(3)
+
+    def stalled_build(db):
+        snapshot = build(db)
+        started.wait()
+        release.wait(5)
+        return snapshot
+
+    def stalled_load(db, track_id):
+        stream = load(db, track_id)
+        started.wait()
+        release.wait(5)
+        return stream
+
+    monkeypatch.setattr(catalog_repository, "_build_catalog_snapshot", stalled_build)
+    monkeypatch.setattr(catalog_repository, "_load_track_stream", stalled_load)
+    catalog_repository._bump_catalog_version(next(client.app.dependency_overrides[get_db]()), ["track_002"])
+    early: list[int] = []
+    readers = [
+        threading.Thread(target=lambda: early.append(client.get("/api/v1/tracks/track_001").status_code)),
+        threading.Thread(
+            target=lambda: early.append(
+                client.post(
+                    "/api/v1/playback/resolve",
+                    json={"track_id": "track_002", "client": {"platform": "web", "app_version": "0.1.0"}},
+                ).status_code
+            )
+        ),
+    ]
+    for reader in readers:
+        reader.start()
+    started.wait(5)
+
+    # Both loads read the pre-write rows and are now parked; the write commits.
+    client.patch("/api/v1/admin/tracks/track_001", headers=_admin_headers(), json={"title": "After"})
+    client.patch("/api/v1/admin/tracks/track_002", headers=_admin_headers(), json={"status": "archived"})
+    monkeypatch.setattr(catalog_repository, "_build_catalog_snapshot", build)
+    monkeypatch.setattr(catalog_repository, "_load_track_stream", load)
+    try:
+        assert client.get("/api/v1/tracks/track_001").json()["title"] == "After"
+        assert client.post(
+            "/api/v1/playback/resolve",
+            json={"track_id": "track_002", "client": {"platform": "web", "app_version": "0.1.0"}},
+        ).status_code == 404
+    finally:
+        release.set()
+        for reader in readers:
+            reader.join()
+    # The early readers got the state from before the write, as they would have anyway.
+    assert early == [200, 200]
+
+
+def test_catalog_bus_invalidates_writes_made_by_another_worker(client: TestClient) -> None:
+    assert client.get("/api/v1/tracks/track_001").json()["title"] != "Elsewhere"
+    db = next(client.app.dependency_overrides[get_db]())
+    seen: list[frozenset[str] | None] = []
+    catalog_repository.add_catalog_invalidation_listener(seen.append)
+    try:
+        bus = CatalogBus(db.get_bind(), catalog_repository.invalidate_catalog, interval=0.01).start()
+        # Another worker's write: committed rows, but no local version bump.
+        db.get(Track, "track_001").title = "Elsewhere"
+        catalog_repository._log_catalog_changes(db, ["track_001"])
+        db.commit()
+        assert client.get("/api/v1/tracks/track_001").json()["title"] != "Elsewhere"
+
+        for _attempt in range(100):
+            if seen:
+                break
+            time.sleep(0.01)
+        bus.stop()
+        assert seen == [frozenset({"track_001"})]
+        assert client.get("/api/v1/tracks/track_001").json()["title"] == "Elsewhere"
+
+        # A snapshot that already reflects the change is kept.
+        snapshot = get_catalog_snapshot(db)
+        catalog_repository.invalidate_catalog(snapshot.change_id, frozenset({"track_001"}))
+        assert get_catalog_snapshot(db) is snapshot
+    finally:
+        catalog_repository._CATALOG_INVALIDATION_LISTENERS.remove(seen.append)
+        db.close()
+
+    assert _parse_payload("12|a,b") == (12, frozenset({"a", "b"}))
+    assert _parse_payload("13|*") == (13, None)
+
+
+def test_manifest_reader_streams_json_and_ndjson(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    expected = catalog_seed.load_catalog()["tracks"]
+    # Tiny reads put chunk boundaries inside strings, numbers and escapes.
+    monkeypatch.setattr(catalog_seed, "READ_CHUNK_CHARS", 7)
+    assert list(catalog_seed.iter_catalog_tracks()) == expected
+
+    reordered = tmp_path / "catalog.json"
+    reordered.write_text(
+        json.dumps({"tracks": expected[:2], "app": {"title": "Ferric \u00e9"}, "schema_version": "1.0"}, indent=2),
+        encoding="utf-8",
+    )
+    assert list(catalog_seed.iter_catalog_tracks(reordered)) == expected[:2]
+
+    ndjson = tmp_path / "catalog.ndjson"
+    ndjson.write_text("\n".join(json.dumps(track) for track in expected) + "\n\n", encoding="utf-8")
+    assert list(catalog_seed.iter_catalog_tracks(ndjson)) == expected
+
+    broken = tmp_path / "broken.json"
+    broken.write_text('{"tracks": [{"id": "a"', encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(catalog_seed.iter_catalog_tracks(broken))
+
+
+def test_seeding_commits_in_chunks_and_reports_progress(client: TestClient, tmp_path: Path) -> None:
+    client.get("/api/v1/catalog")
+    tracks = [
+        {"id": f"bulk_{index:03d}", "title": f"Bulk {index}", "artist": "Loader", "duration_sec": 60 + index}
+        for index in range(5)
+    ]
+    manifest = tmp_path / "bulk.ndjson"
+    manifest.write_text("".join(json.dumps(track) + "\n" for track in tracks), encoding="utf-8")
+    db = next(client.app.dependency_overrides[get_db]())
+    try:
+        reported: list[int] = []
+        assert catalog_repository.seed_catalog_from_file(db, manifest, chunk_size=2, progress=reported.append) == 5
+        assert reported == [2, 4, 5]
+    finally:
+        db.close()
+    found = client.get("/api/v1/tracks", params={"ids": "bulk_000,bulk_004"}).json()
+    assert [track["duration_sec"] for track in found["tracks"]] == [60, 64]
+
+
+def test_bulk_seed_upserts_only_changed_rows_and_keeps_editorial_state(client: TestClient, tmp_path: Path) -> None:
+    client.get("/api/v1/catalog")
+    headers = _admin_headers()
+    client.patch("/api/v1/admin/tracks/track_002", headers=headers, json={"status": "archived"})
+    manifest_tracks = catalog_seed.load_catalog()["tracks"]
+    manifest_tracks[0] = {**manifest_tracks[0], "title": "Retitled"}
+    manifest_tracks[1] = {**manifest_tracks[1], "artwork": {"square_512": "/images/new-art.jpg"}}
+    manifest_tracks.append({**manifest_tracks[2], "id": "track_bulk_new", "title": "Brand New"})
+    manifest = tmp_path / "catalog.json"
+    manifest.write_text(json.dumps({"tracks": manifest_tracks + [manifest_tracks[0]]}), encoding="utf-8")
+
+    token = client.get("/api/v1/catalog/changes", params={"since": "0", "limit": 1000}).json()["next_token"]
+    db = next(client.app.dependency_overrides[get_db]())
+    try:
+        catalog_repository.seed_catalog_from_file(db, manifest, chunk_size=3)
+    finally:
+        db.close()
+    delta = client.get("/api/v1/catalog/changes", params={"since": token}).json()
+    changed = {track["id"] for track in delta["upserted"]} | set(delta["removed"])
+    assert changed == {manifest_tracks[0]["id"], manifest_tracks[1]["id"], "track_bulk_new"}
+
+    admin = {track["id"]: track for track in client.get("/api/v1/admin/tracks", headers=headers).json()["tracks"]}
+    assert admin[manifest_tracks[0]["id"]]["title"] == "Retitled"
+    assert admin[manifest_tracks[1]["id"]]["artwork"] == {"square_512": "/images/new-art.jpg"}
+    assert admin["track_002"]["status"] == "archived"
+    assert admin["track_bulk_new"]["status"] == "published"
+    assert admin["track_bulk_new"]["stream"] == admin[manifest_tracks[2]["id"]]["stream"]
+
+
+def test_playback_resolve_is_served_from_the_stream_cache(client: TestClient) -> None:
+    def resolve(track_id: str) -> int:
+        return client.post(
+            "/api/v1/playback/resolve",
+            json={"track_id": track_id, "client": {"platform": "web", "app_version": "0.1.0"}},
+        ).status_code
+
+    client.get("/api/v1/catalog")
+    assert resolve("track_001") == 200
+    assert resolve("track_scraped") == 404
+    engine = next(client.app.dependency_overrides[get_db]()).get_bind()
+    statements: list[str] = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert resolve("track_001") == 200
+        assert resolve("track_scraped") == 404
+        assert statements == []
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    headers = _admin_headers()
+    client.patch("/api/v1/admin/tracks/track_001", headers=headers, json={"status": "archived"})
+    assert resolve("track_001") == 404
+    db = next(client.app.dependency_overrides[get_db]())
+    try:
+        # Publishing over the API needs media files on disk; the repository call is enough here.
+        catalog_repository.publish_track(db, "track_001")
+    finally:
+        db.close()
+    assert resolve("track_001") == 200
+
+
+def test_stream_cache_bounds_entries_and_skips_stale_loads() -> None:
+    bind = object()
+    cache = StreamCache(size=2, negative_size=1)
+    for track_id in ("a", "b", "c"):
+        cache.put(bind, track_id, {"url": track_id}, cache.generation)
+    cache.put(bind, "x", None, cache.generation)
+    cache.put(bind, "y", None, cache.generation)
+    assert cache.get(bind, "a") == (False, None)
+    assert cache.get(bind, "c") == (True, {"url": "c"})
+    assert cache.get(bind, "x") == (False, None)
+    assert cache.get(bind, "y") == (True, None)
+    assert cache.get(object(), "c") == (False, None)
+
+    generation = cache.generation
+    cache.invalidate(["c"])
+    cache.put(bind, "c", {"url": "stale"}, generation)
+    assert cache.get(bind, "c") == (False, None)
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_signed_media_urls_cover_one_track_until_they_expire() -> None:
+    key = b"test-key"
+    signed = sign_media_path("/generated/hls/track_001/playlist.m3u8", 2_000, key)
+    _, _, _, expires, signature, rest = signed.split("/", 5)
+    assert verify_media_signature("/" + rest, expires, signature, key, now=1_000)
+    # Segments listed relative to the playlist share its token.
+    assert verify_media_signature("/generated/hls/track_001/segment_007.ts", expires, signature, key, now=1_000)
+    assert not verify_media_signature("/generated/hls/track_002/playlist.m3u8", expires, signature, key, now=1_000)
+    assert not verify_media_signature("/" + rest, expires, signature, key, now=2_001)
+    assert not verify_media_signature("/" + rest, "2001", signature, key, now=1_000)
+    assert not verify_media_signature("/" + rest, expires, signature, b"other-key", now=1_000)
+    assert not verify_media_signature(
+        "/generated/hls/track_001/../track_002/playlist.m3u8", expires, signature, key, now=1_000
+    )
+
+
+def test_resolve_returns_signed_urls_that_the_media_route_enforces(
+    client: TestClient, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    hls_root = tmp_path / "hls"
+    (hls_root / "track_001").mkdir(parents=True)
+    (hls_root / "track_001" / "playlist.m3u8").write_text("#EXTM3U\nsegment_000.ts\n", encoding="utf-8")
+    (hls_root / "track_001" / "segment_000.ts").write_bytes(b"segment")
+    monkeypatch.setitem(media_api.MEDIA_ROOTS, "/generated/hls/", hls_root)
+    monkeypatch.setenv("FERRIC_MEDIA_SIGNING_KEY", "secret")
+
+    stream = client.post(
+        "/api/v1/playback/resolve",
+        json={"track_id": "track_001", "client": {"platform": "web", "app_version": "0.1.0"}},
+    ).json()["stream"]
+    assert stream["requires_auth"] is True
+    assert stream["url"].startswith("/media/s/")
+    assert stream["url"].endswith("/generated/hls/track_001/playlist.m3u8")
+    assert "/media/s/" in stream["fallback_url"]
+
+    playlist = client.get(stream["url"])
+    assert playlist.status_code == 200
+    assert playlist.headers["content-type"] == "application/vnd.apple.mpegurl"
+    segment_url = stream["url"].rsplit("/", 1)[0] + "/segment_000.ts"
+    assert client.get(segment_url).content == b"segment"
+
+    assert client.get(stream["url"].replace("/media/s/", "/media/s/9", 1)).status_code == 403
+    assert client.get(segment_url.replace("track_001", "track_002")).status_code == 403
+    missing = stream["url"].rsplit("/", 1)[0] + "/segment_999.ts"
+    assert client.get(missing).status_code == 404
+
+
+def test_batch_resolve_loads_uncached_streams_in_one_query(client: TestClient) -> None:
+    client.get("/api/v1/catalog")
+    engine = next(client.app.dependency_overrides[get_db]()).get_bind()
+    statements: list[str] = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    body = {
+        "track_ids": ["track_002", "track_001", "track_unknown", "track_002"],
+        "client": {"platform": "web", "app_version": "0.1.0"},
+    }
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.post("/api/v1/playback/resolve:batch", json=body)
+        assert len([sql for sql in statements if "track_streams" in sql]) == 1
+        statements.clear()
+        assert client.post("/api/v1/playback/resolve:batch", json=body).json() == response.json()
+        assert statements == []
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert [item["track_id"] for item in payload["streams"]] == ["track_002", "track_001"]
+    assert payload["streams"][1]["stream"]["url"] == "/generated/hls/track_001/playlist.m3u8"
+    assert payload["streams"][1]["stream"]["expires_at"].endswith("Z")
+    assert payload["missing_ids"] == ["track_unknown"]
+
+    empty = client.post("/api/v1/playback/resolve:batch", json={**body, "track_ids": []})
+    assert empty.status_code == 400
+    too_many = client.post("/api/v1/playback/resolve:batch", json={**body, "track_ids": ["t"] * 501})
+    assert too_many.status_code == 400
+
+
+def test_media_route_serves_ranges_and_conditional_requests(
+    client: TestClient, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    audio = bytes(range(256)) * 4
+    (tmp_path / "managed").mkdir()
+    (tmp_path / "managed" / "source.mp3").write_bytes(audio)
+    monkeypatch.setitem(media_api.MEDIA_ROOTS, "/assets/raw-audio/", tmp_path)
+    url = "/assets/raw-audio/managed/source.mp3"
+
+    full = client.get(url)
+    assert full.status_code == 200
+    assert full.content == audio
+    assert full.headers["content-type"] == "audio/mpeg"
+    assert full.headers["accept-ranges"] == "bytes"
+    assert full.headers["cache-control"] == media_api.REVALIDATE_CACHE_CONTROL
+
+    partial = client.get(url, headers={"Range": "bytes=100-199"})
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == f"bytes 100-199/{len(audio)}"
+    assert partial.content == audio[100:200]
+    assert client.get(url, headers={"Range": "bytes=-10"}).content == audio[-10:]
+    assert client.get(url, headers={"Range": f"bytes={len(audio)}-"}).status_code == 416
+
+    etag = full.headers["etag"]
+    not_modified = client.get(url, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    assert client.get(url, headers={"If-Modified-Since": full.headers["last-modified"]}).status_code == 304
+    assert client.get(url, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+    head = client.head(url)
+    assert head.status_code == 200
+    assert head.headers["content-length"] == str(len(audio))
+    assert client.get("/assets/raw-audio/managed/missing.mp3").status_code == 404
+    assert client.get("/assets/raw-audio/managed").status_code == 404
+
+
+def test_signed_segments_are_immutable_and_unsigned_paths_are_closed(
+    client: TestClient, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "track_001").mkdir()
+    (tmp_path / "track_001" / "playlist.m3u8").write_text("#EXTM3U\nseg_000.ts\n", encoding="utf-8")
+    (tmp_path / "track_001" / "seg_000.ts").write_bytes(b"segment")
+    monkeypatch.setitem(media_api.MEDIA_ROOTS, "/generated/hls/", tmp_path)
+    assert client.get("/generated/hls/track_001/seg_000.ts").content == b"segment"
+
+    monkeypatch.setenv("FERRIC_MEDIA_SIGNING_KEY", "secret")
+    playlist_url = sign_media_path("/generated/hls/track_001/playlist.m3u8", int(time.time()) + 60, b"secret")
+    segment_url = playlist_url.rsplit("/", 1)[0] + "/seg_000.ts"
+    assert client.get(segment_url).headers["cache-control"] == media_api.IMMUTABLE_CACHE_CONTROL
+    assert client.get(playlist_url).headers["cache-control"] == media_api.REVALIDATE_CACHE_CONTROL
+    assert client.get("/generated/hls/track_001/seg_000.ts").status_code == 403
+
+
+def test_media_response_hands_the_file_to_zero_copy_servers(tmp_path: Path) -> None:
+    path = tmp_path / "seg_000.ts"
+    path.write_bytes(bytes(range(100)))
+    messages: list[dict] = []
+
+    async def send(message: dict) -> None:
+        if message["type"] == media_api.ZEROCOPY_EXTENSION:
+            # What a server would os.sendfile() from the descriptor.
+            message = {**message, "sent": os.pread(message["file"].fileno(), message["count"], message["offset"])}
+        messages.append(message)
+
+    async def receive() -> dict:
+        return {"type": "http.disconnect"}
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "headers": [(b"range", b"bytes=10-19")],
+        "extensions": {media_api.ZEROCOPY_EXTENSION: {}},
+    }
+    response = media_api.MediaFileResponse(path, media_type="video/mp2t", stat_result=os.stat(path))
+    asyncio.run(response(scope, receive, send))
+
+    start, body = messages
+    assert start["status"] == 206
+    assert dict(start["headers"])[b"content-range"] == b"bytes 10-19/100"
+    assert body["type"] == media_api.ZEROCOPY_EXTENSION
+    assert body["sent"] == bytes(range(10, 20))
+
+
+def _segment(path: Path, data: bytes) -> CachedSegment:
+    path.write_bytes(data)
+    stat_result = os.stat(path)
+    return CachedSegment(str(path), data, stat_result.st_mtime_ns, stat_result.st_size, '"e"', "lm", 0.0)
+
+
+def test_segment_cache_admits_by_frequency_within_its_byte_budget(tmp_path: Path) -> None:
+    now = [0.0]
+    cache = SegmentCache(budget_bytes=30, max_entry_bytes=20, clock=lambda: now[0], expected_entries=4096)
+    for name in ("hot_a", "hot_b", "hot_c"):
+        for _ in range(3):
+            assert cache.get(name) is None
+        assert cache.put(name, _segment(tmp_path / name, b"x" * 10))
+    assert cache.bytes == 30
+
+    # A one-off request for a cold file cannot push out segments people keep playing.
+    assert cache.get("cold") is None
+    assert not cache.put("cold", _segment(tmp_path / "cold", b"y" * 10))
+    assert cache.rejections == 1
+    assert not cache.put("huge", _segment(tmp_path / "huge", b"z" * 21))
+
+    # Once it is requested more often than the least recently used entry, it replaces it.
+    for _ in range(4):
+        cache.get("cold")
+    assert cache.get("hot_b") is not None and cache.get("hot_c") is not None
+    assert cache.put("cold", _segment(tmp_path / "cold", b"y" * 10))
+    assert cache.get("hot_a") is None
+    assert cache.get("cold").data == b"y" * 10
+    assert cache.evictions == 1 and cache.bytes == 30
+
+    hits, misses = cache.hits, cache.misses
+    assert cache.get("hot_b") is not None
+    assert (cache.hits, cache.misses) == (hits + 1, misses)
+
+    # Rewritten files are noticed on the next check after `revalidate_sec`.
+    (tmp_path / "hot_b").write_bytes(b"new content")
+    assert cache.get("hot_b") is not None
+    now[0] += cache.revalidate_sec
+    assert cache.get("hot_b") is None
+    cache.invalidate("hot_")
+    assert len(cache) == 1
+
+
+def test_hot_segments_are_served_from_memory(
+    client: TestClient, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "track_001").mkdir()
+    (tmp_path / "track_001" / "seg_000.ts").write_bytes(b"segment")
+    monkeypatch.setitem(media_api.MEDIA_ROOTS, "/generated/hls/", tmp_path)
+    url = "/generated/hls/track_001/seg_000.ts"
+    headers = _admin_headers()
+    before = client.get("/api/v1/admin/stats/segment-cache", headers=headers).json()
+
+    first = client.get(url)
+    assert first.content == b"segment"
+    stats = client.get("/api/v1/admin/stats/segment-cache", headers=headers).json()
+    assert (stats["hits"], stats["misses"]) == (before["hits"], before["misses"] + 1)
+    assert (stats["entries"], stats["bytes"]) == (1, 7)
+
+    def no_disk(*args, **kwargs):
+        raise AssertionError("cached segment touched the filesystem")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(media_api.os, "stat", no_disk)
+        patched.setattr(media_api, "media_file_path", no_disk)
+        cached = client.get(url)
+        assert cached.content == b"segment"
+        assert cached.headers["etag"] == first.headers["etag"]
+        assert cached.headers["last-modified"] == first.headers["last-modified"]
+        assert client.get(url, headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+    assert client.get("/api/v1/admin/stats/segment-cache", headers=headers).json()["hits"] == before["hits"] + 2
+
+    # Ranged reads go to the file; a re-encode drops the track's entries.
+    assert client.get(url, headers={"Range": "bytes=0-2"}).content == b"seg"
+    (tmp_path / "track_001" / "seg_000.ts").write_bytes(b"re-encoded")
+    media_api.invalidate_hls_track("track_001")
+    assert client.get(url).content == b"re-encoded"
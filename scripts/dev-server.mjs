@@ -29,7 +29,8 @@ function sanitizePath(urlPath) {
 }
 
 const server = http.createServer((req, res) => {
-  if ((req.url || "").startsWith("/api/")) {
+  // Signed media URLs (/media/s/...) are verified and served by the backend.
+  if ((req.url || "").startsWith("/api/") || (req.url || "").startsWith("/media/")) {
     const upstreamPath = req.url || "/";
     const options = {
       protocol: backendUrl.protocol,
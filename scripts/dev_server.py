@@ -55,7 +55,8 @@ class DevHandler(BaseHTTPRequestHandler):
 
     def _handle(self, send_body: bool = True) -> None:
         parsed = parse.urlparse(self.path)
-        if parsed.path.startswith("/api/"):
+        # Signed media URLs (/media/s/...) are verified and served by the backend.
+        if parsed.path.startswith(("/api/", "/media/")):
             self._proxy_to_backend(send_body=send_body)
             return
 
@@ -15,27 +15,156 @@ export class StaticCatalogSource {
   }
 }
 
+export class ShardedCatalogSource {
+  constructor(options = {}) {
+    const { fetchFn = (...args) => fetch(...args), indexUrl = "/public/generated/catalog/index.json" } = options;
+    this.fetchFn = fetchFn;
+    this.indexUrl = indexUrl;
+  }
+
+  async fetchJson(url) {
+    const response = await this.fetchFn(url);
+    if (!response.ok) {
+      throw new Error(`catalog load failed: ${response.status}`);
+    }
+    return response.json();
+  }
+
+  async fetchCatalog() {
+    const index = await this.fetchJson(this.indexUrl);
+    const base = this.indexUrl.slice(0, this.indexUrl.lastIndexOf("/") + 1);
+    const shards = await Promise.all(index.shards.map((shard) => this.fetchJson(`${base}${shard.path}`)));
+    return {
+      schema_version: index.schema_version,
+      app: index.app,
+      // Shards are hash buckets; restore the API's ID order.
+      tracks: shards
+        .flatMap((shard) => shard.tracks)
+        .sort((a, b) => (a.id < b.id ? -1 : a.id > b.id ? 1 : 0))
+    };
+  }
+}
+
 export class ApiCatalogSource {
   constructor(options = {}) {
-    const { fetchFn = (...args) => fetch(...args), baseUrl = "/api/v1" } = options;
+    const {
+      fetchFn = (...args) => fetch(...args),
+      baseUrl = "/api/v1",
+      storage = null,
+      storageKey = "ferric_catalog_sync"
+    } = options;
     this.fetchFn = fetchFn;
     this.baseUrl = baseUrl;
+    this.storage = storage;
+    this.storageKey = storageKey;
+    this.changeToken = "0";
+    this.localTracks = new Map();
+    this.restoreLocalCopy();
   }
 
-  async fetchCatalog(params = {}) {
+  restoreLocalCopy() {
+    const raw = this.storage?.getItem(this.storageKey);
+    if (!raw) {
+      return;
+    }
+    try {
+      const saved = JSON.parse(raw);
+      this.changeToken = saved.token ?? "0";
+      this.localTracks = new Map((saved.tracks ?? []).map((track) => [track.id, track]));
+    } catch {
+      this.changeToken = "0";
+      this.localTracks = new Map();
+    }
+  }
+
+  saveLocalCopy() {
+    if (!this.storage) {
+      return;
+    }
+    try {
+      this.storage.setItem(
+        this.storageKey,
+        JSON.stringify({ token: this.changeToken, tracks: [...this.localTracks.values()] })
+      );
+    } catch {
+      // Large catalogs can exceed the storage quota. Keep syncing in memory and
+      // drop the saved copy so a stale token is never restored.
+      try {
+        this.storage.removeItem?.(this.storageKey);
+      } catch {
+        // Nothing left to clean up.
+      }
+      this.storage = null;
+    }
+  }
+
+  async syncCatalog(limit = 500) {
+    let delta;
+    do {
+      const response = await this.fetchFn(
+        this.buildUrl("/catalog/changes", { since: this.changeToken, limit })
+      );
+      if (response.status === 410) {
+        // The server no longer recognizes the token: start over from an empty copy.
+        this.changeToken = "0";
+        this.localTracks = new Map();
+        delta = { has_more: true };
+        continue;
+      }
+      if (!response.ok) {
+        throw new Error(`catalog sync failed: ${response.status}`);
+      }
+      delta = await response.json();
+      for (const track of delta.upserted) {
+        this.localTracks.set(track.id, track);
+      }
+      for (const trackId of delta.removed) {
+        this.localTracks.delete(trackId);
+      }
+      this.changeToken = delta.next_token;
+    } while (delta.has_more);
+
+    this.saveLocalCopy();
+    const tracks = [...this.localTracks.values()].sort((a, b) => (a.id < b.id ? -1 : a.id > b.id ? 1 : 0));
+    return { schema_version: "1.0", tracks };
+  }
+
+  buildUrl(path, params = {}) {
     const useAbsolute = this.baseUrl.startsWith("http://") || this.baseUrl.startsWith("https://");
-    const url = new URL(`${this.baseUrl}/catalog`, "http://local");
+    const url = new URL(`${this.baseUrl}${path}`, "http://local");
     for (const [key, value] of Object.entries(params)) {
       if (value !== undefined && value !== null && value !== "") {
         url.searchParams.set(key, String(value));
       }
     }
+    return useAbsolute ? url.toString() : url.pathname + url.search;
+  }
 
-    const requestUrl = useAbsolute ? url.toString() : url.pathname + url.search;
-    const response = await this.fetchFn(requestUrl);
+  async fetchCatalog(params = {}) {
+    const response = await this.fetchFn(this.buildUrl("/catalog", params));
     if (!response.ok) {
       throw new Error(`catalog load failed: ${response.status}`);
     }
     return response.json();
   }
+
+  async fetchTracks(ids) {
+    if (!ids?.length) {
+      return { tracks: [], missing_ids: [] };
+    }
+    const response = await this.fetchFn(this.buildUrl("/tracks", { ids: ids.join(",") }));
+    if (!response.ok) {
+      throw new Error(`track lookup failed: ${response.status}`);
+    }
+    return response.json();
+  }
+
+  async fetchNextPage(previousPage, params = {}) {
+    const cursor = previousPage?.page?.next_cursor;
+    if (!cursor) {
+      return null;
+    }
+    const { offset: _offset, ...rest } = params;
+    return this.fetchCatalog({ ...rest, cursor });
+  }
 }
@@ -6,8 +6,9 @@ export class PlaybackController {
   constructor(mediaEngine, options = {}) {
     assertMediaEngine(mediaEngine);
 
-    const { randomFn = Math.random, streamResolver = new StaticStreamResolver() } = options;
+    const { randomFn = Math.random, streamResolver = new StaticStreamResolver(), prefetchCount = 3 } = options;
     this.randomFn = randomFn;
+    this.prefetchCount = prefetchCount;
     this.mediaEngine = mediaEngine;
     assertStreamResolver(streamResolver);
     this.streamResolver = streamResolver;
@@ -88,6 +89,7 @@ export class PlaybackController {
 
       const queueIndex = this.queueManager.getCurrentIndex(track.id);
       this.state.currentIndex = queueIndex;
+      this.#prefetchUpcoming();
     }
 
     await this.mediaEngine.play();
@@ -194,4 +196,24 @@ export class PlaybackController {
     this.state.isPlaying = false;
     return this.getState();
   }
+
+  // Let resolvers that support it resolve the next few queue entries while this one plays.
+  #prefetchUpcoming() {
+    if (typeof this.streamResolver.prefetch !== "function" || this.prefetchCount <= 0) {
+      return;
+    }
+
+    const queue = this.queueManager.getQueue();
+    const index = this.state.currentIndex;
+    if (index < 0) {
+      return;
+    }
+    let upcoming = queue.slice(index + 1, index + 1 + this.prefetchCount);
+    if (this.state.repeatMode === "all") {
+      upcoming = upcoming.concat(queue.slice(0, Math.min(index, this.prefetchCount - upcoming.length)));
+    }
+    if (upcoming.length > 0) {
+      Promise.resolve(this.streamResolver.prefetch(upcoming)).catch(() => {});
+    }
+  }
 }
@@ -22,18 +22,40 @@ export class StaticStreamResolver {
   }
 }
 
+const DEFAULT_CLIENT = { platform: "web", app_version: "0.1.0" };
+
 export class ApiStreamResolver {
   constructor(options = {}) {
-    const { fetchFn = (...args) => fetch(...args), baseUrl = "/api/v1" } = options;
+    const {
+      fetchFn = (...args) => fetch(...args),
+      baseUrl = "/api/v1",
+      nowFn = Date.now,
+      expiryMarginMs = 30_000,
+      defaultDurationMs = 10 * 60_000
+    } = options;
     this.fetchFn = fetchFn;
     this.baseUrl = baseUrl;
+    this.nowFn = nowFn;
+    this.expiryMarginMs = expiryMarginMs;
+    this.defaultDurationMs = defaultDurationMs;
+    this.resolved = new Map();
+    this.pending = new Map();
   }
 
-  async resolve(track, client = { platform: "web", app_version: "0.1.0" }) {
+  async resolve(track, client = DEFAULT_CLIENT) {
     if (!track?.id) {
       throw new Error("resolve requires track.id");
     }
 
+    const cached = this.#getUsable(track);
+    if (cached) {
+      return cached;
+    }
+    const prefetched = await this.pending.get(track.id);
+    if (prefetched && this.#covers(prefetched, track)) {
+      return prefetched;
+    }
+
     const response = await this.fetchFn(`${this.baseUrl}/playback/resolve`, {
       method: "POST",
       headers: { "Content-Type": "application/json" },
@@ -47,6 +69,83 @@ export class ApiStreamResolver {
       throw new Error(`stream resolve failed: ${response.status}`);
     }
 
-    return response.json();
+    const result = await response.json();
+    this.#remember(result);
+    return result;
+  }
+
+  // Resolve upcoming tracks in one batch request and keep them until their URLs
+  // expire. Failures are swallowed: resolve() falls back to a single request.
+  prefetch(tracks, client = DEFAULT_CLIENT) {
+    const trackIds = [
+      ...new Set(
+        tracks
+          .filter((track) => track?.id && !this.#getUsable(track) && !this.pending.has(track.id))
+          .map((track) => track.id)
+      )
+    ];
+    if (trackIds.length === 0) {
+      return Promise.resolve([]);
+    }
+
+    const batch = this.fetchFn(`${this.baseUrl}/playback/resolve:batch`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ track_ids: trackIds, client })
+    })
+      .then(async (response) => {
+        if (!response.ok) {
+          throw new Error(`stream batch resolve failed: ${response.status}`);
+        }
+        const { streams = [] } = await response.json();
+        streams.forEach((result) => this.#remember(result));
+        return streams;
+      })
+      .catch(() => [])
+      .finally(() => trackIds.forEach((trackId) => this.pending.delete(trackId)));
+
+    for (const trackId of trackIds) {
+      this.pending.set(
+        trackId,
+        batch.then((streams) => streams.find((result) => result.track_id === trackId) ?? null)
+      );
+    }
+    return batch;
+  }
+
+  #isFresh(result, remainingMs = 0) {
+    const expiresAt = Date.parse(result?.stream?.expires_at ?? "");
+    return Number.isFinite(expiresAt) && expiresAt - this.expiryMarginMs - remainingMs > this.nowFn();
+  }
+
+  // Signed playlist and segment URLs share one expiry, so a cached result is only
+  // usable if it outlives the whole track, not just the playlist request.
+  #covers(result, track) {
+    const durationMs = track.duration_sec > 0 ? track.duration_sec * 1000 : this.defaultDurationMs;
+    return this.#isFresh(result, durationMs);
+  }
+
+  #getUsable(track) {
+    const result = this.resolved.get(track.id);
+    if (!result) {
+      return null;
+    }
+    if (!this.#isFresh(result)) {
+      this.resolved.delete(track.id);
+      return null;
+    }
+    return this.#covers(result, track) ? result : null;
+  }
+
+  #remember(result) {
+    if (!result?.track_id || !this.#isFresh(result)) {
+      return;
+    }
+    for (const [trackId, cached] of this.resolved) {
+      if (!this.#isFresh(cached)) {
+        this.resolved.delete(trackId);
+      }
+    }
+    this.resolved.set(result.track_id, result);
   }
 }
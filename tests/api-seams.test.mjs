@@ -1,5 +1,5 @@
 import assert from "node:assert/strict";
-import { StaticCatalogSource, ApiCatalogSource } from "../src/data/catalog-source.mjs";
+import { StaticCatalogSource, ShardedCatalogSource, ApiCatalogSource } from "../src/data/catalog-source.mjs";
 import { StaticStreamResolver, ApiStreamResolver } from "../src/playback/stream-resolver.mjs";
 
 {
@@ -13,6 +13,27 @@ import { StaticStreamResolver, ApiStreamResolver } from "../src/playback/stream-
   assert.equal(catalog.loaded_from, "/public/catalog.json");
 }
 
+{
+  const files = {
+    "/public/generated/catalog/index.json": {
+      schema_version: "1.0",
+      app: { title: "Ferric POC" },
+      shards: [{ path: "tracks-a.json" }, { path: "tracks-b.json" }]
+    },
+    "/public/generated/catalog/tracks-a.json": { tracks: [{ id: "track_002" }] },
+    "/public/generated/catalog/tracks-b.json": { tracks: [{ id: "track_001" }, { id: "track_003" }] }
+  };
+  const source = new ShardedCatalogSource({
+    fetchFn: async (url) => ({ ok: url in files, status: 404, json: async () => files[url] })
+  });
+  const catalog = await source.fetchCatalog();
+  assert.equal(catalog.app.title, "Ferric POC");
+  assert.deepEqual(
+    catalog.tracks.map((track) => track.id),
+    ["track_001", "track_002", "track_003"]
+  );
+}
+
 {
   const calls = [];
   const source = new ApiCatalogSource({
@@ -44,6 +65,100 @@ import { StaticStreamResolver, ApiStreamResolver } from "../src/playback/stream-
   assert.equal(calls[0], "http://127.0.0.1:8001/api/v1/catalog?limit=1");
 }
 
+{
+  const calls = [];
+  const source = new ApiCatalogSource({
+    fetchFn: async (url) => {
+      calls.push(url);
+      return {
+        ok: true,
+        json: async () => ({ tracks: [], page: { next_cursor: null } })
+      };
+    }
+  });
+  const next = await source.fetchNextPage({ page: { next_cursor: "dHJhY2tfMDAy" } }, { limit: 2, offset: 4 });
+  assert.equal(calls[0], "/api/v1/catalog?limit=2&cursor=dHJhY2tfMDAy");
+  assert.equal(await source.fetchNextPage(next), null);
+  assert.equal(calls.length, 1);
+}
+
+{
+  const calls = [];
+  const source = new ApiCatalogSource({
+    fetchFn: async (url) => {
+      calls.push(url);
+      return {
+        ok: true,
+        json: async () => ({ tracks: [{ id: "track_002" }], missing_ids: ["gone"] })
+      };
+    }
+  });
+  const result = await source.fetchTracks(["track_002", "gone"]);
+  assert.equal(calls[0], "/api/v1/tracks?ids=track_002%2Cgone");
+  assert.deepEqual(result.missing_ids, ["gone"]);
+  assert.deepEqual(await source.fetchTracks([]), { tracks: [], missing_ids: [] });
+  assert.equal(calls.length, 1);
+}
+
+{
+  const feed = {
+    0: { upserted: [{ id: "track_002" }, { id: "track_001" }], removed: [], next_token: "2", has_more: true },
+    2: { upserted: [{ id: "track_003" }], removed: [], next_token: "3", has_more: false },
+    3: { upserted: [{ id: "track_001", title: "New" }], removed: ["track_002"], next_token: "5", has_more: false }
+  };
+  const calls = [];
+  const saved = new Map();
+  const storage = { getItem: (key) => saved.get(key) ?? null, setItem: (key, value) => saved.set(key, value) };
+  const fetchFn = async (url) => {
+    calls.push(url);
+    const since = new URL(url, "http://local").searchParams.get("since");
+    return { ok: true, json: async () => feed[since] };
+  };
+
+  const source = new ApiCatalogSource({ fetchFn, storage });
+  const first = await source.syncCatalog(2);
+  assert.deepEqual(first.tracks.map((track) => track.id), ["track_001", "track_002", "track_003"]);
+  assert.equal(calls[0], "/api/v1/catalog/changes?since=0&limit=2");
+
+  const returning = new ApiCatalogSource({ fetchFn, storage });
+  const second = await returning.syncCatalog(2);
+  assert.equal(calls[2], "/api/v1/catalog/changes?since=3&limit=2");
+  assert.deepEqual(second.tracks.map((track) => track.id), ["track_001", "track_003"]);
+  assert.equal(second.tracks[0].title, "New");
+}
+
+{
+  const fullStorage = {
+    getItem: () => null,
+    setItem: () => {
+      throw new Error("QuotaExceededError");
+    },
+    removeItem: () => {}
+  };
+  const calls = [];
+  const fetchFn = async (url) => {
+    calls.push(url);
+    const since = new URL(url, "http://local").searchParams.get("since");
+    if (since === "99") {
+      return { ok: false, status: 410, json: async () => ({}) };
+    }
+    return {
+      ok: true,
+      status: 200,
+      json: async () => ({ upserted: [{ id: "track_001" }], removed: [], next_token: "4", has_more: false })
+    };
+  };
+
+  const source = new ApiCatalogSource({ fetchFn, storage: fullStorage });
+  source.changeToken = "99";
+  source.localTracks.set("ghost", { id: "ghost" });
+  const synced = await source.syncCatalog();
+  assert.deepEqual(synced.tracks.map((track) => track.id), ["track_001"]);
+  assert.deepEqual(calls.map((url) => new URL(url, "http://local").searchParams.get("since")), ["99", "0"]);
+  assert.equal(source.changeToken, "4");
+  assert.equal(source.storage, null);
+}
+
 {
   const resolver = new StaticStreamResolver();
   const result = await resolver.resolve({
@@ -76,4 +191,90 @@ import { StaticStreamResolver, ApiStreamResolver } from "../src/playback/stream-
   assert.equal(result.stream.url, "/api/generated/hls/tokenized.m3u8");
 }
 
+{
+  let now = Date.parse("2026-01-01T00:00:00Z");
+  const expiresAt = "2026-01-01T00:30:00Z";
+  const calls = [];
+  const resolver = new ApiStreamResolver({
+    nowFn: () => now,
+    fetchFn: async (url, init) => {
+      const body = JSON.parse(init.body);
+      calls.push({ url, body });
+      if (url.endsWith("/playback/resolve:batch")) {
+        return {
+          ok: true,
+          json: async () => ({
+            streams: body.track_ids
+              .filter((trackId) => trackId !== "gone")
+              .map((trackId) => ({
+                track_id: trackId,
+                stream: { protocol: "hls", url: `/media/s/${trackId}.m3u8`, expires_at: expiresAt }
+              })),
+            missing_ids: body.track_ids.filter((trackId) => trackId === "gone")
+          })
+        };
+      }
+      return {
+        ok: true,
+        json: async () => ({
+          track_id: body.track_id,
+          stream: { protocol: "hls", url: `/media/s/single/${body.track_id}.m3u8`, expires_at: expiresAt }
+        })
+      };
+    }
+  });
+
+  const pending = resolver.prefetch([{ id: "track_002" }, { id: "track_003" }, { id: "gone" }, { id: "track_002" }]);
+  const whileInFlight = await resolver.resolve({ id: "track_002" });
+  await pending;
+  assert.equal(calls.length, 1);
+  assert.equal(calls[0].url, "/api/v1/playback/resolve:batch");
+  assert.deepEqual(calls[0].body.track_ids, ["track_002", "track_003", "gone"]);
+  assert.equal(whileInFlight.stream.url, "/media/s/track_002.m3u8");
+  assert.equal((await resolver.resolve({ id: "track_003" })).stream.url, "/media/s/track_003.m3u8");
+  assert.equal(calls.length, 1);
+
+  await resolver.prefetch([{ id: "track_002" }, { id: "track_003" }]);
+  assert.equal(calls.length, 1);
+
+  // Missing from the batch, so it falls back to a single resolve.
+  assert.equal((await resolver.resolve({ id: "gone" })).stream.url, "/media/s/single/gone.m3u8");
+  assert.equal(calls.length, 2);
+
+  // Three minutes before expiry: a 2-minute track still fits, a 4-minute one would
+  // see its later segments 403, so it is resolved again (and re-batched on prefetch).
+  now = Date.parse("2026-01-01T00:27:00Z");
+  assert.equal((await resolver.resolve({ id: "track_003", duration_sec: 120 })).stream.url, "/media/s/track_003.m3u8");
+  assert.equal(calls.length, 2);
+  await resolver.prefetch([{ id: "track_003", duration_sec: 240 }]);
+  assert.equal(calls.length, 3);
+  assert.deepEqual(calls[2].body.track_ids, ["track_003"]);
+  assert.equal(
+    (await resolver.resolve({ id: "track_002", duration_sec: 240 })).stream.url,
+    "/media/s/single/track_002.m3u8"
+  );
+  assert.equal(calls.length, 4);
+
+  // Within the expiry margin the cached URL is no longer handed out.
+  now = Date.parse("2026-01-01T00:29:45Z");
+  assert.equal((await resolver.resolve({ id: "track_002" })).stream.url, "/media/s/single/track_002.m3u8");
+  assert.equal(calls.length, 5);
+}
+
+{
+  const resolver = new ApiStreamResolver({
+    fetchFn: async (url) => {
+      if (url.endsWith(":batch")) {
+        return { ok: false, status: 503, json: async () => ({}) };
+      }
+      return {
+        ok: true,
+        json: async () => ({ track_id: "track_001", stream: { protocol: "hls", url: "/single.m3u8" } })
+      };
+    }
+  });
+  assert.deepEqual(await resolver.prefetch([{ id: "track_001" }]), []);
+  assert.equal((await resolver.resolve({ id: "track_001" })).stream.url, "/single.m3u8");
+}
+
 console.log("PASS: catalog and stream resolver seams are wired");
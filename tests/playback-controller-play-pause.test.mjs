@@ -403,4 +403,32 @@ const idOnlyTrack = { id: "track_004" };
   assert.throws(() => controller.setRepeatMode("invalid"), /one of: off, one, all/);
 }
 
+{
+  const engine = createFakeMediaEngine();
+  const prefetched = [];
+  const controller = new PlaybackController(engine, {
+    prefetchCount: 2,
+    streamResolver: {
+      async resolve(track) {
+        return { track_id: track.id, stream: { protocol: "hls", url: `/resolved/${track.id}/playlist.m3u8` } };
+      },
+      async prefetch(tracks) {
+        prefetched.push(tracks.map((track) => track.id));
+      }
+    }
+  });
+  controller.setQueue([track1, track2, track3]);
+
+  await controller.playAt(0);
+  await controller.play(track1);
+  assert.deepEqual(prefetched, [["track_002", "track_003"]]);
+
+  await controller.next();
+  assert.deepEqual(prefetched.at(-1), ["track_003"]);
+
+  controller.setRepeatMode("all");
+  await controller.next();
+  assert.deepEqual(prefetched.at(-1), ["track_001", "track_002"]);
+}
+
 console.log("PASS: play/pause/seek/skip/next/previous/shuffle/repeat controller behavior is correct");